@@ -0,0 +1,239 @@
+"""HTTP API for breadcrumbs.
+
+Run with ``uvicorn app.api:app``.
+"""
+
+import os
+import secrets
+from contextlib import asynccontextmanager
+from dataclasses import asdict
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Path, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from sqlalchemy.orm import with_loader_criteria
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import AsyncSessionFactory, engine, get_async_session_factory
+from app.export import (
+    DEFAULT_CHUNK_SIZE,
+    MEDIA_TYPES,
+    encode_chunks_async,
+    iter_crumb_chunks_async,
+)
+from app.http_cache import cached_response
+from app.instrumentation import default_instrumentation
+from app.listings import list_month_async
+from app.loading import apply_profile
+from app.models import Crumb, CrumbListing, Unit, UnitDetail, UnitSummary
+from app.render import default_render_cache, with_html
+from app.stream import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    PUBLISHED,
+    build_page_json,
+    get_stream_page_json_async,
+    stream_statement,
+)
+from app.tag_cache import warm_tag_id_cache
+from app.tag_filter import TagFilter, filter_statement, resolve_tags
+from app.units import list_unit_summaries_async
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the tag id cache of the database requests use; it is shared by every engine on it
+    factory = app.dependency_overrides.get(get_async_session_factory, get_async_session_factory)()
+    default_instrumentation.attach(factory.engine.sync_engine)
+    async with factory.managed_session() as session:
+        await session.run_sync(warm_tag_id_cache)
+    yield
+
+
+app = FastAPI(title="breadcrumbs", lifespan=lifespan)
+default_instrumentation.attach(engine)
+
+
+async def get_session(factory: AsyncSessionFactory = Depends(get_async_session_factory)):
+    async with factory.managed_session() as session:
+        yield session
+
+
+def get_admin_token() -> Optional[str]:
+    """The bearer token of the private routes (ADMIN_TOKEN); None turns them off."""
+    return os.getenv("ADMIN_TOKEN") or None
+
+
+async def require_admin(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
+    token: Optional[str] = Depends(get_admin_token),
+):
+    if token is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if credentials is None or not secrets.compare_digest(credentials.credentials, token):
+        raise HTTPException(
+            status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
+def _page_key(
+    prefix: str, cursor, limit: int, newest_first: bool, published_only: bool, html: bool
+) -> str:
+    return f"{prefix}|{cursor}|{limit}|{int(newest_first)}|{int(published_only)}|{int(html)}"
+
+
+# Rendering is opt-in: most clients only want the markdown
+HTML_QUERY = Query(False, description="Include body_html, rendered from body_md")
+
+
+# Normalized SQL and the slow-query log describe the schema and traffic: admin only
+@app.get("/api/metrics", dependencies=[Depends(require_admin)])
+async def metrics(factory: AsyncSessionFactory = Depends(get_async_session_factory)):
+    """Statement latency by normalized SQL, the slow-query log and session counts."""
+    return {**default_instrumentation.snapshot(), "sessions": asdict(factory.metrics())}
+
+
+def _renderer(html: bool):
+    return default_render_cache.render if html else None
+
+
+def crumb_routes(published_only: bool) -> APIRouter:
+    """The read endpoints, limited to published crumbs or including drafts."""
+    router = APIRouter()
+
+    @router.get("/crumbs")
+    async def crumb_stream(
+        request: Request,
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        newest_first: bool = False,
+        html: bool = HTML_QUERY,
+        session: AsyncSession = Depends(get_session),
+    ):
+        """One page of the crumb stream (a CrumbPage), with ETag/Last-Modified validators."""
+        try:
+            window = stream_statement(cursor, newest_first, published_only).limit(limit + 1)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+
+        async def render():
+            return await get_stream_page_json_async(
+                session, cursor, limit, newest_first, published_only, _renderer(html)
+            )
+
+        key = _page_key("stream", cursor, limit, newest_first, published_only, html)
+        return await cached_response(request, session, key, window, render)
+
+    @router.get("/tags/{name}/crumbs")
+    async def tag_crumbs(
+        request: Request,
+        name: str,
+        cursor: str | None = None,
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        newest_first: bool = False,
+        html: bool = HTML_QUERY,
+        session: AsyncSession = Depends(get_session),
+    ):
+        """One page of the crumbs carrying tag `name` (a CrumbPage)."""
+        try:
+            tag_filter = TagFilter(all_of=[name])
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Tag not found")
+        resolved = await session.run_sync(resolve_tags, tag_filter.names, published_only)
+        if not resolved.tags:
+            raise HTTPException(status_code=404, detail="Tag not found")
+        try:
+            statement = filter_statement(
+                tag_filter, resolved, limit, cursor, newest_first, published_only
+            )
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        window = statement.limit(limit + 1)
+
+        async def render():
+            return build_page_json((await session.exec(window)).all(), limit, _renderer(html))
+
+        tag_key = f"tag:{tag_filter.all_of[0]}"
+        key = _page_key(tag_key, cursor, limit, newest_first, published_only, html)
+        return await cached_response(request, session, key, window, render)
+
+    @router.get("/months/{year}/{month}", response_model=List[CrumbListing])
+    async def month_listing(
+        # datetime covers years 1-9999, and December ends on the first of the next year
+        year: int = Path(ge=1, le=9998),
+        month: int = Path(ge=1, le=12),
+        preview: int | None = Query(None, ge=1, le=1000, description="Body characters to include"),
+        session: AsyncSession = Depends(get_session),
+    ):
+        """The crumbs created in a month, without their bodies (CrumbListing)."""
+        return await list_month_async(session, year, month, preview, published_only)
+
+    @router.get("/units", response_model=List[UnitSummary])
+    async def unit_summaries(session: AsyncSession = Depends(get_session)):
+        """Every unit with its crumb count, first/last crumb time and tags, in one query."""
+        return await list_unit_summaries_async(session, published_only)
+
+    @router.get("/units/{unit_id}")
+    async def unit_detail(
+        request: Request,
+        unit_id: int,
+        html: bool = HTML_QUERY,
+        session: AsyncSession = Depends(get_session),
+    ):
+        """A unit with all of its crumbs in stream order (a UnitDetail)."""
+        window = select(Crumb).where(Crumb.unit_id == unit_id)
+        found = select(Unit.id).where(Unit.id == unit_id)
+        if published_only:
+            # Units hold no visibility of their own; one with only drafts stays hidden
+            window = window.where(PUBLISHED)
+            found = found.where(window.exists())
+        if (await session.exec(found)).first() is None:
+            raise HTTPException(status_code=404, detail="Unit not found")
+
+        async def render():
+            statement = apply_profile(select(Unit).where(Unit.id == unit_id), "unit-detail")
+            if published_only:
+                statement = statement.options(with_loader_criteria(Crumb, PUBLISHED))
+            detail = UnitDetail.model_validate((await session.exec(statement)).one())
+            detail.crumbs.sort(key=lambda crumb: (crumb.created_at, crumb.id))
+            if html:
+                with_html(detail.crumbs)
+            return detail
+
+        key = f"unit:{unit_id}|{int(published_only)}|{int(html)}"
+        return await cached_response(request, session, key, window, render)
+
+    @router.get("/export")
+    async def export(
+        format: Literal["ndjson", "json"] = "ndjson",
+        chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=5000),
+        factory: AsyncSessionFactory = Depends(get_async_session_factory),
+    ):
+        """Stream every crumb, with its unit and tags, as NDJSON or a JSON array."""
+
+        async def body():
+            # The session lives exactly as long as the response body is being sent
+            async with factory.managed_session() as session:
+                async for piece in encode_chunks_async(
+                    iter_crumb_chunks_async(session, chunk_size, published_only), format
+                ):
+                    yield piece
+
+        extension = "ndjson" if format == "ndjson" else "json"
+        return StreamingResponse(
+            body(),
+            media_type=MEDIA_TYPES[format],
+            headers={"Content-Disposition": f'attachment; filename="crumbs.{extension}"'},
+        )
+
+    return router
+
+
+# Public routes never show drafts; the draft-inclusive copies live apart under
+# /api/all, for the owner only
+app.include_router(crumb_routes(published_only=True), prefix="/api")
+app.include_router(
+    crumb_routes(published_only=False), prefix="/api/all", dependencies=[Depends(require_admin)]
+)
@@ -0,0 +1,120 @@
+"""Archive tier: compress the bodies of old crumbs in place.
+
+``archive_bodies`` rewrites ``body_md`` of crumbs created more than
+``older_than`` ago as compressed BLOBs (see app/compression.py), in batches
+of ``batch_size`` with one transaction each, walking the table by id so a
+run can be interrupted and resumed. Reads inflate archived bodies
+transparently; recent crumbs are never touched, so the stream's hot pages
+cost exactly what they did before. ``updated_at`` is preserved: archiving
+does not change what a crumb says.
+
+The space comes back to the filesystem once the database is vacuumed
+(``vacuum=True``). Editing an archived crumb stores its new body as plain
+text again; a later run archives it once it is old enough.
+
+SQLite only: PostgreSQL already compresses large text values (TOAST) and
+its full-text index is generated from the column itself, so an archived
+BLOB there would be both redundant and unsearchable.
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import bindparam, func, text, update
+from sqlmodel import select
+
+from app.compression import compress_if_smaller
+from app.db import SessionFactory
+from app.models import Crumb
+from app.search import upgrade_search_triggers
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class ArchiveReport:
+    crumbs: int = 0
+    skipped: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ratio(self) -> float:
+        return self.bytes_after / self.bytes_before if self.bytes_before else 1.0
+
+
+def archive_candidates_statement(cutoff: datetime, after_id: int, limit: int):
+    """Plain-text bodies created before `cutoff`, in id order from `after_id`."""
+    return (
+        select(Crumb.id, Crumb.body_md)
+        .where(
+            Crumb.id > after_id,
+            Crumb.created_at < cutoff,
+            func.typeof(Crumb.body_md) == "text",
+        )
+        .order_by(Crumb.id)
+        .limit(limit)
+    )
+
+
+# Setting updated_at to itself keeps its onupdate default from firing
+_archive_update = (
+    update(Crumb.__table__)
+    .where(Crumb.__table__.c.id == bindparam("crumb_id"))
+    .values(body_md=bindparam("archived"), updated_at=Crumb.__table__.c.updated_at)
+)
+
+
+def archive_bodies(
+    factory: SessionFactory,
+    older_than: timedelta,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    use_dictionary: bool = True,
+    vacuum: bool = False,
+    now: Optional[datetime] = None,
+) -> ArchiveReport:
+    """Compress bodies of crumbs older than `older_than`, leaving ones that would not shrink."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    cutoff = (now or datetime.now(timezone.utc)) - older_than
+    report = ArchiveReport()
+    started = time.perf_counter()
+    with factory.managed_session() as session:
+        dialect = session.get_bind().dialect.name
+        if dialect != "sqlite":
+            raise ValueError(
+                f"Body archiving is only supported on SQLite, not {dialect}; "
+                "PostgreSQL already compresses large text with TOAST"
+            )
+        upgrade_search_triggers(session)
+    after_id = 0
+    while True:
+        with factory.managed_session() as session:
+            rows = session.execute(
+                archive_candidates_statement(cutoff, after_id, batch_size)
+            ).all()
+            if not rows:
+                break
+            params = []
+            for crumb_id, body_md in rows:
+                archived = compress_if_smaller(body_md, use_dictionary)
+                if archived is None:
+                    report.skipped += 1
+                    continue
+                report.bytes_before += len(body_md.encode())
+                report.bytes_after += len(archived)
+                params.append({"crumb_id": crumb_id, "archived": archived})
+            if params:
+                session.execute(_archive_update, params)
+            report.crumbs += len(params)
+            report.batches += 1
+            after_id = rows[-1][0]
+    if vacuum:
+        with factory.engine.connect() as connection:
+            connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,94 @@
+"""Compressed storage for archived crumb bodies.
+
+An archived body is stored in ``crumb.body_md`` itself as a BLOB: one codec
+byte followed by a raw DEFLATE stream of the UTF-8 text. Live bodies stay
+TEXT, so the two are told apart by type alone and nothing about the schema
+changes. ``CompressibleText`` is the column type of ``Crumb.body_md``; it
+inflates BLOBs as rows are read, so the ORM, column queries and the
+serializers all see plain strings.
+
+Most crumbs are a few hundred characters, too short for DEFLATE to find
+much to reuse on its own, so codec 2 primes it with ``DICTIONARY``: a preset
+of markdown syntax and common words. Codecs are never reused: a new
+dictionary gets a new codec byte, and old ones stay readable.
+"""
+
+import zlib
+from typing import Optional
+
+from sqlalchemy.types import TypeDecorator
+from sqlmodel.sql.sqltypes import AutoString
+
+RAW = 1
+DICTIONARY_V1 = 2
+DEFAULT_LEVEL = 9
+
+# zlib favours matches near the end of the dictionary, so the commonest strings go last
+DICTIONARY = (
+    "```python\n```sql\n```bash\n```\n| --- | --- |\n> **Note:** ![image](https://"
+    "[link](https://github.com/ https://www.youtube.com/watch?v= https://en.wikipedia.org/wiki/"
+    "## Notes\n## Summary\n## Questions\n### Example\n- [ ] - [x] 1. 2. 3. TODO: TIL: "
+    "def return import from class self None True False print( async await "
+    "SELECT * FROM WHERE JOIN ON ORDER BY GROUP BY LIMIT INSERT INTO UPDATE "
+    "because however although therefore actually probably really maybe "
+    "something thinking about important interesting different problem question "
+    "should could would which there their these those about after before "
+    "people think learned today yesterday tomorrow working writing reading "
+    " of the, in the, to the, on the, for the, and the, that the, is a, it is, "
+    "I think I was I have I am you can we are this is that is there is it's don't "
+    "**`*_ - * \n\n- \n\n## \n\n"
+    " the and that with this for you are was have not but what all "
+).encode()
+
+
+def compress_text(text: str, use_dictionary: bool = True, level: int = DEFAULT_LEVEL) -> bytes:
+    """The archived form of `text`: a codec byte and raw DEFLATE data."""
+    if use_dictionary:
+        codec, compressor = DICTIONARY_V1, zlib.compressobj(level, wbits=-15, zdict=DICTIONARY)
+    else:
+        codec, compressor = RAW, zlib.compressobj(level, wbits=-15)
+    return bytes([codec]) + compressor.compress(text.encode()) + compressor.flush()
+
+
+def decompress_text(data: bytes) -> str:
+    """Inverse of compress_text."""
+    codec = data[0]
+    if codec == DICTIONARY_V1:
+        decompressor = zlib.decompressobj(wbits=-15, zdict=DICTIONARY)
+    elif codec == RAW:
+        decompressor = zlib.decompressobj(wbits=-15)
+    else:
+        raise ValueError(f"Unknown archive codec {codec}")
+    return (decompressor.decompress(data[1:]) + decompressor.flush()).decode()
+
+
+def compress_if_smaller(text: str, use_dictionary: bool = True) -> Optional[bytes]:
+    """compress_text(text), or None when that would not save space."""
+    data = compress_text(text, use_dictionary)
+    return data if len(data) < len(text.encode()) else None
+
+
+class CompressibleText(TypeDecorator):
+    """A string column whose values may be archived BLOBs; reads always return str."""
+
+    impl = AutoString
+    cache_ok = True
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, bytes):
+            return decompress_text(value)
+        return value
+
+
+class TextPrefix(CompressibleText):
+    """CompressibleText cut to its first `length` characters, for body previews."""
+
+    cache_ok = True
+
+    def __init__(self, length: int):
+        super().__init__()
+        self.length = length
+
+    def process_result_value(self, value, dialect):
+        value = super().process_result_value(value, dialect)
+        return value if value is None else value[: self.length]
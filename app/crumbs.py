@@ -0,0 +1,53 @@
+"""Creating single crumbs from CrumbCreate payloads."""
+
+from typing import Optional
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from app.models import Crumb, CrumbCreate, CrumbTag, Tag, Unit
+from app.normalize import normalize_tag_name
+from app.tag_cache import get_tag_id_cache, mark_tags_changed
+
+
+def _unit_id(session: Session, name: Optional[str]) -> Optional[int]:
+    if not name:
+        return None
+    # Unit names are not unique; a crumb joins the most recent unit of that name
+    unit_id = session.exec(select(func.max(Unit.id)).where(Unit.name == name)).one()
+    if unit_id is None:
+        unit_id = session.execute(insert(Unit).returning(Unit.id), {"name": name}).scalar_one()
+    return unit_id
+
+
+def create_crumb(session: Session, data: CrumbCreate) -> Crumb:
+    """Insert a crumb with its unit and tags, resolving tag ids through the tag cache.
+
+    With a warm cache only tags that do not exist yet cost a query: they are
+    created in one INSERT, and the links are written by id without loading
+    any Tag rows.
+    """
+    names = sorted({normalize_tag_name(tag.name) for tag in data.tags})
+    tag_ids = get_tag_id_cache(session).lookup(session, names)
+    new = [name for name in names if name not in tag_ids]
+    if new:
+        mark_tags_changed(session)
+        created = session.execute(
+            insert(Tag).returning(Tag.name, Tag.id), [{"name": name} for name in new]
+        ).all()
+        tag_ids.update(created)
+
+    crumb = Crumb(
+        body_md=data.body_md,
+        created_at=data.created_at,
+        updated_at=data.updated_at,
+        visibility=data.visibility,
+        unit_id=_unit_id(session, data.unit_name),
+    )
+    session.add(crumb)
+    session.flush()
+    if names:
+        session.execute(
+            insert(CrumbTag), [{"crumb_id": crumb.id, "tag_id": tag_ids[name]} for name in names]
+        )
+    return crumb
@@ -1,31 +1,330 @@
 import os
-from contextlib import contextmanager
-from typing import Generator
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import (
+    AsyncGenerator,
+    Callable,
+    Dict,
+    Generator,
+    Generic,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_session, create_async_engine
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 load_dotenv()
 
-db_url = os.getenv("DATABASE_URL", "sqlite:///breadcrumbs.sqlite")
-engine = create_engine(db_url, echo=False)
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return default if value is None else int(value)
+
+
+@dataclass(frozen=True)
+class EngineSettings:
+    """Engine tuning, read from the environment by `from_env`."""
+
+    url: str = "sqlite:///breadcrumbs.sqlite"
+    echo: bool = False
+    # SQLite: applied to every new DBAPI connection
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size: int = -64 * 1024  # negative means KiB, i.e. 64 MiB
+    sqlite_foreign_keys: bool = True
+    # Server databases (PostgreSQL): connection pool
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_pre_ping: bool = True
+    pool_recycle: int = 1800
+    pool_timeout: int = 30
+
+    @classmethod
+    def from_env(cls) -> "EngineSettings":
+        defaults = cls()
+        return cls(
+            url=os.getenv("DATABASE_URL", defaults.url),
+            echo=_env_bool("DB_ECHO", defaults.echo),
+            sqlite_journal_mode=os.getenv("SQLITE_JOURNAL_MODE", defaults.sqlite_journal_mode),
+            sqlite_synchronous=os.getenv("SQLITE_SYNCHRONOUS", defaults.sqlite_synchronous),
+            sqlite_busy_timeout_ms=_env_int(
+                "SQLITE_BUSY_TIMEOUT_MS", defaults.sqlite_busy_timeout_ms
+            ),
+            sqlite_mmap_size=_env_int("SQLITE_MMAP_SIZE", defaults.sqlite_mmap_size),
+            sqlite_cache_size=_env_int("SQLITE_CACHE_SIZE", defaults.sqlite_cache_size),
+            sqlite_foreign_keys=_env_bool("SQLITE_FOREIGN_KEYS", defaults.sqlite_foreign_keys),
+            pool_size=_env_int("DB_POOL_SIZE", defaults.pool_size),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", defaults.max_overflow),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", defaults.pool_pre_ping),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", defaults.pool_recycle),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", defaults.pool_timeout),
+        )
+
+    @property
+    def async_url(self) -> str:
+        """The same database addressed through an asyncio driver."""
+        url = make_url(self.url)
+        driver = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}.get(
+            url.get_backend_name()
+        )
+        if driver is None:
+            raise ValueError(f"No async driver configured for {url.get_backend_name()}")
+        return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(
+            hide_password=False
+        )
+
+    @property
+    def is_sqlite(self) -> bool:
+        return make_url(self.url).get_backend_name() == "sqlite"
+
+    def sqlite_pragmas(self) -> List[str]:
+        return [
+            f"PRAGMA journal_mode = {self.sqlite_journal_mode}",
+            f"PRAGMA synchronous = {self.sqlite_synchronous}",
+            f"PRAGMA busy_timeout = {self.sqlite_busy_timeout_ms}",
+            f"PRAGMA mmap_size = {self.sqlite_mmap_size}",
+            f"PRAGMA cache_size = {self.sqlite_cache_size}",
+            # Not tuning but integrity: the models rely on ON DELETE CASCADE
+            # (passive_deletes), which SQLite only enforces with foreign keys on.
+            # It also enforces crumb.unit_id, which has no ON DELETE action, so a
+            # Core DELETE of a unit that still has crumbs fails; the ORM detaches
+            # the crumbs first. SQLITE_FOREIGN_KEYS=0 restores SQLite's default.
+            f"PRAGMA foreign_keys = {'ON' if self.sqlite_foreign_keys else 'OFF'}",
+        ]
+
+    def engine_kwargs(self) -> dict:
+        if self.is_sqlite:
+            # SQLite picks its own pool (QueuePool for files, SingletonThreadPool for :memory:)
+            return {"echo": self.echo}
+        return {
+            "echo": self.echo,
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_pre_ping": self.pool_pre_ping,
+            "pool_recycle": self.pool_recycle,
+            "pool_timeout": self.pool_timeout,
+        }
+
+
+def configure_sqlite(engine, settings: EngineSettings) -> None:
+    """Run the tuning pragmas on every new connection of a SQLite engine."""
+    pragmas = settings.sqlite_pragmas()
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def create_configured_engine(settings: Optional[EngineSettings] = None):
+    """Create an engine tuned for its backend from `settings` (default: the environment)."""
+    settings = settings or EngineSettings.from_env()
+    engine = create_engine(settings.url, **settings.engine_kwargs())
+    if settings.is_sqlite:
+        configure_sqlite(engine, settings)
+    return engine
+
+
+def create_configured_async_engine(settings: Optional[EngineSettings] = None) -> AsyncEngine:
+    """Async counterpart of create_configured_engine (aiosqlite / asyncpg)."""
+    settings = settings or EngineSettings.from_env()
+    async_engine = create_async_engine(settings.async_url, **settings.engine_kwargs())
+    if settings.is_sqlite:
+        configure_sqlite(async_engine.sync_engine, settings)
+    return async_engine
+
+
+T = TypeVar("T")
+
+
+def engine_of(bind) -> Engine:
+    """The sync Engine behind a session, connection or engine, sync or async."""
+    if isinstance(bind, AsyncSession):
+        bind = bind.sync_session
+    if isinstance(bind, Session):
+        bind = bind.get_bind()
+    if isinstance(bind, Connection):
+        bind = bind.engine
+    if isinstance(bind, AsyncEngine):
+        bind = bind.sync_engine
+    return bind
+
+
+def database_key(engine: Engine) -> Optional[str]:
+    """Name the database `engine` connects to, whatever its driver; None for in-memory SQLite.
+
+    The sync engine, the async engine and other processes on one database
+    file or server share a key; an in-memory SQLite database is private to
+    its engine, so it has none.
+    """
+    url = engine.url
+    backend = url.get_backend_name()
+    if backend == "sqlite":
+        database = url.database or ""
+        if database in ("", ":memory:") or url.query.get("mode") == "memory":
+            return None
+        return f"sqlite:{os.path.abspath(database)}"
+    return url.set(drivername=backend, password=None).render_as_string()
+
+
+class PerDatabase(Generic[T]):
+    """One `factory()` instance per database, shared by every engine connected to it.
+
+    In-process state that describes the data (caches, change generations) has
+    to be per database: a write on the sync engine must reach the state the
+    async engine reads through.
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, T] = {}
+        self._by_engine: "weakref.WeakKeyDictionary[Engine, T]" = weakref.WeakKeyDictionary()
+
+    def get(self, bind) -> T:
+        """The instance for the database behind `bind` (a session, connection or engine)."""
+        engine = engine_of(bind)
+        key = database_key(engine)
+        entries, index = (self._by_engine, engine) if key is None else (self._by_key, key)
+        with self._lock:
+            value = entries.get(index)
+            if value is None:
+                value = entries[index] = self._factory()
+            return value
+
+
+settings = EngineSettings.from_env()
+db_url = settings.url
+engine = create_configured_engine(settings)
+
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """The process-wide async engine, created on first use so the async driver stays optional."""
+    return create_configured_async_engine(settings)
+
+
+@dataclass(frozen=True)
+class SessionMetrics:
+    open_sessions: int
+    peak_sessions: int
+    created: int
+    closed: int
+    leaked: int  # garbage collected without ever being closed
+    average_lifetime: float  # seconds, over closed sessions
+
+
+class SessionTracker:
+    """Track live sessions through weak references.
+
+    Tracking never keeps a session (or its identity map) alive, and opening or
+    closing a session is O(1).
+    """
+
+    def __init__(self):
+        # Re-entrant: a weakref callback may fire from garbage collection
+        # triggered while the lock is already held by this thread
+        self._lock = threading.RLock()
+        self._open: Dict[int, Tuple[weakref.ref, float]] = {}
+        self._peak = 0
+        self._created = 0
+        self._closed = 0
+        self._leaked = 0
+        self._lifetime_total = 0.0
+
+    def add(self, session: "TrackedSession") -> None:
+        key = id(session)
+        ref = weakref.ref(session, partial(self._collected, key))
+        with self._lock:
+            self._open[key] = (ref, time.monotonic())
+            self._created += 1
+            self._peak = max(self._peak, len(self._open))
+        session._tracker = self
+
+    def discard(self, session: Session) -> None:
+        """Record that `session` was closed."""
+        with self._lock:
+            entry = self._open.get(id(session))
+            if entry is None or entry[0]() is not session:
+                return
+            del self._open[id(session)]
+            self._closed += 1
+            self._lifetime_total += time.monotonic() - entry[1]
+
+    def _collected(self, key: int, ref: weakref.ref) -> None:
+        with self._lock:
+            entry = self._open.get(key)
+            if entry is not None and entry[0] is ref:
+                del self._open[key]
+                self._leaked += 1
+
+    def sessions(self) -> List[Session]:
+        """The sessions that are still open."""
+        with self._lock:
+            refs = [ref for ref, _ in self._open.values()]
+        return [session for session in (ref() for ref in refs) if session is not None]
+
+    def metrics(self) -> SessionMetrics:
+        with self._lock:
+            return SessionMetrics(
+                open_sessions=len(self._open),
+                peak_sessions=self._peak,
+                created=self._created,
+                closed=self._closed,
+                leaked=self._leaked,
+                average_lifetime=self._lifetime_total / self._closed if self._closed else 0.0,
+            )
+
+
+class TrackedSession(Session):
+    """A Session that reports its close() to the tracker of the factory that created it."""
+
+    _tracker: Optional[SessionTracker] = None
+
+    def close(self) -> None:
+        super().close()
+        if self._tracker is not None:
+            self._tracker.discard(self)
 
 
 class SessionFactory:
     def __init__(self, engine):
         self.engine = engine
-        self._sessions = []  # Track sessions
+        self.tracker = SessionTracker()
 
     def create_session(self) -> Session:
         """Create a session without context management."""
-        session = Session(self.engine)
-        self._sessions.append(session)
+        session = TrackedSession(self.engine)
+        self.tracker.add(session)
         return session
 
     @contextmanager
     def managed_session(self) -> Generator[Session, None, None]:
-        session = Session(self.engine)
-        self._sessions.append(session)
+        session = self.create_session()
         try:
             yield session
             session.commit()
@@ -34,18 +333,62 @@ class SessionFactory:
             raise
         finally:
             session.close()
-            self._sessions.remove(session)
 
     def close_all_sessions(self):
         """Explicitly close all tracked sessions"""
-        for session in self._sessions[
-            :
-        ]:  # Copy list to avoid modification during iteration
+        for session in self.tracker.sessions():
             try:
                 session.close()
             except Exception:
                 print(f"Error closing session: {session}")
-        self._sessions.clear()
+
+    def metrics(self) -> SessionMetrics:
+        return self.tracker.metrics()
 
 
 default_session_factory = SessionFactory(engine)
+
+
+class AsyncSessionFactory:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.tracker = SessionTracker()
+
+    def create_session(self) -> AsyncSession:
+        """Create a session without context management."""
+        # Attributes must stay readable after commit without implicit (awaitable) IO
+        session = AsyncSession(
+            self.engine, expire_on_commit=False, sync_session_class=TrackedSession
+        )
+        self.tracker.add(session.sync_session)
+        return session
+
+    @asynccontextmanager
+    async def managed_session(self) -> AsyncGenerator[AsyncSession, None]:
+        session = self.create_session()
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def close_all_sessions(self):
+        """Explicitly close all tracked sessions"""
+        for sync_session in self.tracker.sessions():
+            session = async_session(sync_session)
+            try:
+                if session is not None:
+                    await session.close()
+            except Exception:
+                print(f"Error closing session: {session}")
+
+    def metrics(self) -> SessionMetrics:
+        return self.tracker.metrics()
+
+
+@lru_cache(maxsize=None)
+def get_async_session_factory() -> AsyncSessionFactory:
+    return AsyncSessionFactory(get_async_engine())
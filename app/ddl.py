@@ -0,0 +1,178 @@
+"""Database-side schema: the DDL that create_all cannot derive from the models.
+
+The statements are attached to the metadata in app/models.py, next to the
+tables they extend, so every ``SQLModel.metadata.create_all`` installs them
+no matter which modules have been imported. The features that rely on them
+(app/search.py, app/tag_stats.py, app/http_cache.py) re-run them to upgrade an
+existing database.
+"""
+
+# ---------- full-text search (app/search.py) ----------
+# The FTS5 table keeps its own copy of the text, so a row can be removed by
+# rowid alone without having to replay the original body. That copy is also
+# why archiving a body (app/archive.py rewrites it as a compressed BLOB with
+# the same text) must not touch the index: the update trigger skips BLOBs.
+SEARCH_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS crumb_fts "
+    "USING fts5(body_md, tokenize = 'porter unicode61')",
+    """CREATE TRIGGER IF NOT EXISTS crumb_fts_ai AFTER INSERT ON crumb BEGIN
+        INSERT INTO crumb_fts (rowid, body_md) VALUES (new.id, new.body_md);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS crumb_fts_ad AFTER DELETE ON crumb BEGIN
+        DELETE FROM crumb_fts WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS crumb_fts_au AFTER UPDATE OF body_md ON crumb
+    WHEN typeof(new.body_md) = 'text' BEGIN
+        DELETE FROM crumb_fts WHERE rowid = old.id;
+        INSERT INTO crumb_fts (rowid, body_md) VALUES (new.id, new.body_md);
+    END""",
+]
+
+SEARCH_POSTGRESQL_DDL = [
+    "ALTER TABLE crumb ADD COLUMN IF NOT EXISTS body_tsv tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', body_md)) STORED",
+    "CREATE INDEX IF NOT EXISTS idx_crumb_body_tsv ON crumb USING GIN (body_tsv)",
+]
+
+
+# ---------- tag_stats (app/tag_stats.py) ----------
+# Newest crumb still linked to the tag being updated
+_SQLITE_LAST_USED = """(SELECT max(c.created_at) FROM crumbtag ct JOIN crumb c ON c.id = ct.crumb_id
+            WHERE ct.tag_id = tag_stats.tag_id{extra})"""
+
+TAG_STATS_SQLITE_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS tag_stats_link_ai AFTER INSERT ON crumbtag BEGIN
+        INSERT INTO tag_stats (tag_id, crumb_count, published_count, last_used_at)
+        SELECT new.tag_id, 1, c.visibility = 'published', c.created_at
+        FROM crumb c WHERE c.id = new.crumb_id
+        ON CONFLICT (tag_id) DO UPDATE SET
+            crumb_count = crumb_count + 1,
+            published_count = published_count + excluded.published_count,
+            last_used_at = max(coalesce(last_used_at, excluded.last_used_at), excluded.last_used_at);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tag_stats_link_ad AFTER DELETE ON crumbtag
+    WHEN EXISTS (SELECT 1 FROM crumb WHERE id = old.crumb_id) BEGIN
+        UPDATE tag_stats SET
+            crumb_count = crumb_count - 1,
+            published_count = published_count
+                - (SELECT visibility = 'published' FROM crumb WHERE id = old.crumb_id),
+            last_used_at = CASE
+                WHEN last_used_at = (SELECT created_at FROM crumb WHERE id = old.crumb_id)
+                THEN {_SQLITE_LAST_USED.format(extra="")}
+                ELSE last_used_at END
+        WHERE tag_id = old.tag_id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tag_stats_crumb_bd BEFORE DELETE ON crumb BEGIN
+        UPDATE tag_stats SET
+            crumb_count = crumb_count - 1,
+            published_count = published_count - (old.visibility = 'published'),
+            last_used_at = CASE
+                WHEN last_used_at = old.created_at
+                THEN {_SQLITE_LAST_USED.format(extra=" AND c.id != old.id")}
+                ELSE last_used_at END
+        WHERE tag_id IN (SELECT tag_id FROM crumbtag WHERE crumb_id = old.id);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS tag_stats_crumb_au
+    AFTER UPDATE OF visibility, created_at ON crumb BEGIN
+        UPDATE tag_stats SET
+            published_count = published_count
+                + (new.visibility = 'published') - (old.visibility = 'published'),
+            last_used_at = CASE
+                WHEN new.created_at IS old.created_at THEN last_used_at
+                ELSE {_SQLITE_LAST_USED.format(extra="")} END
+        WHERE tag_id IN (SELECT tag_id FROM crumbtag WHERE crumb_id = new.id);
+    END""",
+]
+
+_PG_LAST_USED = """(SELECT max(c.created_at) FROM crumbtag ct JOIN crumb c ON c.id = ct.crumb_id
+            WHERE ct.tag_id = s.tag_id{extra})"""
+
+TAG_STATS_POSTGRESQL_DDL = [
+    f"""CREATE OR REPLACE FUNCTION tag_stats_on_link() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO tag_stats (tag_id, crumb_count, published_count, last_used_at)
+            SELECT NEW.tag_id, 1, (c.visibility = 'published')::int, c.created_at
+            FROM crumb c WHERE c.id = NEW.crumb_id
+            ON CONFLICT (tag_id) DO UPDATE SET
+                crumb_count = tag_stats.crumb_count + 1,
+                published_count = tag_stats.published_count + EXCLUDED.published_count,
+                last_used_at = GREATEST(tag_stats.last_used_at, EXCLUDED.last_used_at);
+            RETURN NEW;
+        END IF;
+        -- Joining crumb skips links removed by the cascade of a crumb delete
+        UPDATE tag_stats s SET
+            crumb_count = s.crumb_count - 1,
+            published_count = s.published_count - (c.visibility = 'published')::int,
+            last_used_at = CASE WHEN s.last_used_at = c.created_at
+                THEN {_PG_LAST_USED.format(extra="")} ELSE s.last_used_at END
+        FROM crumb c WHERE c.id = OLD.crumb_id AND s.tag_id = OLD.tag_id;
+        RETURN OLD;
+    END $$ LANGUAGE plpgsql""",
+    f"""CREATE OR REPLACE FUNCTION tag_stats_on_crumb() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'DELETE' THEN
+            UPDATE tag_stats s SET
+                crumb_count = s.crumb_count - 1,
+                published_count = s.published_count - (OLD.visibility = 'published')::int,
+                last_used_at = CASE WHEN s.last_used_at = OLD.created_at
+                    THEN {_PG_LAST_USED.format(extra=" AND c.id <> OLD.id")}
+                    ELSE s.last_used_at END
+            WHERE s.tag_id IN (SELECT tag_id FROM crumbtag WHERE crumb_id = OLD.id);
+            RETURN OLD;
+        END IF;
+        UPDATE tag_stats s SET
+            published_count = s.published_count
+                + (NEW.visibility = 'published')::int - (OLD.visibility = 'published')::int,
+            last_used_at = CASE WHEN NEW.created_at IS NOT DISTINCT FROM OLD.created_at
+                THEN s.last_used_at ELSE {_PG_LAST_USED.format(extra="")} END
+        WHERE s.tag_id IN (SELECT tag_id FROM crumbtag WHERE crumb_id = NEW.id);
+        RETURN NEW;
+    END $$ LANGUAGE plpgsql""",
+    "CREATE OR REPLACE TRIGGER tag_stats_link_ai AFTER INSERT ON crumbtag "
+    "FOR EACH ROW EXECUTE FUNCTION tag_stats_on_link()",
+    "CREATE OR REPLACE TRIGGER tag_stats_link_ad AFTER DELETE ON crumbtag "
+    "FOR EACH ROW EXECUTE FUNCTION tag_stats_on_link()",
+    "CREATE OR REPLACE TRIGGER tag_stats_crumb_bd BEFORE DELETE ON crumb "
+    "FOR EACH ROW EXECUTE FUNCTION tag_stats_on_crumb()",
+    "CREATE OR REPLACE TRIGGER tag_stats_crumb_au AFTER UPDATE OF visibility, created_at "
+    "ON crumb FOR EACH ROW EXECUTE FUNCTION tag_stats_on_crumb()",
+]
+
+
+# ---------- data_version (app/http_cache.py) ----------
+# A write to crumbs, links, tags or units bumps the single data_version row
+# once per transaction, so the HTTP validators see changes made by any engine,
+# worker or process. On PostgreSQL statement-level triggers on the link, tag
+# and unit tables do it (crumb rows are fingerprinted by the validator
+# directly); the first one in a transaction bumps and records the transaction
+# id, so the row is written and locked once rather than per row or statement.
+# SQLite has one writer at a time and no statement-level triggers, so there the
+# session that made the changes bumps it as it commits.
+DATA_VERSION_TABLES = ("crumbtag", "tag", "unit")
+
+_DATA_VERSION_SEED = (
+    "INSERT INTO data_version (id, version, changed_at) "
+    "VALUES (1, 0, CURRENT_TIMESTAMP) ON CONFLICT (id) DO NOTHING"
+)
+
+DATA_VERSION_SQLITE_DDL = [_DATA_VERSION_SEED]
+
+DATA_VERSION_POSTGRESQL_DDL = [
+    _DATA_VERSION_SEED,
+    """CREATE OR REPLACE FUNCTION data_version_bump() RETURNS trigger AS $$
+    BEGIN
+        IF current_setting('data_version.bumped_in', true)
+            IS DISTINCT FROM txid_current()::text THEN
+            PERFORM set_config('data_version.bumped_in', txid_current()::text, true);
+            UPDATE data_version
+            SET version = version + 1, changed_at = now() AT TIME ZONE 'utc' WHERE id = 1;
+        END IF;
+        RETURN NULL;
+    END $$ LANGUAGE plpgsql""",
+] + [
+    f"CREATE OR REPLACE TRIGGER data_version_{table} "
+    f"AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} "
+    "FOR EACH STATEMENT EXECUTE FUNCTION data_version_bump()"
+    for table in DATA_VERSION_TABLES
+]
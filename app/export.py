@@ -0,0 +1,100 @@
+"""Streaming export of the whole crumb stream as NDJSON or a JSON array.
+
+Crumbs are read in stream order through a server-side cursor (``yield_per``),
+one chunk at a time. Each chunk's units and tags are prefetched with one
+selectin query each, serialized as ``CrumbPublic`` records and then dropped
+from the session, so memory stays bounded by the chunk size rather than the
+size of the table.
+"""
+
+from typing import AsyncIterator, Iterable, Iterator, List
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Crumb, CrumbPublic
+from app.stream import stream_statement
+
+DEFAULT_CHUNK_SIZE = 500
+FORMATS = ("ndjson", "json")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+def export_statement(chunk_size: int = DEFAULT_CHUNK_SIZE, published_only: bool = False):
+    """The stream query, fetched `chunk_size` rows at a time from a server-side cursor."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    statement = stream_statement(published_only=published_only)
+    return statement.execution_options(yield_per=chunk_size)
+
+
+def _release(session: Session, crumbs: List[Crumb]) -> None:
+    """Detach a serialized chunk, and the units and tags it loaded, from the session."""
+    related = {id(obj): obj for crumb in crumbs for obj in (crumb.unit, *crumb.tags) if obj}
+    for obj in (*crumbs, *related.values()):
+        if obj in session:
+            session.expunge(obj)
+
+
+def _encode(chunk: List[CrumbPublic], fmt: str, first: bool) -> str:
+    records = [crumb.model_dump_json() for crumb in chunk]
+    if fmt == "ndjson":
+        return "".join(f"{record}\n" for record in records)
+    return ("[\n" if first else ",\n") + ",\n".join(records)
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(FORMATS)}")
+
+
+def iter_crumb_chunks(
+    session: Session, chunk_size: int = DEFAULT_CHUNK_SIZE, published_only: bool = False
+) -> Iterator[List[CrumbPublic]]:
+    """Yield every crumb, in stream order, as lists of at most `chunk_size` records."""
+    result = session.exec(export_statement(chunk_size, published_only))
+    for crumbs in result.partitions():
+        yield [CrumbPublic.model_validate(crumb) for crumb in crumbs]
+        _release(session, crumbs)
+
+
+async def iter_crumb_chunks_async(
+    session: AsyncSession, chunk_size: int = DEFAULT_CHUNK_SIZE, published_only: bool = False
+) -> AsyncIterator[List[CrumbPublic]]:
+    """Async variant of iter_crumb_chunks."""
+    result = await session.stream_scalars(export_statement(chunk_size, published_only))
+    async for crumbs in result.partitions():
+        yield [CrumbPublic.model_validate(crumb) for crumb in crumbs]
+        _release(session.sync_session, crumbs)
+
+
+def encode_chunks(chunks: Iterable[List[CrumbPublic]], fmt: str = "ndjson") -> Iterator[str]:
+    """Encode chunks of records as NDJSON lines or as the pieces of one JSON array."""
+    _check_format(fmt)
+    first = True
+    for chunk in chunks:
+        if chunk:
+            yield _encode(chunk, fmt, first)
+            first = False
+    if fmt == "json":
+        yield "[]\n" if first else "\n]\n"
+
+
+async def encode_chunks_async(chunks: AsyncIterator[List[CrumbPublic]], fmt: str = "ndjson"):
+    """Async variant of encode_chunks."""
+    _check_format(fmt)
+    first = True
+    async for chunk in chunks:
+        if chunk:
+            yield _encode(chunk, fmt, first)
+            first = False
+    if fmt == "json":
+        yield "[]\n" if first else "\n]\n"
+
+
+def export_crumbs(
+    session: Session, fmt: str = "ndjson", chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[str]:
+    """Stream every crumb as text in the given format, one piece per chunk."""
+    _check_format(fmt)
+    return encode_chunks(iter_crumb_chunks(session, chunk_size), fmt)
@@ -0,0 +1,256 @@
+"""Conditional GET and a bounded cache of serialized pages for read endpoints.
+
+Every cached response is described by a validator computed from its result
+window (the rows the page query would return) with one aggregate query:
+``count``, ``sum(id)`` and ``max(coalesce(updated_at, created_at))``. Bodies,
+units and tags are not loaded for it. The same query reads the single
+``data_version`` row, bumped once by every transaction that writes crumbs,
+links, tags or units (by triggers on PostgreSQL, by the committing session on
+SQLite; see app/ddl.py), so changes that leave the window's own rows
+untouched (a tag rename, a new link) still produce a new ETag, whichever
+engine, worker or process made them. Last-Modified is the later of the
+window's newest timestamp and the time of the last bump.
+
+A request whose If-None-Match (or, without one, If-Modified-Since) matches
+is answered with 304 straight after the validator query. Otherwise the page
+is served from an LRU of serialized bytes keyed by (route key, ETag), one per
+database. Old entries can never match a new ETag; a commit that changed
+crumbs, links, tags or units in this process also clears the LRU to free
+them early. On SQLite, bulk writes that bypass the unit of work must call
+``mark_data_changed`` to be counted. ``install_data_version`` adds the table
+(and, on PostgreSQL, its triggers) to a database created before them.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, Tuple, Union
+
+from fastapi import Request, Response
+from sqlalchemy import event, func, text, update
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db import PerDatabase
+from app.ddl import DATA_VERSION_POSTGRESQL_DDL, DATA_VERSION_SQLITE_DDL, DATA_VERSION_TABLES
+from app.models import Crumb, CrumbTag, DataVersion, Tag, Unit
+
+DEFAULT_BUDGET_BYTES = 32 * 1024 * 1024
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_DATA_CHANGED = "http_cache.data_changed"
+_TRACKED = (Crumb, CrumbTag, Tag, Unit)
+
+
+@dataclass(frozen=True)
+class Validator:
+    etag: str
+    last_modified: datetime
+
+
+@dataclass(frozen=True)
+class ResponseCacheStats:
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    not_modified: int
+    generation: int
+
+
+class ResponseCache:
+    """An LRU of serialized pages bounded by bytes; `generation` counts its clears."""
+
+    def __init__(self, max_bytes: int = DEFAULT_BUDGET_BYTES):
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._not_modified = 0
+
+    def get(self, key: str, etag: str) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get((key, etag))
+            if body is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end((key, etag))
+            self._hits += 1
+            return body
+
+    def put(self, key: str, etag: str, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if (key, etag) in self._entries:
+                return
+            self._entries[(key, etag)] = body
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def record_not_modified(self) -> None:
+        with self._lock:
+            self._not_modified += 1
+
+    def invalidate(self) -> None:
+        """Drop every cached page."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> ResponseCacheStats:
+        with self._lock:
+            return ResponseCacheStats(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hits=self._hits,
+                misses=self._misses,
+                not_modified=self._not_modified,
+                generation=self.generation,
+            )
+
+
+_caches: PerDatabase[ResponseCache] = PerDatabase(ResponseCache)
+
+
+def get_response_cache(session) -> ResponseCache:
+    """The response cache for the database a (sync or async) session is bound to."""
+    return _caches.get(session)
+
+
+def install_data_version(session: Session) -> None:
+    """Create the data_version table and its triggers on an existing database."""
+    DataVersion.__table__.create(session.connection(), checkfirst=True)
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        # Per-row triggers from earlier versions; the committing session bumps now
+        for table in DATA_VERSION_TABLES:
+            for op in "iud":
+                session.execute(text(f"DROP TRIGGER IF EXISTS data_version_{table}_{op}"))
+    ddl = {"sqlite": DATA_VERSION_SQLITE_DDL, "postgresql": DATA_VERSION_POSTGRESQL_DDL}
+    for statement in ddl.get(dialect, []):
+        session.execute(text(statement))
+
+
+def mark_data_changed(session: Session) -> None:
+    """Record that `session` wrote crumbs, links, tags or units outside the unit of work."""
+    session.info[_DATA_CHANGED] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_changes(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here
+    if any(isinstance(obj, _TRACKED) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_DATA_CHANGED] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_data_version(session):
+    # Runs before commit's own final flush, so flush here to see every change
+    session.flush()
+    if session.info.get(_DATA_CHANGED) and session.get_bind().dialect.name != "postgresql":
+        session.execute(
+            update(DataVersion)
+            .where(DataVersion.id == 1)
+            .values(version=DataVersion.version + 1, changed_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_if_changed(session):
+    if session.info.pop(_DATA_CHANGED, False):
+        get_response_cache(session).invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session):
+    session.info.pop(_DATA_CHANGED, None)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes; the models store UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def fingerprint_statement(window):
+    """Aggregate the rows of a select(Crumb) window without loading them.
+
+    Also reads the database's data version and the time it was last bumped.
+    """
+    rows = window.subquery()
+    return select(
+        func.count(),
+        func.coalesce(func.sum(rows.c.id), 0),
+        func.max(func.coalesce(rows.c.updated_at, rows.c.created_at)),
+        select(DataVersion.version).where(DataVersion.id == 1).scalar_subquery(),
+        select(DataVersion.changed_at).where(DataVersion.id == 1).scalar_subquery(),
+    )
+
+
+async def compute_validator(session: AsyncSession, key: str, window) -> Validator:
+    count, id_sum, newest, version, changed_at = (
+        await session.exec(fingerprint_statement(window))
+    ).one()
+    digest = hashlib.sha256(f"{key}|{version}|{count}|{id_sum}|{newest}".encode())
+    last_modified = max(filter(None, (_as_utc(newest), _as_utc(changed_at))), default=_EPOCH)
+    return Validator(
+        etag=f'"{digest.hexdigest()[:32]}"',
+        last_modified=last_modified.replace(microsecond=0),
+    )
+
+
+def is_not_modified(request: Request, validator: Validator) -> bool:
+    """Evaluate If-None-Match, or If-Modified-Since when no If-None-Match was sent."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or validator.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return validator.last_modified <= _as_utc(since)
+    return False
+
+
+async def cached_response(
+    request: Request,
+    session: AsyncSession,
+    key: str,
+    window,
+    render: Callable[[], Awaitable[Union[SQLModel, bytes]]],
+) -> Response:
+    """Answer a GET for the page built by `render` over `window`, using the caches.
+
+    `render` returns the page as a model or as already-serialized JSON bytes.
+    """
+    cache = get_response_cache(session)
+    validator = await compute_validator(session, key, window)
+    headers = {
+        "ETag": validator.etag,
+        "Last-Modified": format_datetime(validator.last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if is_not_modified(request, validator):
+        cache.record_not_modified()
+        return Response(status_code=304, headers=headers)
+    body = cache.get(key, validator.etag)
+    if body is None:
+        body = await render()
+        if not isinstance(body, bytes):
+            body = body.model_dump_json().encode()
+        cache.put(key, validator.etag, body)
+    return Response(content=body, media_type="application/json", headers=headers)
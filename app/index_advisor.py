@@ -0,0 +1,162 @@
+"""Find foreign keys without a supporting index and check query plans for full scans.
+
+A foreign key needs an index whose leading columns are the key's columns,
+otherwise reverse lookups (the crumbs of a unit, the crumbs of a tag) and
+``ON DELETE CASCADE`` scan the whole child table. ``find_missing_fk_indexes``
+checks every table in the metadata against its primary key, unique
+constraints and indexes (partial and expression indexes do not count), and
+``render_migration`` turns the findings into an Alembic revision file. The
+metadata is the models' by default; ``reflect_database`` reads it from a live
+database instead, to find the indexes a deployed schema is actually missing.
+
+``explain`` and ``full_scans`` run a statement's query plan (EXPLAIN QUERY
+PLAN on SQLite, EXPLAIN on PostgreSQL) and pick out the steps that read a
+whole table.
+"""
+
+import re
+import uuid
+import warnings
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+from alembic.autogenerate import render_python_code
+from alembic.operations import ops
+from sqlalchemy import Column, MetaData, Table, UniqueConstraint
+from sqlalchemy.exc import SAWarning
+from sqlmodel import Session, SQLModel
+
+
+@dataclass(frozen=True)
+class MissingIndex:
+    table: str
+    columns: Sequence[str]
+    referred_table: str
+
+    @property
+    def name(self) -> str:
+        return f"idx_{self.table}_{'_'.join(self.columns)}"
+
+    def __str__(self) -> str:
+        return (
+            f"{self.table}({', '.join(self.columns)}) -> {self.referred_table}: "
+            f"no index leads with these columns"
+        )
+
+
+def _leading_column_sets(table: Table) -> List[List[str]]:
+    """Column-name lists of every full (non-partial, column-only) index on `table`."""
+    candidates = []
+    if table.primary_key.columns:
+        candidates.append([c.name for c in table.primary_key.columns])
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint):
+            candidates.append([c.name for c in constraint.columns])
+    for index in table.indexes:
+        partial = any(
+            options.get("where") is not None for options in index.dialect_options.values()
+        )
+        if partial or not all(isinstance(e, Column) for e in index.expressions):
+            continue
+        candidates.append([e.name for e in index.expressions])
+    return candidates
+
+
+def reflect_database(bind) -> MetaData:
+    """The tables, foreign keys and indexes of the database behind `bind`, as deployed."""
+    metadata = MetaData()
+    with warnings.catch_warnings():
+        # Expression indexes are not reflected; they never support a foreign key anyway
+        warnings.filterwarnings("ignore", "Skipped unsupported reflection", SAWarning)
+        metadata.reflect(bind)
+    return metadata
+
+
+def find_missing_fk_indexes(metadata: MetaData = SQLModel.metadata) -> List[MissingIndex]:
+    """Foreign keys whose columns are not the leading columns of any full index."""
+    missing = []
+    for table in metadata.sorted_tables:
+        indexed = _leading_column_sets(table)
+        for fk in table.foreign_key_constraints:
+            columns = [c.name for c in fk.columns]
+            if not any(set(cols[: len(columns)]) == set(columns) for cols in indexed):
+                missing.append(MissingIndex(table.name, columns, fk.referred_table.name))
+    return missing
+
+
+_MIGRATION = '''"""{message}
+
+Revision ID: {revision}
+Revises: {down_revision}
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = {revision!r}
+down_revision = {down_revision!r}
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    {upgrade}
+
+
+def downgrade() -> None:
+    {downgrade}
+'''
+
+
+def render_migration(
+    missing: Sequence[MissingIndex],
+    revision: Optional[str] = None,
+    down_revision: Optional[str] = None,
+    message: str = "Add indexes for unindexed foreign keys",
+) -> str:
+    """Render an Alembic revision file that creates (and drops) the missing indexes."""
+    upgrade = ops.UpgradeOps(
+        ops=[ops.CreateIndexOp(m.name, m.table, list(m.columns)) for m in missing]
+    )
+    downgrade = ops.DowngradeOps(
+        ops=[ops.DropIndexOp(m.name, table_name=m.table) for m in reversed(missing)]
+    )
+    return _MIGRATION.format(
+        message=message,
+        revision=revision or uuid.uuid4().hex[:12],
+        down_revision=down_revision,
+        upgrade=render_python_code(upgrade) if missing else "pass",
+        downgrade=render_python_code(downgrade) if missing else "pass",
+    )
+
+
+def explain(session: Session, statement) -> List[str]:
+    """The query plan of `statement` on the session's database, one step per line."""
+    bind = session.get_bind()
+    compiled = statement.compile(
+        dialect=bind.dialect, compile_kwargs={"render_postcompile": True}
+    )
+    connection = session.connection()
+    if bind.dialect.name == "sqlite":
+        params = [compiled.params[name] for name in compiled.positiontup or ()]
+        # The plan does not depend on the values; sqlite3 no longer adapts datetimes itself
+        params = [str(p) if isinstance(p, datetime) else p for p in params]
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", tuple(params))
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params)
+    return [row[0] for row in rows]
+
+
+# SQLite: "SCAN crumb" reads every row; "SCAN crumb USING INDEX ..." walks an index in order.
+# PostgreSQL: "Seq Scan on crumb".
+_FULL_SCAN = re.compile(r"^\s*(?:->\s*)?(?:SCAN (?:TABLE )?(\w+)$|Seq Scan on (\w+))")
+
+
+def full_scans(plan: Sequence[str]) -> List[str]:
+    """Names of the tables the plan reads in full."""
+    return [
+        match.group(1) or match.group(2)
+        for step in plan
+        if (match := _FULL_SCAN.match(step))
+    ]
@@ -0,0 +1,164 @@
+"""Bulk ingestion of crumbs with set-based tag and unit resolution.
+
+Crumbs are consumed lazily in chunks. For each chunk the distinct tag and unit
+names are resolved in one SELECT each, the missing ones are inserted in one
+executemany each, and the crumbs and their CrumbTag links are inserted with
+executemany. Only the chunk plus the name -> id maps are held in memory.
+"""
+
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from app.http_cache import mark_data_changed
+from app.models import Crumb, CrumbCreate, CrumbTag, Tag, Unit
+from app.normalize import normalize_tag_name
+from app.tag_cache import get_tag_id_cache, mark_tags_changed
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class IngestReport:
+    crumbs: int = 0
+    links: int = 0
+    tags_created: int = 0
+    units_created: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """Crumb and CrumbTag rows written per second."""
+        if not self.seconds:
+            return 0.0
+        return (self.crumbs + self.links) / self.seconds
+
+
+def _chunks(items: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class NameResolver:
+    """Resolve tag and unit names to ids, creating missing rows in bulk.
+
+    Resolved ids are remembered for the life of the resolver, so memory grows
+    with the number of distinct names rather than the number of crumbs.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+        self.tag_ids: Dict[str, int] = {}
+        self.unit_ids: Dict[str, int] = {}
+
+    def resolve_tags(self, names: Iterable[str], report: IngestReport) -> None:
+        missing = {name for name in names if name not in self.tag_ids}
+        if not missing:
+            return
+        # Known tags come from the per-database cache without a query
+        self.tag_ids.update(get_tag_id_cache(self.session).lookup(self.session, missing))
+        new = sorted(missing - set(self.tag_ids))
+        if new:
+            mark_tags_changed(self.session)
+            created = self.session.execute(
+                insert(Tag).returning(Tag.id, Tag.name), [{"name": n} for n in new]
+            ).all()
+            self.tag_ids.update((name, tag_id) for tag_id, name in created)
+            report.tags_created += len(created)
+
+    def resolve_units(self, names: Iterable[str], report: IngestReport) -> None:
+        missing = {name for name in names if name not in self.unit_ids}
+        if not missing:
+            return
+        # Unit names are not unique; crumbs join the most recent unit of that name
+        existing = self.session.exec(
+            select(Unit.name, func.max(Unit.id))
+            .where(Unit.name.in_(missing))
+            .group_by(Unit.name)
+        ).all()
+        self.unit_ids.update(existing)
+        new = sorted(missing - set(self.unit_ids))
+        if new:
+            created = self.session.execute(
+                insert(Unit).returning(Unit.id, Unit.name), [{"name": n} for n in new]
+            ).all()
+            self.unit_ids.update((name, unit_id) for unit_id, name in created)
+            report.units_created += len(created)
+
+
+def ingest_chunk(
+    session: Session,
+    chunk: List[CrumbCreate],
+    resolver: NameResolver,
+    report: IngestReport,
+    ids: Optional[List[int]] = None,
+    unit_ids: Optional[List[Optional[int]]] = None,
+) -> List[int]:
+    """Insert one chunk of crumbs with their tags and units; return the new ids.
+
+    `ids`, when given, are used as the crumbs' primary keys instead of letting
+    the database assign them. Likewise a non-None entry of `unit_ids` is used
+    as that crumb's unit_id instead of resolving its unit_name.
+    """
+    mark_data_changed(session)
+    tag_names = [
+        sorted({normalize_tag_name(tag.name) for tag in crumb.tags})
+        for crumb in chunk
+    ]
+    resolver.resolve_tags({name for names in tag_names for name in names}, report)
+    resolver.resolve_units({c.unit_name for c in chunk if c.unit_name}, report)
+
+    rows = [
+        {
+            "body_md": crumb.body_md,
+            "created_at": crumb.created_at,
+            "updated_at": crumb.updated_at,
+            "visibility": crumb.visibility,
+            "unit_id": resolver.unit_ids[crumb.unit_name] if crumb.unit_name else None,
+        }
+        for crumb in chunk
+    ]
+    if unit_ids is not None:
+        for row, unit_id in zip(rows, unit_ids, strict=True):
+            if unit_id is not None:
+                row["unit_id"] = unit_id
+    if ids is not None:
+        for row, crumb_id in zip(rows, ids, strict=True):
+            row["id"] = crumb_id
+    crumb_ids = session.scalars(
+        insert(Crumb).returning(Crumb.id, sort_by_parameter_order=True), rows
+    ).all()
+
+    links = [
+        {"crumb_id": crumb_id, "tag_id": resolver.tag_ids[name]}
+        for crumb_id, names in zip(crumb_ids, tag_names)
+        for name in names
+    ]
+    if links:
+        session.execute(insert(CrumbTag), links)
+
+    report.crumbs += len(crumb_ids)
+    report.links += len(links)
+    return crumb_ids
+
+
+def bulk_ingest(
+    session: Session,
+    crumbs: Iterable[CrumbCreate],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> IngestReport:
+    """Insert crumbs in chunks of `chunk_size`; the caller owns the transaction."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    report = IngestReport()
+    resolver = NameResolver(session)
+    started = time.perf_counter()
+    for chunk in _chunks(crumbs, chunk_size):
+        ingest_chunk(session, chunk, resolver, report)
+    report.seconds = time.perf_counter() - started
+    return report
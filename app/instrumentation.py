@@ -0,0 +1,257 @@
+"""Statement counts, latency histograms and a slow-query log from engine events.
+
+``QueryInstrumentation.attach(engine)`` listens to ``before_cursor_execute``
+and ``after_cursor_execute`` (and ``handle_error``, to drop the timer of a
+statement that failed). Every statement is timed and recorded under
+its normalized SQL (literals and IN-lists collapsed), so the metrics group
+"the stream page query" rather than one entry per cursor value. Statements
+slower than the threshold also go to a bounded slow-query log and to the
+``breadcrumbs.slow_query`` logger.
+
+Statements are also attributed to the ORM session that issued them: each
+connection a session begins on is mapped back to it on ``after_begin``, and
+the running count lives in ``session.info``.
+``query_budget`` uses that count to assert how many statements a block may
+issue.
+"""
+
+import bisect
+import logging
+import os
+import re
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Deque, Dict, Generator, List
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("breadcrumbs.slow_query")
+
+# Upper bounds of the latency buckets, in milliseconds; the last bucket is open-ended
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+DEFAULT_SLOW_QUERY_MS = 100.0
+DEFAULT_SLOW_LOG_SIZE = 100
+
+_STARTED = "instrumentation.started"
+_COUNT = "instrumentation.statements"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_POSTCOMPILE = re.compile(r"\(__\[POSTCOMPILE_\w+\]\)")
+_PARAM = r"(?:\?|%\(\w+\)s|%s|:\w+|\$\d+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace, literals and IN-lists so equivalent statements group together."""
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _POSTCOMPILE.sub("(...)", sql)
+    return _PLACEHOLDER_LIST.sub("(...)", sql)
+
+
+@dataclass
+class LatencyHistogram:
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def add(self, ms: float) -> None:
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th quantile (max_ms for the last one)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, hits in zip(BUCKETS_MS, self.buckets):
+            seen += hits
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": dict(zip([*map(str, BUCKETS_MS), "inf"], self.buckets)),
+        }
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    sql: str
+    ms: float
+    at: datetime
+
+
+class QueryInstrumentation:
+    def __init__(
+        self,
+        slow_query_ms: float = DEFAULT_SLOW_QUERY_MS,
+        slow_log_size: int = DEFAULT_SLOW_LOG_SIZE,
+    ):
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._slow: Deque[SlowQuery] = deque(maxlen=slow_log_size)
+        self._engines: "weakref.WeakSet" = weakref.WeakSet()
+        # Several instrumentations may watch one engine, so each keeps its own timers
+        self._started = f"{_STARTED}.{id(self)}"
+
+    @classmethod
+    def from_env(cls) -> "QueryInstrumentation":
+        return cls(slow_query_ms=float(os.getenv("SLOW_QUERY_MS", DEFAULT_SLOW_QUERY_MS)))
+
+    def attach(self, engine) -> None:
+        """Start recording the statements of `engine` (idempotent)."""
+        count_session_statements(engine)
+        if engine in self._engines:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+        self._engines.add(engine)
+
+    def detach(self, engine) -> None:
+        if engine not in self._engines:
+            return
+        event.remove(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.remove(engine, "handle_error", self._handle_error)
+        self._engines.discard(engine)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault(self._started, []).append((context, time.perf_counter()))
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get(self._started)
+        if not started:
+            return  # attached while this statement was already running
+        ms = (time.perf_counter() - started.pop()[1]) * 1000
+        sql = normalize_sql(statement)
+        with self._lock:
+            histogram = self._histograms.get(sql)
+            if histogram is None:
+                histogram = self._histograms[sql] = LatencyHistogram()
+            histogram.add(ms)
+            if ms >= self.slow_query_ms:
+                self._slow.append(SlowQuery(sql, round(ms, 3), datetime.now(timezone.utc)))
+        if ms >= self.slow_query_ms:
+            logger.warning("slow query (%.1f ms): %s", ms, sql)
+
+    def _handle_error(self, exception_context):
+        # A failed statement never reaches after_cursor_execute; conn.info lives as
+        # long as the pooled DBAPI connection, so its timer must not be left behind
+        conn = exception_context.connection
+        started = conn.info.get(self._started) if conn is not None else None
+        if started and started[-1][0] is exception_context.execution_context:
+            started.pop()
+
+    def snapshot(self) -> dict:
+        """Totals, per-statement latency summaries (slowest total first) and slow queries."""
+        with self._lock:
+            statements = sorted(
+                ((sql, h.summary()) for sql, h in self._histograms.items()),
+                key=lambda item: item[1]["total_ms"],
+                reverse=True,
+            )
+            slow = [asdict(query) for query in self._slow]
+        return {
+            "statements": sum(summary["count"] for _, summary in statements),
+            "slow_query_ms": self.slow_query_ms,
+            "by_statement": [{"sql": sql, **summary} for sql, summary in statements],
+            "slow_queries": slow,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._slow.clear()
+
+
+_counted_engines: "weakref.WeakSet" = weakref.WeakSet()
+_counted_lock = threading.Lock()
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    session_ref = _connection_sessions.get(conn)
+    session = session_ref() if session_ref is not None else None
+    if session is not None:
+        session.info[_COUNT] = session.info.get(_COUNT, 0) + 1
+
+
+def count_session_statements(engine) -> None:
+    """Attribute the statements of `engine` to the sessions that issue them (idempotent)."""
+    with _counted_lock:
+        if engine not in _counted_engines:
+            event.listen(engine, "after_cursor_execute", _count_statement)
+            _counted_engines.add(engine)
+
+
+def statement_count(session: Session) -> int:
+    """Statements issued so far by `session` on engines with session counting."""
+    return session.info.get(_COUNT, 0)
+
+
+# Connection objects are per checkout, so a weak mapping needs no cleanup
+_connection_sessions: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+@event.listens_for(Session, "after_begin")
+def _tag_connection(session, transaction, connection):
+    _connection_sessions[connection] = weakref.ref(session)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(
+    session: Session, max_statements: int
+) -> Generator[QueryInstrumentation, None, None]:
+    """Fail if the block makes `session` issue more than `max_statements` statements.
+
+    Yields a private QueryInstrumentation whose snapshot lists what the block ran.
+    """
+    engine = session.get_bind().engine
+    instrumentation = QueryInstrumentation()
+    instrumentation.attach(engine)
+    before = statement_count(session)
+    try:
+        yield instrumentation
+    finally:
+        instrumentation.detach(engine)
+    issued = statement_count(session) - before
+    if issued > max_statements:
+        statements = "\n".join(
+            f"  {entry['count']}x {entry['sql']}"
+            for entry in instrumentation.snapshot()["by_statement"]
+        )
+        raise QueryBudgetExceeded(
+            f"{issued} statements issued, budget was {max_statements}:\n{statements}"
+        )
+
+
+default_instrumentation = QueryInstrumentation.from_env()
@@ -0,0 +1,77 @@
+"""Metadata-only crumb listings: the archive of crumbs created in a month.
+
+A listing shows when each crumb was written, its visibility and its tags,
+never the whole body, so it loads crumbs through the ``crumb-metadata``
+profile with ``body_md`` deferred. Its size grows with the number of crumbs
+listed, not with how long they are. A `preview_length` adds the first
+characters of each body, cut in SQL (see app/loading.py).
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.loading import load_options, preview_options
+from app.models import Crumb, CrumbListing
+from app.stream import PUBLISHED
+
+
+def _month_bounds(year: int, month: int):
+    if not 1 <= month <= 12:
+        raise ValueError(f"Invalid month {month}")
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def month_statement(
+    dialect: str,
+    year: int,
+    month: int,
+    preview_length: Optional[int] = None,
+    published_only: bool = False,
+):
+    """Crumbs created in `year`-`month`, oldest first, without their bodies."""
+    start, end = _month_bounds(year, month)
+    statement = (
+        select(Crumb)
+        .options(*load_options("crumb-metadata"))
+        .where(Crumb.created_at >= start, Crumb.created_at < end)
+        .order_by(Crumb.created_at, Crumb.id)
+    )
+    if preview_length is not None:
+        statement = statement.options(*preview_options(dialect, preview_length))
+    if published_only:
+        statement = statement.where(PUBLISHED)
+    return statement
+
+
+def list_month(
+    session: Session,
+    year: int,
+    month: int,
+    preview_length: Optional[int] = None,
+    published_only: bool = False,
+) -> List[CrumbListing]:
+    """The crumbs created in a month, as CrumbListing."""
+    statement = month_statement(
+        session.get_bind().dialect.name, year, month, preview_length, published_only
+    )
+    return [CrumbListing.model_validate(crumb) for crumb in session.exec(statement).all()]
+
+
+async def list_month_async(
+    session: AsyncSession,
+    year: int,
+    month: int,
+    preview_length: Optional[int] = None,
+    published_only: bool = False,
+) -> List[CrumbListing]:
+    """Async variant of list_month."""
+    statement = month_statement(
+        session.get_bind().dialect.name, year, month, preview_length, published_only
+    )
+    crumbs = (await session.exec(statement)).all()
+    return [CrumbListing.model_validate(crumb) for crumb in crumbs]
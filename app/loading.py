@@ -0,0 +1,129 @@
+"""Named relationship-loading profiles for list and detail queries.
+
+Every relationship on the models defaults to ``lazy="selectin"``, so loading a
+single tag cascades into its crumbs, their units, those units' crumbs and so
+on. A profile replaces that cascade with exactly the loads its view needs
+(the relationships read by ``CrumbPublic``/``UnitPublic``) and makes every
+other relationship raise on access instead of silently issuing SQL.
+
+The metadata profiles (``crumb-metadata``, ``unit-timeline``) are for views
+that list crumbs without showing them: tag counts, timelines, sitemaps,
+archives by month. They defer ``Crumb.body_md``, so a row costs the same
+whatever its body's size; the body is loaded (one statement per crumb) only
+if it is read, or up front with ``undefer(Crumb.body_md)``. Adding
+``preview_options`` fills ``Crumb.body_preview`` with the first characters
+of the body, cut in SQL.
+"""
+
+from typing import Callable, Dict, List, Tuple, Type
+
+from sqlalchemy import case, func, type_coerce
+from sqlalchemy.orm import defer, raiseload, selectinload, with_expression
+from sqlmodel import SQLModel
+
+from app.compression import TextPrefix
+from app.models import Crumb, Tag, Unit
+
+PREVIEW_LENGTH = 140
+
+
+def _crumb_public_loads(path=None) -> List:
+    """Loads needed to build a CrumbPublic: its unit and tags, and nothing below them."""
+    if path is None:
+        return [
+            selectinload(Crumb.unit).raiseload("*"),
+            selectinload(Crumb.tags).raiseload("*"),
+            raiseload("*"),
+        ]
+    return [
+        path.selectinload(Crumb.unit).raiseload("*"),
+        path.selectinload(Crumb.tags).raiseload("*"),
+        path.raiseload("*"),
+    ]
+
+
+def _stream() -> List:
+    # Crumbs -> unit + tags
+    return _crumb_public_loads()
+
+
+def _tag_page() -> List:
+    # Tag -> crumbs -> unit + tags
+    return [*_crumb_public_loads(selectinload(Tag.crumbs)), raiseload("*")]
+
+
+def _unit_detail() -> List:
+    # Unit -> crumbs -> tags; each crumb's unit is the parent already in the identity map
+    crumbs = selectinload(Unit.crumbs)
+    return [
+        crumbs.raiseload(Crumb.unit, sql_only=True),
+        crumbs.selectinload(Crumb.tags).raiseload("*"),
+        crumbs.raiseload("*"),
+        raiseload("*"),
+    ]
+
+
+def _crumb_metadata() -> List:
+    # Crumbs -> unit + tags, without body_md
+    return [defer(Crumb.body_md), *_crumb_public_loads()]
+
+
+def _unit_timeline() -> List:
+    # Unit -> crumbs (without body_md) -> tags
+    crumbs = selectinload(Unit.crumbs)
+    return [
+        crumbs.defer(Crumb.body_md),
+        crumbs.raiseload(Crumb.unit, sql_only=True),
+        crumbs.selectinload(Crumb.tags).raiseload("*"),
+        crumbs.raiseload("*"),
+        raiseload("*"),
+    ]
+
+
+PROFILES: Dict[str, Tuple[Type[SQLModel], Callable[[], List]]] = {
+    "stream": (Crumb, _stream),
+    "tag-page": (Tag, _tag_page),
+    "unit-detail": (Unit, _unit_detail),
+    "crumb-metadata": (Crumb, _crumb_metadata),
+    "unit-timeline": (Unit, _unit_timeline),
+}
+
+
+def load_options(profile: str) -> List:
+    """Return the loader options for a named profile."""
+    try:
+        _, build = PROFILES[profile]
+    except KeyError:
+        raise ValueError(
+            f"Unknown loading profile {profile!r}; expected one of {sorted(PROFILES)}"
+        ) from None
+    return build()
+
+
+def apply_profile(statement, profile: str):
+    """Apply a named loading profile to a select() of the profile's root entity."""
+    options = load_options(profile)
+    entity, _ = PROFILES[profile]
+    if statement.column_descriptions[0]["entity"] is not entity:
+        raise ValueError(f"Profile {profile!r} applies to {entity.__name__} queries")
+    return statement.options(*options)
+
+
+def body_preview(dialect: str, length: int = PREVIEW_LENGTH):
+    """SQL for the first `length` characters of Crumb.body_md."""
+    if length < 1:
+        raise ValueError("length must be at least 1")
+    prefix = func.substr(Crumb.body_md, 1, length)
+    if dialect == "sqlite":
+        # substr() of an archived body would cut its compressed bytes, so those
+        # come back whole and are cut after decompression (app/compression.py)
+        prefix = case((func.typeof(Crumb.body_md) == "blob", Crumb.body_md), else_=prefix)
+    return type_coerce(prefix, TextPrefix(length))
+
+
+def preview_options(dialect: str, length: int = PREVIEW_LENGTH, path=None) -> List:
+    """Options loading Crumb.body_preview; `path` is the loader option leading to the crumbs."""
+    expression = body_preview(dialect, length)
+    if path is None:
+        return [with_expression(Crumb.body_preview, expression)]
+    return [path.with_expression(Crumb.body_preview, expression)]
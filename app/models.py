@@ -1,11 +1,16 @@
 from datetime import datetime, timezone
 from enum import Enum
-import re
-from typing import List, Optional
+from typing import ClassVar, List, Optional
 
 from pydantic import field_validator
+from sqlalchemy.orm import Mapped, query_expression
+from sqlalchemy import DDL, event
 from sqlmodel import Field, Index, Relationship, SQLModel, text
 
+from app import ddl
+from app.compression import CompressibleText
+from app.normalize import normalize_tag_name
+
 
 class Visibility(str, Enum):
     draft = "draft"
@@ -13,15 +18,17 @@ class Visibility(str, Enum):
 
 
 class CrumbTag(SQLModel, table=True):
+    # The primary key serves crumb -> tags; this index serves tag -> crumbs
+    __table_args__ = (Index("idx_crumbtag_tag_crumb", "tag_id", "crumb_id"),)
     crumb_id: int = Field(
         foreign_key="crumb.id",
         primary_key=True,
-        sa_column_kwargs={"ondelete": "CASCADE"},
+        ondelete="CASCADE",
     )
     tag_id: int = Field(
         foreign_key="tag.id",
         primary_key=True,
-        sa_column_kwargs={"ondelete": "CASCADE"},
+        ondelete="CASCADE",
     )
 
 
@@ -61,7 +68,9 @@ class UnitPublic(UnitBase, table=False):
 
 # ---------- crumbs ----------
 class CrumbBase(SQLModel, table=False):
-    body_md: str = Field(description="Markdown content of the crumb")
+    body_md: str = Field(
+        sa_type=CompressibleText, description="Markdown content of the crumb"
+    )
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: Optional[datetime] = Field(
         default=None, sa_column_kwargs={"onupdate": lambda: datetime.now(timezone.utc)}
@@ -74,7 +83,21 @@ class CrumbBase(SQLModel, table=False):
 # The model for the persisted entity
 class Crumb(CrumbBase, table=True):
     __tablename__ = "crumb"  # type: ignore
-    __table_args__ = (Index("idx_crumb_created_at", "created_at"),)
+    __table_args__ = (
+        # Stream order is (created_at, id); the id tiebreaker keeps keyset cursors stable
+        Index("idx_crumb_created_at_id", "created_at", "id"),
+        # The same order over published crumbs only, so drafts cost public readers nothing.
+        # Queries must compare against the literal 'published' for the planner to use it.
+        Index(
+            "idx_crumb_published_created_at_id",
+            "created_at",
+            "id",
+            sqlite_where=text("visibility = 'published'"),
+            postgresql_where=text("visibility = 'published'"),
+        ),
+        # Unit -> crumbs lookups; created_at makes the per-unit min/max index-only
+        Index("idx_crumb_unit_id_created_at", "unit_id", "created_at"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
 
     # Foreign key to unit (optional)
@@ -90,9 +113,14 @@ class Crumb(CrumbBase, table=True):
         sa_relationship_kwargs={
             "lazy": "selectin",  # fetch related rows in a separate but efficient query using IN
             "passive_deletes": True,  # Defer delete handling to DB (requires ON DELETE CASCADE on the foreign key)
+            "order_by": "Tag.id",  # a stable tag order in CrumbPublic (app/serialize.py relies on it)
         },
     )
 
+    # The first characters of body_md, filled in only by queries that ask for
+    # it (see app/loading.py preview_options); None otherwise
+    body_preview: ClassVar[Mapped[Optional[str]]] = query_expression()
+
     def __str__(self) -> str:
         return f"Crumb of id:{self.id}: {self.body_md[:10]}... created at: {self.created_at}"
 
@@ -108,6 +136,45 @@ class CrumbPublic(CrumbBase, table=False):
     id: int
     unit: Optional["UnitPublic"] = None
     tags: List["TagPublic"] = Field(default=[])
+    body_html: Optional[str] = Field(
+        default=None, description="Rendered, sanitized body_md, when requested"
+    )
+
+
+class CrumbListing(SQLModel, table=False):
+    """A crumb without its body, for listings that only need metadata."""
+
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    visibility: Visibility
+    unit_id: Optional[int] = None
+    tags: List["TagPublic"] = Field(default=[])
+    body_preview: Optional[str] = Field(
+        default=None, description="The first characters of body_md, when requested"
+    )
+
+
+class UnitSummary(UnitPublic, table=False):
+    crumb_count: int = Field(default=0, description="Crumbs in this unit")
+    first_crumb_at: Optional[datetime] = Field(
+        default=None, description="created_at of the unit's oldest crumb"
+    )
+    last_crumb_at: Optional[datetime] = Field(
+        default=None, description="created_at of the unit's newest crumb"
+    )
+    tags: List[str] = Field(default=[], description="Names of the tags used in this unit")
+
+
+class UnitDetail(UnitPublic, table=False):
+    crumbs: List[CrumbPublic] = Field(default=[])
+
+
+class CrumbPage(SQLModel, table=False):
+    items: List[CrumbPublic] = Field(default=[])
+    next_cursor: Optional[str] = Field(
+        default=None, description="Opaque cursor for the following page, if any"
+    )
 
 
 # ---------- tags ----------
@@ -119,16 +186,7 @@ class TagBase(SQLModel, table=False):
     @field_validator("name", mode="before")
     @classmethod
     def normalize_name(cls, v: str) -> str:
-        if not v or not v.strip():
-            raise ValueError("Tag name cannot be empty")
-        v = re.sub(r"\s+", "-", v.strip().lower())
-        v = re.sub(r"-{2,}", "-", v)  # collapse multiple dashes
-        v = v.strip("-")  # no leading/trailing dashes
-        if not v:
-            raise ValueError("Tag name cannot be empty after normalization")
-        if not re.match(r"^[a-z0-9\-]+$", v):
-            raise ValueError("Tag names can only contain letters, numbers, and dashes")
-        return v
+        return normalize_tag_name(v)
 
 
 class Tag(TagBase, table=True):
@@ -155,3 +213,55 @@ class TagCreate(TagBase):
 
 class TagPublic(TagBase):
     id: int
+
+
+# Materialized per-tag aggregate, maintained by database triggers (see app/tag_stats.py)
+class TagStats(SQLModel, table=True):
+    __tablename__ = "tag_stats"
+    tag_id: int = Field(foreign_key="tag.id", primary_key=True, ondelete="CASCADE")
+    crumb_count: int = Field(default=0, description="Crumbs carrying this tag")
+    published_count: int = Field(default=0, description="Published crumbs carrying this tag")
+    last_used_at: Optional[datetime] = Field(
+        default=None, description="created_at of the newest crumb carrying this tag"
+    )
+
+
+class TagStatsPublic(TagPublic):
+    crumb_count: int = 0
+    published_count: int = 0
+    last_used_at: Optional[datetime] = None
+
+
+# Database-wide change counter, bumped by triggers (see app/http_cache.py)
+class DataVersion(SQLModel, table=True):
+    __tablename__ = "data_version"
+    id: int = Field(default=1, primary_key=True)
+    version: int = Field(default=0, description="Writes to links, tags and units so far")
+    changed_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc), description="Time of the last write"
+    )
+
+
+# ---------- database-side schema (app/ddl.py) ----------
+# Registered here, with the tables, so that every create_all of this metadata
+# installs the search index and the tag_stats and data_version triggers,
+# whatever was imported
+for _statement in ddl.SEARCH_SQLITE_DDL:
+    event.listen(Crumb.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in ddl.SEARCH_POSTGRESQL_DDL:
+    event.listen(
+        Crumb.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql")
+    )
+event.listen(
+    Crumb.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS crumb_fts").execute_if(dialect="sqlite"),
+)
+# The triggers span several tables, so they are created once the whole schema
+# exists rather than with any single table
+for _statement in ddl.TAG_STATS_SQLITE_DDL + ddl.DATA_VERSION_SQLITE_DDL:
+    event.listen(SQLModel.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in ddl.TAG_STATS_POSTGRESQL_DDL + ddl.DATA_VERSION_POSTGRESQL_DDL:
+    event.listen(
+        SQLModel.metadata, "after_create", DDL(_statement).execute_if(dialect="postgresql")
+    )
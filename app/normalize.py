@@ -0,0 +1,46 @@
+"""Tag-name normalization.
+
+Names are lowercased, runs of whitespace and dashes become a single dash,
+and leading/trailing dashes are dropped. Only letters, digits and dashes may
+remain. Names that are already canonical (by far the common case: every name
+read back from the database) return on a single precompiled match, and other
+inputs are memoized in a bounded LRU.
+"""
+
+import re
+from functools import lru_cache
+
+_CANONICAL = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_SEPARATORS = re.compile(r"[\s-]+")
+_ALLOWED = re.compile(r"[a-z0-9-]+")
+
+CACHE_SIZE = 4096
+
+
+def _normalize(v) -> str:
+    if not v or not v.strip():
+        raise ValueError("Tag name cannot be empty")
+    # One split on whitespace/dash runs replaces substitute, collapse and strip
+    v = "-".join(part for part in _SEPARATORS.split(v.lower()) if part)
+    if not v:
+        raise ValueError("Tag name cannot be empty after normalization")
+    if not _ALLOWED.fullmatch(v):
+        raise ValueError("Tag names can only contain letters, numbers, and dashes")
+    return v
+
+
+_normalize_cached = lru_cache(maxsize=CACHE_SIZE)(_normalize)
+
+
+def normalize_tag_name(v) -> str:
+    """Return the canonical form of a tag name, or raise ValueError."""
+    if not isinstance(v, str):
+        return _normalize(v)  # fails the same way the validator always has
+    if _CANONICAL.fullmatch(v):
+        return v
+    return _normalize_cached(v)
+
+
+def cache_info():
+    """Hit/miss statistics of the raw -> canonical memo."""
+    return _normalize_cached.cache_info()
@@ -0,0 +1,189 @@
+"""Markdown -> sanitized HTML for crumb bodies, with a content-addressed cache.
+
+The renderer escapes all input before adding markup, so raw HTML in a crumb
+is always shown as text, and links are limited to http(s) and mailto.
+
+Rendered HTML is cached in-process under ``(sha256(body_md), RENDERER_VERSION)``.
+Editing a crumb therefore can never serve stale HTML: the new body hashes to
+a new key. The entry for the old body is also evicted when the edit is
+flushed, so it does not linger in the byte budget. Bump RENDERER_VERSION
+whenever the output of ``render_markdown`` changes.
+"""
+
+import hashlib
+import html
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Tuple
+
+from sqlalchemy import event, inspect
+
+from app.models import Crumb, CrumbPublic
+
+RENDERER_VERSION = 2
+DEFAULT_BUDGET_BYTES = 64 * 1024 * 1024
+
+_FENCE = re.compile(r"^```[^\n]*\n(.*?)^```[ \t]*$", re.MULTILINE | re.DOTALL)
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_LIST_ITEM = re.compile(r"^\s*[-*]\s+(.*)$")
+_CODE = re.compile(r"`([^`\n]+)`")
+_STRONG = re.compile(r"\*\*(?=\S)(.+?)(?<=\S)\*\*")
+_EM = re.compile(r"\*(?=\S)(.+?)(?<=\S)\*")
+_LINK = re.compile(r"\[([^\]\n]+)\]\(([^)\s]+)\)")
+_SAFE_URL = re.compile(r"(?:https?://|mailto:)", re.IGNORECASE)
+
+
+def _emphasis(text: str) -> str:
+    text = _STRONG.sub(r"<strong>\1</strong>", text)
+    return _EM.sub(r"<em>\1</em>", text)
+
+
+def _inline(text: str) -> str:
+    """Render inline markup on text that has already been HTML-escaped."""
+    stashed = []
+
+    def stash(html_fragment: str) -> str:
+        stashed.append(html_fragment)
+        return f"\x00{len(stashed) - 1}\x00"
+
+    # no emphasis or links inside code spans
+    text = _CODE.sub(lambda match: stash(f"<code>{match.group(1)}</code>"), text)
+
+    def link(match):
+        label, url = match.groups()
+        if not _SAFE_URL.match(html.unescape(url)):
+            return label
+        # Stashed so that emphasis can never reach into the href
+        return stash(f'<a href="{url}" rel="nofollow noopener">{_emphasis(label)}</a>')
+
+    text = _emphasis(_LINK.sub(link, text))
+    return re.sub(r"\x00(\d+)\x00", lambda m: stashed[int(m.group(1))], text)
+
+
+def _blocks(text: str) -> Iterable[str]:
+    for block in re.split(r"\n\s*\n", text.strip()):
+        if not block:
+            continue
+        lines = block.splitlines()
+        if len(lines) == 1 and (heading := _HEADING.match(lines[0])):
+            level = len(heading.group(1))
+            yield f"<h{level}>{_inline(heading.group(2).strip())}</h{level}>"
+        elif all(_LIST_ITEM.match(line) for line in lines):
+            items = "".join(f"<li>{_inline(_LIST_ITEM.match(l).group(1))}</li>" for l in lines)
+            yield f"<ul>{items}</ul>"
+        else:
+            yield f"<p>{'<br>'.join(_inline(line.strip()) for line in lines)}</p>"
+
+
+def render_markdown(body_md: str) -> str:
+    """Render a crumb body to sanitized HTML."""
+    # NUL is reserved for the code-span and link placeholders used by _inline
+    text = body_md.replace("\r\n", "\n").replace("\x00", "")
+    escaped = html.escape(text, quote=True)
+    parts, position = [], 0
+    for fence in _FENCE.finditer(escaped):
+        parts.extend(_blocks(escaped[position : fence.start()]))
+        parts.append(f"<pre><code>{fence.group(1)}</code></pre>")
+        position = fence.end()
+    parts.extend(_blocks(escaped[position:]))
+    return "\n".join(parts)
+
+
+@dataclass(frozen=True)
+class RenderCacheStats:
+    entries: int
+    bytes: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class RenderCache:
+    """LRU of rendered HTML bounded by the total UTF-8 size of the cached HTML."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_BUDGET_BYTES,
+        renderer: Callable[[str], str] = render_markdown,
+        version: int = RENDERER_VERSION,
+    ):
+        self.max_bytes = max_bytes
+        self.renderer = renderer
+        self.version = version
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[bytes, int], Tuple[str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def key(self, body_md: str) -> Tuple[bytes, int]:
+        return hashlib.sha256(body_md.encode("utf-8")).digest(), self.version
+
+    def render(self, body_md: str) -> str:
+        """Return the HTML for `body_md`, rendering it on a miss."""
+        key = self.key(body_md)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+        # Render outside the lock; a concurrent miss on the same body just renders twice
+        rendered = self.renderer(body_md)
+        size = len(rendered.encode("utf-8"))
+        if size > self.max_bytes:
+            return rendered
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (rendered, size)
+                self._bytes += size
+                while self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self._evictions += 1
+        return rendered
+
+    def invalidate(self, body_md: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(self.key(body_md), None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> RenderCacheStats:
+        with self._lock:
+            return RenderCacheStats(
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
+
+
+default_render_cache = RenderCache()
+
+
+def with_html(
+    crumbs: Iterable[CrumbPublic], cache: Optional[RenderCache] = None
+) -> None:
+    """Fill body_html on each crumb from the render cache."""
+    cache = cache or default_render_cache
+    for crumb in crumbs:
+        crumb.body_html = cache.render(crumb.body_md)
+
+
+@event.listens_for(Crumb, "after_update")
+def _evict_replaced_body(mapper, connection, target):
+    # History is still available during the flush that writes the edit
+    for old_body in inspect(target).attrs.body_md.history.deleted:
+        if isinstance(old_body, str):
+            default_render_cache.invalidate(old_body)
@@ -0,0 +1,136 @@
+"""Restore an NDJSON export (see app/export.py) into a database.
+
+The file is read lazily, one line at a time. Each record is validated against
+``CrumbCreate`` and written through the bulk ingestion path in batches, with
+one transaction per batch, so memory is bounded by the batch size rather
+than the file size.
+
+Crumbs and units keep their original ``id`` and ``created_at``: unit names
+are not unique, so units cannot be matched by name without merging ones that
+share it. Before a batch is written, ids that already exist are skipped:
+batches commit atomically, so re-running an interrupted restore resumes after
+the last committed batch. Tags are matched by name, like any other ingest.
+"""
+
+import json
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, text
+from sqlmodel import Session, select
+
+from app.db import SessionFactory
+from app.ingest import IngestReport, NameResolver, ingest_chunk
+from app.models import Crumb, CrumbCreate, Unit, UnitPublic
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+@dataclass
+class RestoreReport(IngestReport):
+    skipped: int = 0
+    batches: int = 0
+
+
+class RestoreRecord(NamedTuple):
+    id: int
+    crumb: CrumbCreate
+    unit: Optional[UnitPublic] = None
+
+
+def parse_record(line: str) -> RestoreRecord:
+    """Parse one exported CrumbPublic line into its id, a CrumbCreate and its unit."""
+    record = json.loads(line)
+    if not isinstance(record, dict) or not isinstance(record.get("id"), int):
+        raise ValueError("record must be an object with an integer id")
+    unit = record.get("unit")
+    crumb = CrumbCreate.model_validate(
+        {
+            **record,
+            # An exported unit is restored by id; a bare unit_name is matched by name
+            "unit_name": None if unit else record.get("unit_name"),
+            "tags": [{"name": tag["name"]} for tag in record.get("tags", [])],
+        }
+    )
+    return RestoreRecord(record["id"], crumb, UnitPublic.model_validate(unit) if unit else None)
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[RestoreRecord]:
+    """Yield a RestoreRecord for each non-blank line, naming the line on bad input."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield parse_record(line)
+        except (ValueError, TypeError, KeyError, ValidationError) as exc:
+            raise ValueError(f"line {number}: {exc}") from exc
+
+
+def _existing_ids(session: Session, ids: List[int]) -> set:
+    return set(session.exec(select(Crumb.id).where(Crumb.id.in_(ids))).all())
+
+
+def _restore_units(session: Session, records: List[RestoreRecord], report) -> None:
+    """Insert the batch's units that are not in the database yet, keeping their ids."""
+    units = {record.unit.id: record.unit for record in records if record.unit}
+    if not units:
+        return
+    existing = set(session.exec(select(Unit.id).where(Unit.id.in_(list(units)))).all())
+    missing = [unit.model_dump() for unit_id, unit in units.items() if unit_id not in existing]
+    if missing:
+        session.execute(insert(Unit), missing)
+        report.units_created += len(missing)
+
+
+def _sync_id_sequences(session: Session) -> None:
+    # SQLite derives the next rowid from max(id); PostgreSQL's sequences must be moved
+    if session.get_bind().dialect.name == "postgresql":
+        for table in ("crumb", "unit"):
+            session.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"coalesce((SELECT max(id) FROM {table}), 1))"
+                )
+            )
+
+
+def restore_crumbs(
+    factory: SessionFactory,
+    records: Iterable[RestoreRecord],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> RestoreReport:
+    """Write records in batches of `batch_size`, one transaction each."""
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    report = RestoreReport()
+    started = time.perf_counter()
+    iterator = iter(records)
+    resolver = None
+    while batch := list(islice(iterator, batch_size)):
+        with factory.managed_session() as session:
+            # The resolved name -> id maps stay valid across batches once committed
+            if resolver is None:
+                resolver = NameResolver(session)
+            resolver.session = session
+            batch = [RestoreRecord(*record) for record in batch]
+            existing = _existing_ids(session, [record.id for record in batch])
+            pending = [record for record in batch if record.id not in existing]
+            report.skipped += len(batch) - len(pending)
+            if pending:
+                _restore_units(session, pending, report)
+                ingest_chunk(
+                    session,
+                    [record.crumb for record in pending],
+                    resolver,
+                    report,
+                    ids=[record.id for record in pending],
+                    unit_ids=[record.unit.id if record.unit else None for record in pending],
+                )
+            report.batches += 1
+    with factory.managed_session() as session:
+        _sync_id_sequences(session)
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,123 @@
+"""Full-text search over Crumb.body_md.
+
+SQLite keeps an FTS5 table, ``crumb_fts``, in step with ``crumb`` through
+triggers. PostgreSQL uses a generated ``tsvector`` column with a GIN index.
+Both are created with the ``crumb`` table by ``SQLModel.metadata.create_all``
+(the DDL is in app/ddl.py). Other dialects fall back to a LIKE scan.
+"""
+
+import re
+from typing import List
+
+from sqlalchemy import func, literal_column, text
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.ddl import SEARCH_SQLITE_DDL
+from app.loading import load_options
+from app.models import Crumb, CrumbPublic
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def _fts5_query(query: str) -> str:
+    """Quote each word so user input can never be parsed as FTS5 syntax."""
+    return " ".join(f'"{word}"' for word in _WORD.findall(query))
+
+
+def search_statement(dialect: str, query: str):
+    """Build a ranked search over crumbs for the given dialect name."""
+    statement = select(Crumb).options(*load_options("stream"))
+    if dialect == "sqlite":
+        fts = (
+            select(
+                literal_column("rowid").label("crumb_id"),
+                func.bm25(literal_column("crumb_fts")).label("rank"),
+            )
+            .select_from(text("crumb_fts"))
+            .where(
+                text("crumb_fts MATCH :fts_query").bindparams(fts_query=_fts5_query(query))
+            )
+            .subquery()
+        )
+        # bm25() is lower for better matches
+        return statement.join(fts, fts.c.crumb_id == Crumb.id).order_by(fts.c.rank, Crumb.id)
+    if dialect == "postgresql":
+        tsquery = func.websearch_to_tsquery("english", query)
+        body_tsv = literal_column("crumb.body_tsv")
+        return statement.where(body_tsv.op("@@")(tsquery)).order_by(
+            func.ts_rank(body_tsv, tsquery).desc(), Crumb.id
+        )
+    return statement.where(Crumb.body_md.contains(query, autoescape=True)).order_by(
+        Crumb.created_at, Crumb.id
+    )
+
+
+def search_crumbs(
+    session: Session, query: str, limit: int = 20, offset: int = 0
+) -> List[CrumbPublic]:
+    """Return one page of crumbs matching `query`, best match first."""
+    if not _WORD.search(query):
+        return []
+    statement = search_statement(session.get_bind().dialect.name, query)
+    crumbs = session.exec(statement.limit(limit).offset(offset)).all()
+    return [CrumbPublic.model_validate(crumb) for crumb in crumbs]
+
+
+async def search_crumbs_async(
+    session: AsyncSession, query: str, limit: int = 20, offset: int = 0
+) -> List[CrumbPublic]:
+    """Async variant of search_crumbs."""
+    if not _WORD.search(query):
+        return []
+    statement = search_statement(session.get_bind().dialect.name, query)
+    crumbs = (await session.exec(statement.limit(limit).offset(offset))).all()
+    return [CrumbPublic.model_validate(crumb) for crumb in crumbs]
+
+
+def _install_search_schema(session: Session) -> None:
+    current = session.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'crumb_fts_au'")
+    ).scalar()
+    if current is not None and "typeof(new.body_md)" not in current:
+        session.execute(text("DROP TRIGGER crumb_fts_au"))
+    for statement in SEARCH_SQLITE_DDL:
+        session.execute(text(statement))
+
+
+def upgrade_search_triggers(session: Session) -> None:
+    """Create missing search triggers and replace ones from before archiving existed.
+
+    A database without crumb_fts gets the table filled by rebuild_search_index,
+    rather than an empty index that would find nothing.
+    """
+    exists = session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'crumb_fts'")
+    ).first()
+    if exists is None:
+        rebuild_search_index(session)
+    else:
+        _install_search_schema(session)
+
+
+def rebuild_search_index(session: Session) -> None:
+    """Repopulate crumb_fts from crumb, e.g. for a database created before search existed."""
+    if session.get_bind().dialect.name != "sqlite":
+        return  # the tsvector column is generated, so PostgreSQL never drifts
+    _install_search_schema(session)
+    session.execute(text("DELETE FROM crumb_fts"))
+    session.execute(
+        text(
+            "INSERT INTO crumb_fts (rowid, body_md) "
+            "SELECT id, body_md FROM crumb WHERE typeof(body_md) = 'text'"
+        )
+    )
+    # Archived bodies are compressed, so they are inflated here rather than in SQL
+    archived = session.execute(
+        select(Crumb.id, Crumb.body_md).where(func.typeof(Crumb.body_md) == "blob")
+    )
+    for rows in archived.partitions(1000):
+        session.execute(
+            text("INSERT INTO crumb_fts (rowid, body_md) VALUES (:id, :body_md)"),
+            [{"id": crumb_id, "body_md": body_md} for crumb_id, body_md in rows],
+        )
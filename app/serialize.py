@@ -0,0 +1,201 @@
+"""CrumbPublic JSON straight from trusted rows, without Pydantic validation.
+
+``CrumbPublic.model_validate`` revalidates every nested unit and tag, and
+reruns ``TagBase.normalize_name`` on names that were normalized when they
+were stored. Rows read back from our own tables need none of that, so
+``encode_crumb`` writes the JSON for a ``CrumbRow`` directly. The output is
+byte-for-byte what ``CrumbPublic.model_dump_json()`` produces: the same field
+order, compact separators, non-ASCII left unescaped, and datetimes in
+Pydantic's ISO 8601 form (``Z`` for UTC).
+
+Rows come either from loaded ORM objects (``crumb_row``) or from a column
+query (``crumb_rows``). On SQLite and PostgreSQL that query carries each
+crumb's tags as a JSON array of ``[id, name]`` pairs, aggregated by a
+correlated subquery (``json_group_array`` / ``json_agg``), so a page is one
+statement and one round trip. Other dialects fall back to a second query
+for the tags of the page.
+"""
+
+import json
+from datetime import datetime, timedelta
+from enum import Enum
+from json.encoder import encode_basestring
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import Text, cast, func, literal_column
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Crumb, CrumbTag, Tag, Unit
+
+_ZERO = timedelta(0)
+_datetime_adapter = TypeAdapter(datetime)
+
+# The columns of a CrumbRow, in order, for queries outer-joined to Unit
+ROW_COLUMNS = (
+    Crumb.id,
+    Crumb.body_md,
+    Crumb.created_at,
+    Crumb.updated_at,
+    Crumb.visibility,
+    Unit.id,
+    Unit.name,
+    Unit.created_at,
+)
+
+
+class CrumbRow(NamedTuple):
+    id: int
+    body_md: str
+    created_at: datetime
+    updated_at: Optional[datetime]
+    visibility: str
+    unit_id: Optional[int]
+    unit_name: Optional[str]
+    unit_created_at: Optional[datetime]
+    tags: Sequence[Tuple[int, str]] = ()  # (id, name), in tag id order
+
+
+def _datetime(value: datetime) -> str:
+    offset = value.utcoffset()
+    if offset is None:
+        return f'"{value.isoformat()}"'
+    if offset == _ZERO:
+        return f'"{value.replace(tzinfo=None).isoformat()}Z"'
+    if offset.seconds % 60 or offset.microseconds:
+        # Sub-minute offsets are rare enough to leave to Pydantic
+        return _datetime_adapter.dump_json(value).decode()
+    return f'"{value.isoformat()}"'
+
+
+def encode_crumb(row: CrumbRow, body_html: Optional[str] = None) -> str:
+    """The CrumbPublic JSON of `row`, identical to model_dump_json()."""
+    if row.unit_id is None:
+        unit = "null"
+    else:
+        unit = (
+            f'{{"name":{encode_basestring(row.unit_name)},'
+            f'"created_at":{_datetime(row.unit_created_at)},"id":{row.unit_id}}}'
+        )
+    tags = ",".join(
+        f'{{"name":{encode_basestring(name)},"id":{tag_id}}}' for tag_id, name in row.tags
+    )
+    visibility = row.visibility.value if isinstance(row.visibility, Enum) else row.visibility
+    updated_at = "null" if row.updated_at is None else _datetime(row.updated_at)
+    html = "null" if body_html is None else encode_basestring(body_html)
+    return (
+        f'{{"body_md":{encode_basestring(row.body_md)},'
+        f'"created_at":{_datetime(row.created_at)},"updated_at":{updated_at},'
+        f'"visibility":"{visibility}","id":{row.id},"unit":{unit},'
+        f'"tags":[{tags}],"body_html":{html}}}'
+    )
+
+
+def encode_page(
+    rows: Iterable[CrumbRow],
+    next_cursor: Optional[str] = None,
+    render: Optional[Callable[[str], str]] = None,
+) -> bytes:
+    """The CrumbPage JSON of `rows`, identical to model_dump_json().
+
+    With `render` (e.g. RenderCache.render) each item's body_html is filled in.
+    """
+    items = ",".join(
+        encode_crumb(row, render(row.body_md) if render is not None else None) for row in rows
+    )
+    cursor = "null" if next_cursor is None else encode_basestring(next_cursor)
+    return f'{{"items":[{items}],"next_cursor":{cursor}}}'.encode()
+
+
+def crumb_row(crumb: Crumb) -> CrumbRow:
+    """The row of a loaded crumb (its unit and tags must be loaded too)."""
+    unit = crumb.unit
+    return CrumbRow(
+        crumb.id,
+        crumb.body_md,
+        crumb.created_at,
+        crumb.updated_at,
+        crumb.visibility,
+        unit.id if unit is not None else None,
+        unit.name if unit is not None else None,
+        unit.created_at if unit is not None else None,
+        [(tag.id, tag.name) for tag in crumb.tags],
+    )
+
+
+def tag_arrays_statement(crumb_ids: Sequence[int]):
+    return (
+        select(CrumbTag.crumb_id, Tag.id, Tag.name)
+        .join(Tag, Tag.id == CrumbTag.tag_id)
+        .where(CrumbTag.crumb_id.in_(crumb_ids))
+        .order_by(CrumbTag.crumb_id, Tag.id)
+    )
+
+
+def tags_json_column(dialect: str):
+    """A crumb's tags as a JSON array of [id, name] pairs; None without a JSON aggregate.
+
+    A correlated scalar subquery, evaluated only for the rows the outer query returns.
+    """
+    if dialect == "sqlite":
+        aggregated = func.json_group_array(func.json_array(Tag.id, Tag.name))
+    elif dialect == "postgresql":
+        pairs = func.json_agg(
+            aggregate_order_by(func.json_build_array(Tag.id, Tag.name), Tag.id)
+        )
+        aggregated = cast(func.coalesce(pairs, literal_column("'[]'::json")), Text)
+    else:
+        return None
+    return (
+        select(aggregated)
+        .select_from(CrumbTag)
+        .join(Tag, Tag.id == CrumbTag.tag_id)
+        .where(CrumbTag.crumb_id == Crumb.id)
+        .correlate(Crumb)
+        .scalar_subquery()
+        .label("tags")
+    )
+
+
+def _from_json(rows) -> List[CrumbRow]:
+    # json_group_array has no ORDER BY before SQLite 3.44, so sort here
+    return [CrumbRow(*row[:-1], sorted(map(tuple, json.loads(row[-1])))) for row in rows]
+
+
+def _with_tags(rows, links) -> List[CrumbRow]:
+    tags: Dict[int, List[Tuple[int, str]]] = {}
+    for crumb_id, tag_id, name in links:
+        tags.setdefault(crumb_id, []).append((tag_id, name))
+    return [CrumbRow(*row, tags.get(row[0], [])) for row in rows]
+
+
+def crumb_rows(session: Session, statement, single_query: bool = True) -> List[CrumbRow]:
+    """Run a select of ROW_COLUMNS and attach each row's tags.
+
+    The tags come back in the same statement where the dialect supports it
+    (and `single_query` is set), otherwise from one more query.
+    """
+    tags = tags_json_column(session.get_bind().dialect.name) if single_query else None
+    if tags is not None:
+        return _from_json(session.exec(statement.add_columns(tags)).all())
+    rows = session.exec(statement).all()
+    if not rows:
+        return []
+    links = session.exec(tag_arrays_statement([row[0] for row in rows])).all()
+    return _with_tags(rows, links)
+
+
+async def crumb_rows_async(
+    session: AsyncSession, statement, single_query: bool = True
+) -> List[CrumbRow]:
+    """Async variant of crumb_rows."""
+    tags = tags_json_column(session.get_bind().dialect.name) if single_query else None
+    if tags is not None:
+        return _from_json((await session.exec(statement.add_columns(tags))).all())
+    rows = (await session.exec(statement)).all()
+    if not rows:
+        return []
+    links = (await session.exec(tag_arrays_statement([row[0] for row in rows]))).all()
+    return _with_tags(rows, links)
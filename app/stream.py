@@ -0,0 +1,152 @@
+import base64
+import json
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import literal_column, tuple_
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.loading import load_options
+from app.models import Crumb, CrumbPage, CrumbPublic, Unit
+from app.serialize import ROW_COLUMNS, crumb_row, crumb_rows, crumb_rows_async, encode_page
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, crumb_id: int) -> str:
+    """Encode a stream position as an opaque, URL-safe cursor."""
+    raw = json.dumps([created_at.isoformat(), crumb_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor back into (created_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, crumb_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(crumb_id)
+    except (ValueError, TypeError) as exc:
+        raise ValueError(f"Invalid stream cursor: {cursor!r}") from exc
+
+
+# Inlined rather than bound so the planner can match the partial index's WHERE
+PUBLISHED = Crumb.visibility == literal_column("'published'")
+
+
+def stream_statement(
+    cursor: Optional[str] = None, newest_first: bool = False, published_only: bool = False
+):
+    """Build the keyset-paginated stream query, starting after `cursor`.
+
+    Seeks on the (created_at, id) index instead of skipping rows with OFFSET,
+    so every page costs the same no matter how deep into the stream it is.
+    With `published_only` it walks the partial index of published crumbs, so
+    drafts are never read.
+    """
+    return _keyset(
+        select(Crumb).options(*load_options("stream")), cursor, newest_first, published_only
+    )
+
+
+def stream_rows_statement(
+    cursor: Optional[str] = None, newest_first: bool = False, published_only: bool = False
+):
+    """The stream query as CrumbRow columns (crumb joined to its unit), for crumb_rows."""
+    statement = select(*ROW_COLUMNS).outerjoin(Unit, Unit.id == Crumb.unit_id)
+    return _keyset(statement, cursor, newest_first, published_only)
+
+
+def _keyset(statement, cursor: Optional[str], newest_first: bool, published_only: bool):
+    key = tuple_(Crumb.created_at, Crumb.id)
+    if published_only:
+        statement = statement.where(PUBLISHED)
+    if cursor is not None:
+        position = tuple_(*decode_cursor(cursor))
+        statement = statement.where(key < position if newest_first else key > position)
+    if newest_first:
+        return statement.order_by(Crumb.created_at.desc(), Crumb.id.desc())
+    return statement.order_by(Crumb.created_at, Crumb.id)
+
+
+def _split_page(rows, limit: int):
+    """Cut limit + 1 fetched rows down to a page and the cursor for the next one."""
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+    return rows, None
+
+
+def build_page(crumbs, limit: int) -> CrumbPage:
+    """Turn up to limit + 1 fetched crumbs into a page and its next cursor."""
+    crumbs, next_cursor = _split_page(crumbs, limit)
+    return CrumbPage(
+        items=[CrumbPublic.model_validate(crumb) for crumb in crumbs],
+        next_cursor=next_cursor,
+    )
+
+
+def build_page_json(crumbs, limit: int, render: Optional[Callable[[str], str]] = None) -> bytes:
+    """build_page(...).model_dump_json() as bytes, without revalidating the crumbs."""
+    crumbs, next_cursor = _split_page(crumbs, limit)
+    return encode_page(map(crumb_row, crumbs), next_cursor, render)
+
+
+def get_stream_page(
+    session: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    newest_first: bool = False,
+    published_only: bool = False,
+) -> CrumbPage:
+    """Return one page of the crumb stream and the cursor for the next page."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # Fetch one extra row to learn whether another page exists
+    statement = stream_statement(cursor, newest_first, published_only).limit(limit + 1)
+    return build_page(session.exec(statement).all(), limit)
+
+
+async def get_stream_page_async(
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    newest_first: bool = False,
+    published_only: bool = False,
+) -> CrumbPage:
+    """Async variant of get_stream_page."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    statement = stream_statement(cursor, newest_first, published_only).limit(limit + 1)
+    return build_page((await session.exec(statement)).all(), limit)
+
+
+def get_stream_page_json(
+    session: Session,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    newest_first: bool = False,
+    published_only: bool = False,
+    render: Optional[Callable[[str], str]] = None,
+) -> bytes:
+    """get_stream_page(...) as CrumbPage JSON bytes, built from rows without ORM objects.
+
+    `render` fills in body_html (see encode_page).
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    statement = stream_rows_statement(cursor, newest_first, published_only).limit(limit + 1)
+    return encode_page(*_split_page(crumb_rows(session, statement), limit), render)
+
+
+async def get_stream_page_json_async(
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    newest_first: bool = False,
+    published_only: bool = False,
+    render: Optional[Callable[[str], str]] = None,
+) -> bytes:
+    """Async variant of get_stream_page_json."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    statement = stream_rows_statement(cursor, newest_first, published_only).limit(limit + 1)
+    rows = await crumb_rows_async(session, statement)
+    return encode_page(*_split_page(rows, limit), render)
@@ -0,0 +1,125 @@
+"""In-process read-through cache of tag ids by normalized name.
+
+Tags are a small, hot and rarely changing set, so resolving them through the
+database on every crumb write is wasted round trips. Each database gets its
+own ``TagIdCache``, shared by every engine on it (the API's async engine and
+the sync engine that ingest and the write-behind queue use); misses are
+resolved in one query through the lower(name) unique index and remembered.
+
+Invalidation is generation based. A session that inserts, updates or deletes
+tags is marked, by its flush or, for bulk statements such as ``insert(Tag)``,
+by ``mark_tags_changed``. When it commits or rolls back, the cache for its
+database is cleared and its generation bumped. Lookups that started before the bump do
+not store their results, and a marked session never populates the cache, so
+uncommitted tag ids cannot leak to other sessions. Changes made outside the
+ORM (raw SQL, other processes) need an explicit ``invalidate()``.
+"""
+
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable
+
+from sqlalchemy import event, func
+from sqlmodel import Session, select
+
+from app.db import PerDatabase
+from app.models import Tag
+
+_TAGS_CHANGED = "tag_cache.tags_changed"
+
+
+@dataclass(frozen=True)
+class TagCacheStats:
+    entries: int
+    hits: int
+    misses: int
+    generation: int
+
+
+class TagIdCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self.generation = 0
+        self._hits = 0
+        self._misses = 0
+
+    def lookup(self, session: Session, names: Iterable[str]) -> Dict[str, int]:
+        """Map each normalized name that has a tag to its id, querying only for misses."""
+        names = set(names)
+        with self._lock:
+            found = {name: self._ids[name] for name in names if name in self._ids}
+            generation = self.generation
+            self._hits += len(found)
+            self._misses += len(names) - len(found)
+        missing = names - found.keys()
+        if not missing:
+            return found
+        rows = dict(
+            session.exec(
+                select(func.lower(Tag.name), Tag.id).where(func.lower(Tag.name).in_(missing))
+            ).all()
+        )
+        found.update(rows)
+        if not session.info.get(_TAGS_CHANGED):
+            with self._lock:
+                if self.generation == generation:
+                    self._ids.update(rows)
+        return found
+
+    def warm(self, session: Session) -> int:
+        """Load every tag into the cache; returns the number of entries."""
+        with self._lock:
+            generation = self.generation
+        rows = session.exec(select(func.lower(Tag.name), Tag.id)).all()
+        with self._lock:
+            if self.generation == generation:
+                self._ids.update(rows)
+            return len(self._ids)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._ids.clear()
+            self.generation += 1
+
+    def stats(self) -> TagCacheStats:
+        with self._lock:
+            return TagCacheStats(
+                entries=len(self._ids),
+                hits=self._hits,
+                misses=self._misses,
+                generation=self.generation,
+            )
+
+
+_caches: PerDatabase[TagIdCache] = PerDatabase(TagIdCache)
+
+
+def get_tag_id_cache(session: Session) -> TagIdCache:
+    """The tag id cache for the database `session` is bound to."""
+    return _caches.get(session)
+
+
+def warm_tag_id_cache(session: Session) -> int:
+    return get_tag_id_cache(session).warm(session)
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flushed_tag_changes(session, flush_context):
+    # new/dirty/deleted still hold the pre-flush state here
+    if any(isinstance(obj, Tag) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_TAGS_CHANGED] = True
+
+
+def mark_tags_changed(session: Session) -> None:
+    """Record that `session` wrote tags outside the unit of work (e.g. insert(Tag))."""
+    session.info[_TAGS_CHANGED] = True
+
+
+def _invalidate_if_changed(session):
+    if session.info.pop(_TAGS_CHANGED, False):
+        get_tag_id_cache(session).invalidate()
+
+
+event.listen(Session, "after_commit", _invalidate_if_changed)
+event.listen(Session, "after_rollback", _invalidate_if_changed)
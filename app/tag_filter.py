@@ -0,0 +1,150 @@
+"""Filter the crumb stream by tags with AND (all), OR (any) and NOT (none).
+
+Tag names are resolved in one query through the lower(name) unique index,
+together with their crumb counts from tag_stats. An AND filter is driven by
+its rarest tag: that tag's crumb ids are read from the (tag_id, crumb_id)
+index, and every other AND tag is probed per candidate through the CrumbTag
+primary key. When the tags are common enough that walking the stream in
+order and probing every crumb fills a page sooner than collecting (and
+sorting) all of the driving tag's crumbs, the plan flips to that walk.
+Results come back in stream order with the stream's cursors.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, exists, func
+from sqlmodel import Session, select
+
+from app.models import Crumb, CrumbPage, CrumbTag, Tag, TagBase, TagStats
+from app.stream import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, build_page, stream_statement
+
+
+@dataclass
+class TagFilter:
+    all_of: List[str] = field(default_factory=list)
+    any_of: List[str] = field(default_factory=list)
+    none_of: List[str] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.all_of = _normalized(self.all_of)
+        self.any_of = _normalized(self.any_of)
+        self.none_of = _normalized(self.none_of)
+
+    @property
+    def names(self) -> set:
+        return {*self.all_of, *self.any_of, *self.none_of}
+
+
+def _normalized(names: List[str]) -> List[str]:
+    # dict.fromkeys de-duplicates while keeping the caller's order
+    return list(dict.fromkeys(TagBase.normalize_name(name) for name in names))
+
+
+@dataclass
+class ResolvedTags:
+    # normalized name -> (tag id, crumb count); unknown names are left out
+    tags: Dict[str, Tuple[int, int]]
+    # max(crumb.id): a cheap upper bound on the number of crumbs
+    total_crumbs: int
+
+
+def resolve_tags(session: Session, names, published_only: bool = False) -> ResolvedTags:
+    """Resolve tag names and the cardinalities the planner needs in one query."""
+    total = select(func.coalesce(func.max(Crumb.id), 0)).scalar_subquery()
+    if not names:
+        return ResolvedTags(tags={}, total_crumbs=session.exec(select(total)).one())
+    count = TagStats.published_count if published_only else TagStats.crumb_count
+    rows = session.exec(
+        select(func.lower(Tag.name), Tag.id, func.coalesce(count, 0), total)
+        .outerjoin(TagStats, TagStats.tag_id == Tag.id)
+        .where(func.lower(Tag.name).in_(names))
+    ).all()
+    return ResolvedTags(
+        tags={name: (tag_id, count) for name, tag_id, count, _ in rows},
+        total_crumbs=rows[0][3] if rows else 0,
+    )
+
+
+def _tagged_with(tag_ids: List[int]):
+    """Candidate crumb ids read from the (tag_id, crumb_id) index."""
+    return Crumb.id.in_(select(CrumbTag.crumb_id).where(CrumbTag.tag_id.in_(tag_ids)))
+
+
+def _has_tag(tag_ids: List[int]):
+    """EXISTS probe on the (crumb_id, tag_id) primary key."""
+    return exists().where(
+        and_(CrumbTag.crumb_id == Crumb.id, CrumbTag.tag_id.in_(tag_ids))
+    )
+
+
+def filter_statement(
+    tag_filter: TagFilter,
+    resolved: ResolvedTags,
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    newest_first: bool = False,
+    published_only: bool = False,
+):
+    """Build the filtered stream query, or return None if nothing can match."""
+    statement = stream_statement(cursor, newest_first, published_only)
+    tags = resolved.tags
+    total = max(resolved.total_crumbs, 1)
+    # Estimated share of crumbs that match, assuming tags are independent
+    selectivity = 1.0
+    drivers = []  # (candidate crumbs, tag ids) that could drive the scan
+    probes = []
+
+    if tag_filter.all_of:
+        if any(name not in tags for name in tag_filter.all_of):
+            return None
+        # Rarest tag first: it drives the scan, the rest are cheap probes
+        planned = sorted((tags[name] for name in tag_filter.all_of), key=lambda t: t[1])
+        for _, count in planned:
+            selectivity *= count / total
+        drivers.append((planned[0][1], [planned[0][0]]))
+        probes.extend([tag_id] for tag_id, _ in planned)
+
+    if tag_filter.any_of:
+        matched = [tags[name] for name in tag_filter.any_of if name in tags]
+        if not matched:
+            return None
+        candidates = sum(count for _, count in matched)
+        selectivity *= min(1.0, candidates / total)
+        any_ids = [tag_id for tag_id, _ in matched]
+        drivers.append((candidates, any_ids))
+        probes.append(any_ids)
+
+    if drivers:
+        candidates, driving_ids = min(drivers)
+        # Walking the stream needs about limit / selectivity rows for one page
+        if selectivity == 0 or candidates <= limit / selectivity:
+            statement = statement.where(_tagged_with(driving_ids))
+            probes.remove(driving_ids)
+    for tag_ids in probes:
+        statement = statement.where(_has_tag(tag_ids))
+
+    none_ids = [tags[name][0] for name in tag_filter.none_of if name in tags]
+    if none_ids:
+        statement = statement.where(~_has_tag(none_ids))
+
+    return statement
+
+
+def filter_crumbs(
+    session: Session,
+    tag_filter: TagFilter,
+    cursor: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    newest_first: bool = False,
+    published_only: bool = False,
+) -> CrumbPage:
+    """Return one page of crumbs matching `tag_filter`, in stream order."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    resolved = resolve_tags(session, tag_filter.names, published_only)
+    statement = filter_statement(
+        tag_filter, resolved, limit, cursor, newest_first, published_only
+    )
+    if statement is None:
+        return CrumbPage()
+    return build_page(session.exec(statement.limit(limit + 1)).all(), limit)
@@ -0,0 +1,73 @@
+"""Incrementally maintained per-tag crumb counts (the ``tag_stats`` table).
+
+Database triggers keep ``tag_stats`` current as CrumbTag links are inserted or
+deleted and as a crumb's visibility or created_at changes. Because the work
+happens in the database, bulk inserts and ON DELETE CASCADE are covered too.
+The triggers are created with the schema by ``SQLModel.metadata.create_all``
+(the DDL is in app/ddl.py); ``rebuild_tag_stats`` installs them on an existing
+database and recomputes every row from scratch.
+
+When a crumb is deleted, its BEFORE DELETE trigger accounts for all of its
+links. The per-link delete trigger therefore only acts while the crumb still
+exists, so links removed by the cascade are not counted twice.
+"""
+
+from typing import List
+
+from sqlalchemy import case, delete, func, insert, text
+from sqlmodel import Session, select
+
+from app.ddl import TAG_STATS_POSTGRESQL_DDL, TAG_STATS_SQLITE_DDL
+from app.models import Crumb, CrumbTag, Tag, TagStats, TagStatsPublic, Visibility
+
+
+def rebuild_tag_stats(session: Session) -> int:
+    """Install the triggers if needed and recompute tag_stats from scratch.
+
+    Returns the number of tags that have at least one crumb.
+    """
+    dialect = session.get_bind().dialect.name
+    ddl = {"sqlite": TAG_STATS_SQLITE_DDL, "postgresql": TAG_STATS_POSTGRESQL_DDL}
+    for statement in ddl.get(dialect, []):
+        session.execute(text(statement))
+
+    published = func.sum(case((Crumb.visibility == Visibility.published, 1), else_=0))
+    aggregate = (
+        select(CrumbTag.tag_id, func.count(), published, func.max(Crumb.created_at))
+        .join(Crumb, Crumb.id == CrumbTag.crumb_id)
+        .group_by(CrumbTag.tag_id)
+    )
+    session.execute(delete(TagStats))
+    result = session.execute(
+        insert(TagStats).from_select(
+            ["tag_id", "crumb_count", "published_count", "last_used_at"], aggregate
+        )
+    )
+    return result.rowcount
+
+
+def list_tag_stats(session: Session, published_only: bool = False) -> List[TagStatsPublic]:
+    """List every tag with its counts without touching the crumb table."""
+    statement = (
+        select(
+            Tag.id,
+            Tag.name,
+            func.coalesce(TagStats.crumb_count, 0),
+            func.coalesce(TagStats.published_count, 0),
+            TagStats.last_used_at,
+        )
+        .outerjoin(TagStats, TagStats.tag_id == Tag.id)
+        .order_by(Tag.name)
+    )
+    if published_only:
+        statement = statement.where(TagStats.published_count > 0)
+    return [
+        TagStatsPublic(
+            id=tag_id,
+            name=name,
+            crumb_count=crumb_count,
+            published_count=published_count,
+            last_used_at=last_used_at,
+        )
+        for tag_id, name, crumb_count, published_count, last_used_at in session.exec(statement)
+    ]
@@ -0,0 +1,51 @@
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import raiseload
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Tag, TagBase, TagPublic
+
+
+def tag_by_name_statement(name: str):
+    """Look a tag up through the lower(name) unique index."""
+    return (
+        select(Tag)
+        .where(func.lower(Tag.name) == TagBase.normalize_name(name))
+        .options(raiseload("*"))
+    )
+
+
+def list_tags_statement():
+    return select(Tag).order_by(Tag.name).options(raiseload("*"))
+
+
+def get_tag_by_name(session: Session, name: str) -> Optional[TagPublic]:
+    """Return the tag whose normalized name matches `name`, if any."""
+    try:
+        statement = tag_by_name_statement(name)
+    except ValueError:
+        return None  # not a valid tag name, so no tag can have it
+    tag = session.exec(statement).first()
+    return TagPublic.model_validate(tag) if tag else None
+
+
+def list_tags(session: Session) -> List[TagPublic]:
+    return [TagPublic.model_validate(tag) for tag in session.exec(list_tags_statement())]
+
+
+async def get_tag_by_name_async(session: AsyncSession, name: str) -> Optional[TagPublic]:
+    """Async variant of get_tag_by_name."""
+    try:
+        statement = tag_by_name_statement(name)
+    except ValueError:
+        return None
+    tag = (await session.exec(statement)).first()
+    return TagPublic.model_validate(tag) if tag else None
+
+
+async def list_tags_async(session: AsyncSession) -> List[TagPublic]:
+    """Async variant of list_tags."""
+    tags = (await session.exec(list_tags_statement())).all()
+    return [TagPublic.model_validate(tag) for tag in tags]
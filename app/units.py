@@ -0,0 +1,99 @@
+"""Unit overview: every unit with its crumb count, time span and tags.
+
+Listing units through ``UnitPublic`` would selectin-load every crumb of every
+unit. The overview instead joins two grouped subqueries onto ``unit`` in a
+single statement: per-unit crumb counts and first/last timestamps, served
+from the (unit_id, created_at) index, and per-unit distinct tag names.
+With `published_only` both aggregates see only published crumbs, and units
+without any are left out.
+"""
+
+from typing import List
+
+from sqlalchemy import distinct, func
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Crumb, CrumbTag, Tag, Unit, UnitSummary
+from app.stream import PUBLISHED
+
+
+def _distinct_tag_names(dialect: str):
+    # Tag names are [a-z0-9-], so ',' can never appear inside one
+    if dialect == "postgresql":
+        return func.string_agg(distinct(Tag.name), ",")
+    if dialect == "sqlite":
+        return func.group_concat(distinct(Tag.name))
+    return func.aggregate_strings(Tag.name, ",")
+
+
+def unit_summary_statement(dialect: str, published_only: bool = False):
+    """One round trip: units left-joined to their crumb and tag aggregates."""
+    visible = [Crumb.unit_id.is_not(None)]
+    if published_only:
+        visible.append(PUBLISHED)
+    crumbs = (
+        select(
+            Crumb.unit_id,
+            func.count().label("crumb_count"),
+            func.min(Crumb.created_at).label("first_crumb_at"),
+            func.max(Crumb.created_at).label("last_crumb_at"),
+        )
+        .where(*visible)
+        .group_by(Crumb.unit_id)
+        .subquery()
+    )
+    tags = (
+        select(Crumb.unit_id, _distinct_tag_names(dialect).label("tags"))
+        .join(CrumbTag, CrumbTag.crumb_id == Crumb.id)
+        .join(Tag, Tag.id == CrumbTag.tag_id)
+        .where(*visible)
+        .group_by(Crumb.unit_id)
+        .subquery()
+    )
+    statement = (
+        select(
+            Unit.id,
+            Unit.name,
+            Unit.created_at,
+            func.coalesce(crumbs.c.crumb_count, 0),
+            crumbs.c.first_crumb_at,
+            crumbs.c.last_crumb_at,
+            tags.c.tags,
+        )
+        .outerjoin(crumbs, crumbs.c.unit_id == Unit.id)
+        .outerjoin(tags, tags.c.unit_id == Unit.id)
+        .order_by(Unit.created_at, Unit.id)
+    )
+    if published_only:
+        statement = statement.where(crumbs.c.crumb_count.is_not(None))
+    return statement
+
+
+def _summaries(rows) -> List[UnitSummary]:
+    return [
+        UnitSummary(
+            id=unit_id,
+            name=name,
+            created_at=created_at,
+            crumb_count=crumb_count,
+            first_crumb_at=first_crumb_at,
+            last_crumb_at=last_crumb_at,
+            tags=sorted(set(tags.split(","))) if tags else [],
+        )
+        for unit_id, name, created_at, crumb_count, first_crumb_at, last_crumb_at, tags in rows
+    ]
+
+
+def list_unit_summaries(session: Session, published_only: bool = False) -> List[UnitSummary]:
+    """Every unit with its crumb count, first/last crumb time and tag names."""
+    statement = unit_summary_statement(session.get_bind().dialect.name, published_only)
+    return _summaries(session.exec(statement).all())
+
+
+async def list_unit_summaries_async(
+    session: AsyncSession, published_only: bool = False
+) -> List[UnitSummary]:
+    """Async variant of list_unit_summaries."""
+    statement = unit_summary_statement(session.get_bind().dialect.name, published_only)
+    return _summaries((await session.exec(statement)).all())
@@ -0,0 +1,209 @@
+"""Write-behind batching of crumb creation.
+
+``WriteBehindQueue.submit`` puts a CrumbCreate on an in-process queue and
+returns a Future straight away. One worker thread drains the queue and
+writes what it has collected in a single transaction through
+``ingest_chunk``: a batch goes out once it holds ``max_batch`` crumbs or its
+oldest crumb has waited ``max_delay_ms``. On SQLite that turns one commit
+(and fsync) per capture into one per batch.
+
+A future resolves to the new crumb's id only after its transaction has
+committed, so an acknowledged write is durable. If a batch fails, its crumbs
+are retried one transaction each, so a bad crumb fails alone. ``close()``,
+which is also registered to run at interpreter exit, stops accepting work
+and writes everything already queued before it returns; a process that is
+killed outright loses the writes that were not yet acknowledged.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+from app.db import SessionFactory
+from app.ingest import IngestReport, NameResolver, ingest_chunk
+from app.models import CrumbCreate
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH = 200
+DEFAULT_MAX_DELAY_MS = 50.0
+
+
+@dataclass(frozen=True)
+class WriteBehindStats:
+    submitted: int
+    written: int
+    failed: int
+    cancelled: int
+    batches: int
+    pending: int
+
+
+@dataclass
+class _Pending:
+    data: CrumbCreate
+    future: Future
+    queued_at: float
+
+
+@dataclass
+class _Barrier:
+    future: Future
+
+
+class WriteBehindQueue:
+    """Queue crumb creations and write them in grouped transactions from a worker thread."""
+
+    def __init__(
+        self,
+        factory: SessionFactory,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_delay_ms: float = DEFAULT_MAX_DELAY_MS,
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self.factory = factory
+        self.max_batch = max_batch
+        self.max_delay = max_delay_ms / 1000
+        self._queue: "queue.Queue[Union[_Pending, _Barrier, None]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._submitted = 0
+        self._written = 0
+        self._failed = 0
+        self._cancelled = 0
+        self._batches = 0
+
+    def start(self) -> "WriteBehindQueue":
+        """Start the worker; crumbs submitted before this wait in the queue."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The write-behind queue is closed")
+            self._spawn()
+        return self
+
+    def _spawn(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def submit(self, data: CrumbCreate) -> "Future[int]":
+        """Queue `data` for creation; the future resolves to the crumb id once committed."""
+        future: "Future[int]" = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The write-behind queue is closed")
+            self._submitted += 1
+            self._queue.put(_Pending(data, future, time.monotonic()))
+        return future
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Write everything submitted so far now, and wait until it has been written."""
+        barrier = _Barrier(Future())
+        with self._lock:
+            if self._closed:
+                return
+            self._spawn()
+            self._queue.put(barrier)
+        barrier.future.result(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting crumbs and write the ones already queued."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._spawn()
+            self._queue.put(None)
+        self._thread.join(timeout)
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "WriteBehindQueue":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def stats(self) -> WriteBehindStats:
+        with self._lock:
+            return WriteBehindStats(
+                submitted=self._submitted,
+                written=self._written,
+                failed=self._failed,
+                cancelled=self._cancelled,
+                batches=self._batches,
+                pending=self._submitted - self._written - self._failed - self._cancelled,
+            )
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[_Pending] = []
+            barriers: List[_Barrier] = []
+            item = self._queue.get()
+            # The batch is due max_delay after its oldest crumb was submitted
+            deadline = getattr(item, "queued_at", time.monotonic()) + self.max_delay
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                if isinstance(item, _Barrier):
+                    barriers.append(item)
+                    break
+                # Skip crumbs whose caller cancelled the future before it was written
+                if item.future.set_running_or_notify_cancel():
+                    batch.append(item)
+                else:
+                    self._count(cancelled=1)
+                if len(batch) >= self.max_batch:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for barrier in barriers:
+                barrier.future.set_result(None)
+
+    def _write_batch(self, chunk: List[CrumbCreate]) -> List[int]:
+        with self.factory.managed_session() as session:
+            return ingest_chunk(session, chunk, NameResolver(session), IngestReport())
+
+    def _write(self, batch: List[_Pending]) -> None:
+        try:
+            ids = self._write_batch([pending.data for pending in batch])
+        except Exception:
+            logger.warning("Write-behind batch of %d failed; retrying one by one", len(batch))
+            for pending in batch:
+                self._write_one(pending)
+            return
+        self._count(written=len(batch), batches=1)
+        for pending, crumb_id in zip(batch, ids):
+            pending.future.set_result(crumb_id)
+
+    def _write_one(self, pending: _Pending) -> None:
+        try:
+            [crumb_id] = self._write_batch([pending.data])
+        except Exception as exc:
+            self._count(failed=1)
+            pending.future.set_exception(exc)
+        else:
+            self._count(written=1, batches=1)
+            pending.future.set_result(crumb_id)
+
+    def _count(
+        self, written: int = 0, failed: int = 0, cancelled: int = 0, batches: int = 0
+    ) -> None:
+        with self._lock:
+            self._written += written
+            self._failed += failed
+            self._cancelled += cancelled
+            self._batches += batches
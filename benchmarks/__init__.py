@@ -0,0 +1 @@
+# Benchmarks for breadcrumbs; run with `python -m benchmarks.<name>`
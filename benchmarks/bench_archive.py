@@ -0,0 +1,70 @@
+"""Archive tier: database size and recent-stream latency before and after archiving.
+
+Generates a corpus spread over --crumbs / 25 days, archives the bodies of
+crumbs older than --older-than-days with VACUUM, and reports the file size
+and the latency of the first stream page (the newest, never archived crumbs)
+and of a page deep in the archived history.
+
+Usage: python -m benchmarks.bench_archive [--crumbs 50000] [--older-than-days 90]
+"""
+
+import argparse
+import os
+from datetime import timedelta
+
+from sqlmodel import Session
+
+from app.archive import archive_bodies
+from app.db import SessionFactory
+from app.stream import encode_cursor, get_stream_page_json
+from benchmarks.common import STREAM_START, temp_engine, timed
+from benchmarks.datagen import DataSpec, populate
+
+
+def _size(engine) -> int:
+    return os.path.getsize(engine.url.database)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--crumbs", type=int, default=50_000)
+    parser.add_argument("--older-than-days", type=float, default=90)
+    parser.add_argument("--no-dictionary", action="store_true")
+    args = parser.parse_args()
+    spec = DataSpec(crumbs=args.crumbs)
+
+    with temp_engine(tuned=True) as engine:
+        populate(engine, spec)
+        with engine.connect() as connection:
+            connection.exec_driver_sql("VACUUM")
+        now = STREAM_START + timedelta(days=spec.units)
+        deep = encode_cursor(STREAM_START + timedelta(days=spec.units // 2), spec.crumbs // 2)
+
+        def latencies():
+            with Session(engine) as session:
+                recent = timed(lambda: get_stream_page_json(session))
+                old = timed(lambda: get_stream_page_json(session, cursor=deep))
+            return recent, old
+
+        before, (recent_before, old_before) = _size(engine), latencies()
+        report = archive_bodies(
+            SessionFactory(engine),
+            timedelta(days=args.older_than_days),
+            use_dictionary=not args.no_dictionary,
+            vacuum=True,
+            now=now,
+        )
+        after, (recent_after, old_after) = _size(engine), latencies()
+
+    print(
+        f"archived {report.crumbs:,} bodies ({report.skipped:,} left as text) in "
+        f"{report.seconds:.1f}s: {report.bytes_before:,} -> {report.bytes_after:,} bytes "
+        f"({report.ratio:.0%})"
+    )
+    print(f"database file   {before:>14,} -> {after:>14,} bytes ({after / before:.0%})")
+    print(f"recent page     {recent_before:11.2f} ms -> {recent_after:8.2f} ms")
+    print(f"archived page   {old_before:11.2f} ms -> {old_after:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Requests per second for the sync (threadpool) and async stream paths.
+
+Each simulated client repeatedly fetches a stream page, the way a FastAPI
+endpoint would: sync handlers run on the AnyIO threadpool, async handlers
+await the async engine directly.
+
+Usage: python -m benchmarks.bench_async [--clients 200] [--requests 20]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import anyio.to_thread
+from sqlmodel import SQLModel
+
+from app.db import (
+    AsyncSessionFactory,
+    EngineSettings,
+    SessionFactory,
+    create_configured_async_engine,
+    create_configured_engine,
+)
+from app.stream import get_stream_page, get_stream_page_async
+from benchmarks.common import seed_crumbs
+
+
+async def load(handler, clients: int, requests: int) -> float:
+    async def client():
+        for _ in range(requests):
+            await handler()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return clients * requests / (time.perf_counter() - started)
+
+
+async def main_async(clients: int, requests: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = EngineSettings(url=f"sqlite:///{os.path.join(tmp, 'bench.sqlite')}")
+        engine = create_configured_engine(settings)
+        SQLModel.metadata.create_all(engine)
+        seed_crumbs(engine, 10_000)
+        sync_factory = SessionFactory(engine)
+        async_engine = create_configured_async_engine(settings)
+        async_factory = AsyncSessionFactory(async_engine)
+
+        def fetch_sync():
+            with sync_factory.managed_session() as session:
+                get_stream_page(session, limit=20, newest_first=True)
+
+        async def sync_handler():
+            await anyio.to_thread.run_sync(fetch_sync)
+
+        async def async_handler():
+            async with async_factory.managed_session() as session:
+                await get_stream_page_async(session, limit=20, newest_first=True)
+
+        print(f"sync  (threadpool): {await load(sync_handler, clients, requests):8.0f} req/s")
+        print(f"async (aiosqlite):  {await load(async_handler, clients, requests):8.0f} req/s")
+        await async_engine.dispose()
+        engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main_async(args.clients, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Concurrent read/write throughput with the default and the tuned SQLite engine.
+
+Usage: python -m benchmarks.bench_engine_concurrency [--seconds 5] [--readers 8] [--writers 4]
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel
+
+from app.db import EngineSettings, create_configured_engine
+from app.models import Crumb
+from app.stream import get_stream_page
+from benchmarks.common import seed_crumbs
+
+
+def run(engine, seconds: float, readers: int, writers: int) -> dict:
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            try:
+                with Session(engine) as session:
+                    get_stream_page(session, limit=20, newest_first=True)
+                bump("reads")
+            except OperationalError:
+                bump("locked")
+
+    def writer():
+        while time.perf_counter() < deadline:
+            try:
+                with Session(engine) as session:
+                    session.add(Crumb(body_md="concurrent write " * 10))
+                    session.commit()
+                bump("writes")
+            except OperationalError:
+                bump("locked")
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    args = parser.parse_args()
+
+    for label in ("default", "tuned"):
+        with tempfile.TemporaryDirectory() as tmp:
+            url = f"sqlite:///{os.path.join(tmp, 'bench.sqlite')}"
+            if label == "default":
+                engine = create_engine(url)
+            else:
+                engine = create_configured_engine(EngineSettings(url=url))
+            SQLModel.metadata.create_all(engine)
+            seed_crumbs(engine, 10_000)
+            counts = run(engine, args.seconds, args.readers, args.writers)
+            engine.dispose()
+        print(
+            f"{label:>8}: {counts['reads'] / args.seconds:8.0f} reads/s"
+            f" {counts['writes'] / args.seconds:8.0f} writes/s"
+            f" {counts['locked']:6d} 'database is locked' errors"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Compare bulk ingestion with one-at-a-time ORM inserts.
+
+Usage: python -m benchmarks.bench_ingest [--count 50000] [--chunk-size 1000]
+"""
+
+import argparse
+import time
+
+from sqlmodel import Session, select
+
+from app.ingest import bulk_ingest
+from app.models import Crumb, CrumbCreate, Tag, TagCreate, Unit
+from benchmarks.common import temp_engine
+
+TAG_POOL = 200
+UNIT_POOL = 50
+
+
+def generate(count: int):
+    for i in range(count):
+        yield CrumbCreate(
+            body_md=f"Imported thought number {i}. " * 8,
+            unit_name=f"unit {i % UNIT_POOL}",
+            tags=[TagCreate(name=f"Tag {(i * k) % TAG_POOL}") for k in (1, 7, 13)],
+        )
+
+
+def orm_ingest(session: Session, crumbs) -> None:
+    """The baseline: resolve every unit and tag with its own query."""
+    for data in crumbs:
+        unit = session.exec(
+            select(Unit).where(Unit.name == data.unit_name).order_by(Unit.id.desc())
+        ).first() or Unit(name=data.unit_name)
+        tags = {}
+        for tag_data in data.tags:
+            tag = session.exec(select(Tag).where(Tag.name == tag_data.name)).first()
+            tags[tag_data.name] = tag or tags.get(tag_data.name) or Tag(name=tag_data.name)
+        session.add(Crumb(body_md=data.body_md, unit=unit, tags=list(tags.values())))
+        session.flush()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=50_000)
+    parser.add_argument("--orm-count", type=int, default=2_000)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    with temp_engine() as engine, Session(engine) as session:
+        started = time.perf_counter()
+        orm_ingest(session, generate(args.orm_count))
+        session.commit()
+        elapsed = time.perf_counter() - started
+        print(f"ORM one-at-a-time: {args.orm_count / elapsed:10.0f} crumbs/s")
+
+    with temp_engine() as engine, Session(engine) as session:
+        report = bulk_ingest(session, generate(args.count), chunk_size=args.chunk_size)
+        session.commit()
+        print(
+            f"bulk_ingest:       {report.crumbs / report.seconds:10.0f} crumbs/s"
+            f" ({report.rows_per_second:.0f} rows/s incl. {report.links} tag links)"
+        )
+
+
+if __name__ == "__main__":
+    main()
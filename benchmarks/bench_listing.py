@@ -0,0 +1,90 @@
+"""Month listing cost: full crumbs vs. body_md deferred vs. a 140-character preview.
+
+Lists every crumb of a month from a generated corpus three ways and reports
+wall time, peak Python memory while loading, and the body bytes fetched
+from the database. Raise --median-body to see which modes grow with content
+size rather than with the number of rows.
+
+Usage: python -m benchmarks.bench_listing [--crumbs 20000] [--median-body 350]
+"""
+
+import argparse
+import math
+import tracemalloc
+from datetime import timedelta
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from app.listings import month_statement
+from app.loading import PREVIEW_LENGTH, load_options
+from app.models import Crumb, CrumbListing, CrumbPublic
+from benchmarks.common import STREAM_START, temp_engine, timed
+from benchmarks.datagen import DataSpec, populate
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--crumbs", type=int, default=20_000)
+    parser.add_argument("--median-body", type=int, default=350, help="Median body characters")
+    args = parser.parse_args()
+
+    with temp_engine() as engine:
+        spec = DataSpec(
+            crumbs=args.crumbs,
+            body_mu=math.log(args.median_body),
+            max_body=max(16_000, args.median_body * 40),
+        )
+        populate(engine, spec)
+        month = STREAM_START + timedelta(days=40)
+        listing = month_statement("sqlite", month.year, month.month)
+        previews = month_statement("sqlite", month.year, month.month, PREVIEW_LENGTH)
+        full = (
+            select(Crumb)
+            .options(*load_options("stream"))
+            .where(listing.whereclause)
+            .order_by(Crumb.created_at, Crumb.id)
+        )
+
+        with Session(engine) as session:
+            body_bytes = session.exec(
+                select(func.sum(func.length(Crumb.body_md))).where(
+                    Crumb.id.in_(select(listing.subquery().c.id))
+                )
+            ).one()
+            rows = len(session.exec(listing).all())
+            session.expunge_all()
+            runs = {
+                "full crumbs": (full, CrumbPublic, body_bytes),
+                "body deferred": (listing, CrumbListing, 0),
+                f"preview {PREVIEW_LENGTH}": (previews, CrumbListing, None),
+            }
+            print(f"{rows} crumbs, {body_bytes:,} body characters")
+            for name, (statement, model, fetched) in runs.items():
+
+                def run():
+                    [model.model_validate(crumb) for crumb in session.exec(statement).all()]
+                    session.expunge_all()
+
+                if fetched is None:
+                    fetched = sum(
+                        len(crumb.body_preview) for crumb in session.exec(statement).all()
+                    )
+                    session.expunge_all()
+                print(
+                    f"{name:<14} {timed(run):8.2f} ms  peak {_peak_kib(run):9,.0f} KiB  "
+                    f"body chars fetched {fetched:>12,}"
+                )
+
+
+if __name__ == "__main__":
+    main()
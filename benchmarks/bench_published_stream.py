@@ -0,0 +1,64 @@
+"""Published-stream page latency as drafts pile up.
+
+Usage: python -m benchmarks.bench_published_stream [--published 10000] [--drafts 0 100000 1000000]
+"""
+
+import argparse
+from datetime import timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.models import Crumb, Visibility
+from app.stream import get_stream_page
+from benchmarks.common import SEED_CHUNK, STREAM_START, seed_crumbs, temp_engine, timed
+
+
+def seed_drafts(engine, count: int) -> None:
+    """Insert `count` drafts interleaved with the published crumbs."""
+    with engine.begin() as conn:
+        for start in range(0, count, SEED_CHUNK):
+            conn.execute(
+                insert(Crumb),
+                [
+                    {
+                        "body_md": "draft " * 30,
+                        "created_at": STREAM_START + timedelta(seconds=7 * i),
+                        "visibility": Visibility.draft,
+                    }
+                    for i in range(start, min(start + SEED_CHUNK, count))
+                ],
+            )
+
+
+def bench(published: int, drafts: int) -> None:
+    with temp_engine() as engine:
+        seed_crumbs(engine, published)
+        seed_drafts(engine, drafts)
+        with Session(engine) as session:
+
+            def first_page():
+                get_stream_page(session, published_only=True)
+                session.expunge_all()
+
+            def newest_page():
+                get_stream_page(session, newest_first=True, published_only=True)
+                session.expunge_all()
+
+            print(
+                f"{drafts:>9} drafts | first page {timed(first_page):8.2f} ms"
+                f" | newest page {timed(newest_page):8.2f} ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--published", type=int, default=10_000)
+    parser.add_argument("--drafts", type=int, nargs="+", default=[0, 100_000, 1_000_000])
+    args = parser.parse_args()
+    for drafts in args.drafts:
+        bench(args.published, drafts)
+
+
+if __name__ == "__main__":
+    main()
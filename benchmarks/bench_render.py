@@ -0,0 +1,53 @@
+"""Render time for a 1,000-crumb stream page with a cold and a warm cache.
+
+Usage: python -m benchmarks.bench_render [--page-size 1000]
+"""
+
+import argparse
+import random
+import time
+
+from app.models import CrumbPublic
+from app.render import RenderCache, with_html
+
+PARAGRAPH = (
+    "Some **thoughts** about `sqlite` and *indexes*, see [the docs](https://sqlite.org). "
+    "A second sentence that runs on for a while without much markup at all. "
+)
+
+
+def make_page(size: int, rng: random.Random):
+    crumbs = []
+    for i in range(size):
+        paragraphs = rng.randint(1, 6)
+        body = f"## Crumb {i}\n\n" + "\n\n".join(PARAGRAPH * rng.randint(1, 4) for _ in range(paragraphs))
+        body += "\n\n- a point\n- another point"
+        crumbs.append(CrumbPublic(id=i, body_md=body))
+    return crumbs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    page = make_page(args.page_size, random.Random(3))
+    cache = RenderCache()
+
+    started = time.perf_counter()
+    with_html(page, cache)
+    cold = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with_html(page, cache)
+    warm = (time.perf_counter() - started) * 1000
+
+    stats = cache.stats()
+    print(
+        f"{args.page_size} crumbs: cold {cold:8.2f} ms | warm {warm:8.2f} ms"
+        f" | cache {stats.entries} entries, {stats.bytes / 1024:.0f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare full-text search latency with a naive LIKE scan.
+
+Usage: python -m benchmarks.bench_search [--count 100000]
+"""
+
+import argparse
+import random
+
+from sqlalchemy import update
+from sqlmodel import Session, select
+
+from app.models import Crumb
+from app.search import search_crumbs
+from benchmarks.common import seed_crumbs, temp_engine, timed
+
+VOCABULARY = (
+    "river stone ladder window coffee garden signal paper orbit lantern "
+    "engine meadow harbor thread mirror canvas falcon summit prism echo"
+).split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    with temp_engine() as engine:
+        seed_crumbs(engine, args.count)
+        # Give each crumb a distinct mix of words, plus one rare needle
+        with engine.begin() as conn:
+            for start in range(1, args.count + 1, 10_000):
+                for crumb_id in range(start, min(start + 10_000, args.count + 1)):
+                    words = " ".join(rng.choices(VOCABULARY, k=40))
+                    conn.execute(
+                        update(Crumb).where(Crumb.id == crumb_id).values(body_md=words)
+                    )
+            conn.execute(
+                update(Crumb).where(Crumb.id == args.count // 2).values(body_md="zeppelin")
+            )
+
+        with Session(engine) as session:
+            for term in ("zeppelin", "lantern"):
+
+                def like_scan():
+                    session.exec(
+                        select(Crumb).where(Crumb.body_md.contains(term)).limit(20)
+                    ).all()
+                    session.expunge_all()
+
+                def fts():
+                    search_crumbs(session, term, limit=20)
+                    session.expunge_all()
+
+                print(
+                    f"{args.count} crumbs, {term!r:>11}: LIKE {timed(like_scan):8.2f} ms"
+                    f" | FTS {timed(fts):8.2f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Serialized crumbs per second for 1,000-crumb pages: Pydantic vs. trusted rows.
+
+Three ways to turn a page into CrumbPage JSON:
+- pydantic: CrumbPublic.model_validate on loaded ORM crumbs, then model_dump_json
+- orm rows: the same loaded crumbs through crumb_row/encode_page
+- sql rows: the stream row query plus its tag query, then encode_page (no ORM objects)
+
+Usage: python -m benchmarks.bench_serialize [--crumbs 20000] [--page 1000]
+"""
+
+import argparse
+
+from sqlmodel import Session
+
+from app.serialize import crumb_rows, encode_page
+from app.stream import build_page, build_page_json, stream_rows_statement, stream_statement
+from benchmarks.common import temp_engine, timed
+from benchmarks.datagen import DataSpec, populate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--crumbs", type=int, default=20_000)
+    parser.add_argument("--page", type=int, default=1000)
+    args = parser.parse_args()
+
+    with temp_engine() as engine:
+        populate(engine, DataSpec(crumbs=args.crumbs))
+        with Session(engine) as session:
+            # Pages above MAX_PAGE_SIZE, so the statements are built here rather than clamped
+            crumbs = session.exec(stream_statement().limit(args.page)).all()
+            rows = stream_rows_statement().limit(args.page)
+            expected = build_page(crumbs, args.page).model_dump_json().encode()
+            assert build_page_json(crumbs, args.page) == expected
+            assert encode_page(crumb_rows(session, rows)) == expected
+
+            runs = {
+                "pydantic": lambda: build_page(crumbs, args.page).model_dump_json(),
+                "orm rows": lambda: build_page_json(crumbs, args.page),
+                "sql rows (with query)": lambda: encode_page(crumb_rows(session, rows)),
+            }
+            for name, run in runs.items():
+                ms = timed(run, repeat=7)
+                print(f"{name:<22} {ms:8.2f} ms/page  {args.page / ms * 1000:10,.0f} crumbs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compare OFFSET and keyset pagination latency deep into the crumb stream.
+
+Usage: python -m benchmarks.bench_stream_pagination [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+
+from sqlmodel import Session, select
+
+from app.models import Crumb
+from app.stream import encode_cursor, stream_statement
+from benchmarks.common import seed_crumbs, temp_engine, timed
+
+PAGE_SIZE = 50
+
+
+def bench(size: int) -> None:
+    with temp_engine() as engine:
+        seed_crumbs(engine, size)
+        with Session(engine) as session:
+            # The deepest full page, i.e. the worst case for OFFSET
+            depth = size - PAGE_SIZE
+            before = session.exec(
+                select(Crumb.created_at, Crumb.id)
+                .order_by(Crumb.created_at, Crumb.id)
+                .offset(depth - 1)
+                .limit(1)
+            ).one()
+            cursor = encode_cursor(*before)
+
+            def first_page():
+                session.exec(stream_statement().limit(PAGE_SIZE)).all()
+                session.expunge_all()
+
+            def offset_page():
+                session.exec(stream_statement().offset(depth).limit(PAGE_SIZE)).all()
+                session.expunge_all()
+
+            def keyset_page():
+                session.exec(stream_statement(cursor).limit(PAGE_SIZE)).all()
+                session.expunge_all()
+
+            print(
+                f"{size:>9} crumbs | first page {timed(first_page):8.2f} ms"
+                f" | last page OFFSET {timed(offset_page):8.2f} ms"
+                f" | last page keyset {timed(keyset_page):8.2f} ms"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
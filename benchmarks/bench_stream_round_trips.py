@@ -0,0 +1,64 @@
+"""Stream page latency over a slow link: ORM selectin loads vs. one JSON-aggregated query.
+
+Every statement is delayed by --latency-ms before it runs, standing in for
+the network round trip to a remote database, so the page cost is dominated
+by how many statements it takes:
+- orm: crumbs, then selectin queries for units and tags (3 statements)
+- rows + tag query: the row query plus a query for the page's tags (2)
+- rows + json tags: tags aggregated in the row query itself (1)
+
+Usage: python -m benchmarks.bench_stream_round_trips [--crumbs 20000] [--latency-ms 5]
+"""
+
+import argparse
+import time
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.serialize import crumb_rows, encode_page
+from app.stream import build_page, stream_rows_statement, stream_statement
+from benchmarks.common import temp_engine, timed
+from benchmarks.datagen import DataSpec, populate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--crumbs", type=int, default=20_000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+
+    with temp_engine() as engine:
+        populate(engine, DataSpec(crumbs=args.crumbs))
+        statements = []
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def round_trip(conn, cursor, statement, *rest):
+            statements.append(statement)
+            time.sleep(args.latency_ms / 1000)
+
+        with Session(engine) as session:
+            rows = stream_rows_statement().limit(args.limit)
+            crumbs = stream_statement().limit(args.limit)
+
+            def orm():
+                build_page(session.exec(crumbs).all(), args.limit).model_dump_json()
+                session.expunge_all()
+
+            runs = {
+                "orm": orm,
+                "rows + tag query": lambda: encode_page(
+                    crumb_rows(session, rows, single_query=False)
+                ),
+                "rows + json tags": lambda: encode_page(crumb_rows(session, rows)),
+            }
+            for name, run in runs.items():
+                statements.clear()
+                run()
+                count = len(statements)
+                print(f"{name:<18} {count} statements  {timed(run):8.2f} ms/page")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Latency of 1-5 tag AND/OR filters over CrumbTag.
+
+Tags are drawn from a Zipf-like distribution, so filters mix very common and
+rare tags the way a real stream does.
+
+Usage: python -m benchmarks.bench_tag_filter [--links 1000000] [--tags-per-crumb 4]
+"""
+
+import argparse
+import random
+
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from app.models import CrumbTag, Tag
+from app.tag_filter import TagFilter, filter_crumbs
+from benchmarks.common import seed_crumbs, temp_engine, timed
+
+TAG_COUNT = 500
+
+
+def seed_links(engine, crumbs: int, tags_per_crumb: int, rng: random.Random) -> None:
+    weights = [1 / rank for rank in range(1, TAG_COUNT + 1)]
+    with engine.begin() as conn:
+        conn.execute(insert(Tag), [{"name": f"tag-{i}"} for i in range(1, TAG_COUNT + 1)])
+        for start in range(1, crumbs + 1, 10_000):
+            rows = []
+            for crumb_id in range(start, min(start + 10_000, crumbs + 1)):
+                tag_ids = set(rng.choices(range(1, TAG_COUNT + 1), weights, k=tags_per_crumb))
+                rows.extend({"crumb_id": crumb_id, "tag_id": t} for t in tag_ids)
+            conn.execute(insert(CrumbTag), rows)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=1_000_000)
+    parser.add_argument("--tags-per-crumb", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    crumbs = args.links // args.tags_per_crumb
+    with temp_engine() as engine:
+        seed_crumbs(engine, crumbs)
+        seed_links(engine, crumbs, args.tags_per_crumb, rng)
+        with Session(engine) as session:
+            # tag-1 is the most common tag, tag-400 one of the rarest
+            combos = [["tag-1"], ["tag-1", "tag-2"], ["tag-1", "tag-2", "tag-400"],
+                      ["tag-1", "tag-2", "tag-3", "tag-4"],
+                      ["tag-1", "tag-2", "tag-3", "tag-4", "tag-5"]]
+            for names in combos:
+                for mode in ("all_of", "any_of"):
+
+                    def run():
+                        filter_crumbs(session, TagFilter(**{mode: names}), limit=50)
+                        session.expunge_all()
+
+                    print(f"{mode:>6} {len(names)} tags {','.join(names):<40} {timed(run):8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Tag-name validations per second, before and after the normalizer rewrite.
+
+Usage: python -m benchmarks.bench_tag_names [--iterations 200000]
+"""
+
+import argparse
+import re
+import time
+
+from app.models import TagCreate
+from app.normalize import normalize_tag_name
+
+CANONICAL = [f"topic-{i}" for i in range(100)]
+RAW = [f"  Topic {i}  Notes " for i in range(100)]
+
+
+def legacy_normalize(v):
+    if not v or not v.strip():
+        raise ValueError("Tag name cannot be empty")
+    v = re.sub(r"\s+", "-", v.strip().lower())
+    v = re.sub(r"-{2,}", "-", v)
+    v = v.strip("-")
+    if not v:
+        raise ValueError("Tag name cannot be empty after normalization")
+    if not re.match(r"^[a-z0-9\-]+$", v):
+        raise ValueError("Tag names can only contain letters, numbers, and dashes")
+    return v
+
+
+def rate(fn, names, iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(names[i % len(names)])
+    return iterations / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    for label, names in (("canonical", CANONICAL), ("raw", RAW)):
+        print(
+            f"{label:>9} names | legacy {rate(legacy_normalize, names, args.iterations):10.0f}/s"
+            f" | normalizer {rate(normalize_tag_name, names, args.iterations):10.0f}/s"
+            f" | TagCreate {rate(lambda n: TagCreate(name=n), names, args.iterations):10.0f}/s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Unit overview latency: one grouped query vs. loading units through UnitPublic.
+
+Usage: python -m benchmarks.bench_units [--units 10000] [--crumbs-per-unit 10]
+"""
+
+import argparse
+from datetime import timedelta
+
+from sqlalchemy import insert
+from sqlmodel import Session, select
+
+from app.models import Crumb, CrumbTag, Tag, Unit, UnitPublic
+from app.units import list_unit_summaries
+from benchmarks.common import STREAM_START, temp_engine, timed
+
+
+def seed(engine, units: int, per_unit: int) -> None:
+    with engine.begin() as conn:
+        conn.execute(insert(Tag), [{"name": f"tag-{i}"} for i in range(50)])
+        conn.execute(
+            insert(Unit),
+            [
+                {"name": f"unit {u}", "created_at": STREAM_START + timedelta(days=u)}
+                for u in range(units)
+            ],
+        )
+        rows = [
+            {
+                "body_md": "lorem ipsum " * 20,
+                "created_at": STREAM_START + timedelta(days=u, minutes=c),
+                "unit_id": u + 1,
+            }
+            for u in range(units)
+            for c in range(per_unit)
+        ]
+        if not rows:
+            return
+        conn.execute(insert(Crumb), rows)
+        conn.execute(
+            insert(CrumbTag),
+            [{"crumb_id": i + 1, "tag_id": i % 50 + 1} for i in range(len(rows))],
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--units", type=int, default=10_000)
+    parser.add_argument("--crumbs-per-unit", type=int, default=10)
+    args = parser.parse_args()
+
+    with temp_engine() as engine:
+        seed(engine, args.units, args.crumbs_per_unit)
+        with Session(engine) as session:
+
+            def summaries():
+                list_unit_summaries(session)
+
+            def orm_units():
+                # Unit.crumbs is selectin-loaded, dragging in every crumb
+                [UnitPublic.model_validate(u) for u in session.exec(select(Unit)).all()]
+                session.expunge_all()
+
+            print(
+                f"{args.units} units | summary query {timed(summaries):8.2f} ms"
+                f" | ORM units {timed(orm_units, repeat=3):8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
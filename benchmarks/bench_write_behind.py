@@ -0,0 +1,73 @@
+"""Burst capture throughput: one transaction per crumb vs. the write-behind queue.
+
+Runs against an on-disk SQLite database with the application's pragmas; pass
+--synchronous FULL to make every commit an fsync, as on a default SQLite setup.
+
+Usage: python -m benchmarks.bench_write_behind [--crumbs 2000] [--synchronous NORMAL]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlmodel import SQLModel, select
+
+from app.crumbs import create_crumb
+from app.db import EngineSettings, SessionFactory, create_configured_engine
+from app.models import Crumb, CrumbCreate, TagCreate
+from app.write_behind import WriteBehindQueue
+
+
+def _payloads(count: int):
+    return [
+        CrumbCreate(
+            body_md=f"quick thought {i}",
+            unit_name=f"unit {i // 100}",
+            tags=[TagCreate(name=f"tag-{i % 7}"), TagCreate(name="capture")],
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--crumbs", type=int, default=2000)
+    parser.add_argument("--synchronous", default="NORMAL", choices=["OFF", "NORMAL", "FULL"])
+    parser.add_argument("--max-batch", type=int, default=200)
+    parser.add_argument("--max-delay-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    payloads = _payloads(args.crumbs)
+
+    def per_crumb(factory: SessionFactory):
+        for data in payloads:
+            with factory.managed_session() as session:
+                create_crumb(session, data)
+
+    def write_behind(factory: SessionFactory):
+        with WriteBehindQueue(factory, args.max_batch, args.max_delay_ms) as writer:
+            futures = [writer.submit(data) for data in payloads]
+            for future in futures:
+                future.result()
+
+    for name, run in (("managed_session per crumb", per_crumb), ("write-behind", write_behind)):
+        with tempfile.TemporaryDirectory() as tmp:
+            settings = EngineSettings(
+                url=f"sqlite:///{os.path.join(tmp, 'bench.sqlite')}",
+                sqlite_synchronous=args.synchronous,
+            )
+            engine = create_configured_engine(settings)
+            SQLModel.metadata.create_all(engine)
+            factory = SessionFactory(engine)
+            started = time.perf_counter()
+            run(factory)
+            seconds = time.perf_counter() - started
+            with factory.managed_session() as session:
+                written = len(session.exec(select(Crumb.id)).all())
+            assert written == args.crumbs
+            print(f"{name:<26} {seconds * 1000:9.1f} ms  {args.crumbs / seconds:10,.0f} crumbs/s")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Shared helpers for the benchmark scripts."""
+
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from sqlalchemy import insert
+from sqlmodel import SQLModel, create_engine
+
+from app.db import EngineSettings, create_configured_engine
+from app.models import Crumb, Visibility
+
+SEED_CHUNK = 10_000
+STREAM_START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+@contextmanager
+def temp_engine(tuned: bool = False):
+    """Yield an engine on a throwaway on-disk SQLite database with the schema created.
+
+    With `tuned` the engine gets the application's pragmas (WAL, foreign keys, ...).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.sqlite')}"
+        if tuned:
+            engine = create_configured_engine(EngineSettings(url=url))
+        else:
+            engine = create_engine(url)
+        SQLModel.metadata.create_all(engine)
+        try:
+            yield engine
+        finally:
+            engine.dispose()
+
+
+def seed_crumbs(engine, count: int, body_size: int = 200) -> None:
+    """Insert `count` crumbs a few minutes apart, in chunks through executemany."""
+    body = ("lorem ipsum " * (body_size // 12 + 1))[:body_size]
+    with engine.begin() as conn:
+        for start in range(0, count, SEED_CHUNK):
+            conn.execute(
+                insert(Crumb),
+                [
+                    {
+                        "body_md": body,
+                        "created_at": STREAM_START + timedelta(minutes=3 * i),
+                        "visibility": Visibility.published,
+                    }
+                    for i in range(start, min(start + SEED_CHUNK, count))
+                ],
+            )
+
+
+def sample(fn, repeat: int = 5) -> List[float]:
+    """Run `fn` `repeat` times and return each wall time in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """Run `fn` `repeat` times and return the median wall time in milliseconds."""
+    return statistics.median(sample(fn, repeat))
@@ -0,0 +1,185 @@
+"""Deterministic synthetic data: units, markdown crumbs and Zipf-distributed tags.
+
+The same spec always produces the same rows, so timings taken on different
+commits are measured against identical data. Crumb bodies are assembled from
+a pool of markdown blocks (paragraphs, lists, code fences, headings) up to a
+log-normal target length: most crumbs are a few hundred characters, a long
+tail runs to several kilobytes. Tag ``tag-1`` is the most common; the tag of
+rank r is used in proportion to 1 / r ** zipf_s.
+
+Usage: python -m benchmarks.datagen --scale 100k --db bench.sqlite
+"""
+
+import argparse
+import itertools
+import math
+import random
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import insert
+from sqlmodel import SQLModel
+
+from app.db import EngineSettings, create_configured_engine
+from app.models import Crumb, CrumbTag, Tag, Unit, Visibility
+from benchmarks.common import SEED_CHUNK, STREAM_START
+
+SCALES: Dict[str, int] = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+_WORDS = (
+    "the a of to and in is it that for on with as was at by this from query index "
+    "session crumb note idea read write table row cache page stream tag unit draft "
+    "python sql async join filter order plan scan cursor commit batch insert select "
+    "today learned because however maybe better faster slower again later first "
+    "problem answer example result value field model schema test build deploy"
+).split()
+# Share of crumbs with 0, 1, 2, ... tags
+_TAGS_PER_CRUMB = (0.10, 0.30, 0.28, 0.17, 0.09, 0.04, 0.02)
+
+
+@dataclass(frozen=True)
+class DataSpec:
+    crumbs: int
+    crumbs_per_unit: int = 25
+    unitless_share: float = 0.1
+    published_share: float = 0.75
+    tags: int = 1000
+    zipf_s: float = 1.1
+    # log-normal body length in characters: median exp(mu), spread sigma
+    body_mu: float = math.log(350)
+    body_sigma: float = 0.9
+    max_body: int = 16_000
+    seed: int = 42
+
+    @classmethod
+    def for_scale(cls, scale: str, **overrides) -> "DataSpec":
+        return cls(crumbs=SCALES[scale], **overrides)
+
+    @property
+    def units(self) -> int:
+        return math.ceil(self.crumbs / self.crumbs_per_unit)
+
+
+@dataclass
+class Batch:
+    crumbs: List[dict]
+    links: List[dict]
+
+
+def tag_names(spec: DataSpec) -> List[str]:
+    """Tag names in rank order, most common first."""
+    return [f"tag-{rank}" for rank in range(1, spec.tags + 1)]
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.choices(_WORDS, k=rng.randint(6, 18))
+    if rng.random() < 0.3:
+        i = rng.randrange(len(words))
+        word = words[i]
+        words[i] = rng.choice((f"`{word}`", f"**{word}**", f"[{word}](https://example.com/{word})"))
+    return " ".join(words).capitalize() + "."
+
+
+def _block(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.55:
+        return " ".join(_sentence(rng) for _ in range(rng.randint(1, 5)))
+    if kind < 0.75:
+        return "\n".join(f"- {_sentence(rng)}" for _ in range(rng.randint(2, 6)))
+    if kind < 0.9:
+        code = "\n".join(
+            f"{rng.choice(_WORDS)} = {rng.choice(_WORDS)}({rng.randint(0, 99)})"
+            for _ in range(rng.randint(2, 8))
+        )
+        return f"```python\n{code}\n```"
+    return f"## {' '.join(rng.choices(_WORDS, k=rng.randint(2, 5))).title()}"
+
+
+def _block_pool(rng: random.Random, size: int = 2000) -> List[str]:
+    return [_block(rng) for _ in range(size)]
+
+
+def _body(rng: random.Random, pool: List[str], spec: DataSpec) -> str:
+    target = min(spec.max_body, max(20, int(rng.lognormvariate(spec.body_mu, spec.body_sigma))))
+    blocks, length = [], 0
+    while length < target:
+        block = rng.choice(pool)
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks)[:target]
+
+
+def generate(spec: DataSpec, chunk_size: int = SEED_CHUNK) -> Iterator[Batch]:
+    """Crumb and link rows with explicit ids, `chunk_size` crumbs at a time.
+
+    Crumbs of a unit are contiguous and minutes apart; units start a day apart.
+    """
+    rng = random.Random(spec.seed)
+    pool = _block_pool(rng)
+    cum_weights = list(
+        itertools.accumulate(1 / rank**spec.zipf_s for rank in range(1, spec.tags + 1))
+    )
+    tag_ids = range(1, spec.tags + 1)
+    tag_counts = range(len(_TAGS_PER_CRUMB))
+
+    for start in range(0, spec.crumbs, chunk_size):
+        batch = Batch([], [])
+        for i in range(start, min(start + chunk_size, spec.crumbs)):
+            unit_index = i // spec.crumbs_per_unit
+            crumb_id = i + 1
+            batch.crumbs.append(
+                {
+                    "id": crumb_id,
+                    "body_md": _body(rng, pool, spec),
+                    "created_at": STREAM_START
+                    + timedelta(days=unit_index, minutes=i % spec.crumbs_per_unit * 5),
+                    "visibility": Visibility.published
+                    if rng.random() < spec.published_share
+                    else Visibility.draft,
+                    "unit_id": None if rng.random() < spec.unitless_share else unit_index + 1,
+                }
+            )
+            [count] = rng.choices(tag_counts, _TAGS_PER_CRUMB)
+            chosen = set(rng.choices(tag_ids, cum_weights=cum_weights, k=count))
+            batch.links.extend({"crumb_id": crumb_id, "tag_id": t} for t in sorted(chosen))
+        yield batch
+
+
+def populate(engine, spec: DataSpec, chunk_size: int = SEED_CHUNK) -> Tuple[int, int]:
+    """Insert the spec's tags, units, crumbs and links; return (crumbs, links)."""
+    links = 0
+    with engine.begin() as conn:
+        conn.execute(insert(Tag), [{"name": name} for name in tag_names(spec)])
+        conn.execute(
+            insert(Unit),
+            [
+                {"id": u + 1, "name": f"unit {u}", "created_at": STREAM_START + timedelta(days=u)}
+                for u in range(spec.units)
+            ],
+        )
+        for batch in generate(spec, chunk_size):
+            conn.execute(insert(Crumb), batch.crumbs)
+            if batch.links:
+                conn.execute(insert(CrumbTag), batch.links)
+            links += len(batch.links)
+    return spec.crumbs, links
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="10k")
+    parser.add_argument("--seed", type=int, default=DataSpec.seed)
+    parser.add_argument("--db", default="bench.sqlite", help="SQLite file to create")
+    args = parser.parse_args()
+
+    engine = create_configured_engine(EngineSettings(url=f"sqlite:///{args.db}"))
+    SQLModel.metadata.create_all(engine)
+    started = time.perf_counter()
+    crumbs, links = populate(engine, DataSpec.for_scale(args.scale, seed=args.seed))
+    print(f"{crumbs} crumbs, {links} links in {time.perf_counter() - started:.1f} s -> {args.db}")
+
+
+if __name__ == "__main__":
+    main()
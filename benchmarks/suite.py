@@ -0,0 +1,215 @@
+"""Model-layer benchmark suite over synthetic data, with JSON results for comparison.
+
+For each scale a fresh SQLite database (with the application's pragmas) is
+filled by benchmarks.datagen, then every benchmark is timed against it:
+bulk and ORM inserts, stream pages, tag filters, the unit overview,
+serialization to CrumbPublic, and deletes that cascade to links. Results
+go to a JSON file tagged with the git commit; pass an earlier file as
+--baseline to print the ratio of each median against it.
+
+Usage: python -m benchmarks.suite [--scale 10k 100k 1m] [--repeat 5]
+       [--output results.json] [--baseline previous.json]
+"""
+
+import argparse
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import sqlalchemy
+from sqlalchemy import delete, func
+from sqlmodel import Session, select
+
+from app.crumbs import create_crumb
+from app.loading import apply_profile
+from app.models import Crumb, CrumbCreate, CrumbPublic, CrumbTag, Tag, TagCreate
+from app.serialize import crumb_row, encode_crumb
+from app.stream import encode_cursor, get_stream_page
+from app.tag_filter import TagFilter, filter_crumbs
+from app.units import list_unit_summaries
+from benchmarks.common import sample, temp_engine
+from benchmarks.datagen import SCALES, DataSpec, populate
+
+# Flag medians at least this much slower than the baseline
+REGRESSION_RATIO = 1.2
+
+
+def _result(scale: str, name: str, samples: List[float], **extra) -> dict:
+    return {
+        "scale": scale,
+        "name": name,
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "repeat": len(samples),
+        **extra,
+    }
+
+
+def _read_benchmarks(session: Session, spec: DataSpec) -> Dict[str, Callable[[], object]]:
+    middle = session.get(Crumb, spec.crumbs // 2)
+    middle_cursor = encode_cursor(middle.created_at, middle.id)
+    rare = [f"tag-{spec.tags // 2}", f"tag-{spec.tags - 1}"]
+    window = session.exec(
+        apply_profile(select(Crumb).order_by(Crumb.id).limit(500), "stream")
+    ).all()
+
+    def walk_pages(pages: int = 20):
+        cursor = None
+        for _ in range(pages):
+            cursor = get_stream_page(session, cursor, limit=50).next_cursor
+
+    return {
+        "stream.first_page": lambda: get_stream_page(session, limit=50),
+        "stream.middle_page": lambda: get_stream_page(session, middle_cursor, limit=50),
+        "stream.published_page": lambda: get_stream_page(
+            session, middle_cursor, limit=50, published_only=True
+        ),
+        "stream.walk_20_pages": walk_pages,
+        "tag_filter.common_and": lambda: filter_crumbs(
+            session, TagFilter(all_of=["tag-1", "tag-2"]), limit=50
+        ),
+        "tag_filter.common_and_rare": lambda: filter_crumbs(
+            session, TagFilter(all_of=["tag-1", rare[0]]), limit=50
+        ),
+        "tag_filter.rare_or": lambda: filter_crumbs(session, TagFilter(any_of=rare), limit=50),
+        "units.summaries": lambda: list_unit_summaries(session),
+        "serialize.crumb_public_500": lambda: [
+            CrumbPublic.model_validate(crumb).model_dump_json() for crumb in window
+        ],
+        "serialize.crumb_rows_500": lambda: [encode_crumb(crumb_row(crumb)) for crumb in window],
+    }
+
+
+def _run_scale(scale: str, repeat: int) -> List[dict]:
+    spec = DataSpec.for_scale(scale)
+    results = []
+    with temp_engine(tuned=True) as engine:
+        started = time.perf_counter()
+        crumbs, links = populate(engine, spec)
+        elapsed = (time.perf_counter() - started) * 1000
+        results.append(_result(scale, "insert.bulk", [elapsed], rows=crumbs + links))
+
+        with Session(engine) as session:
+            for name, fn in _read_benchmarks(session, spec).items():
+
+                def run():
+                    fn()
+                    session.expunge_all()
+
+                run()  # warm the page cache and the statement cache
+                results.append(_result(scale, name, sample(run, repeat)))
+
+            tags = [TagCreate(name=f"tag-{rank}") for rank in (1, 2, 3, spec.tags // 2)]
+            batch = iter(range(repeat))
+
+            def insert_orm(count: int = 100):
+                offset = next(batch) * count
+                for i in range(count):
+                    create_crumb(
+                        session,
+                        CrumbCreate(
+                            body_md=f"benchmark crumb {offset + i}",
+                            unit_name="unit 1",
+                            tags=tags[: i % len(tags) + 1],
+                        ),
+                    )
+                session.commit()
+                session.expunge_all()
+
+            results.append(_result(scale, "insert.orm_100", sample(insert_orm, repeat)))
+
+            # Each run deletes different rows; the links go with them through ON DELETE CASCADE
+            crumb_batches = iter(range(repeat))
+
+            def delete_crumbs(count: int = 100):
+                first = next(crumb_batches) * count + 1
+                session.exec(delete(Crumb).where(Crumb.id.between(first, first + count - 1)))
+                session.commit()
+
+            results.append(_result(scale, "delete.crumbs_100", sample(delete_crumbs, repeat)))
+
+            tag_ranks = iter(range(10, 10 + repeat))
+
+            def delete_tag():
+                name = f"tag-{next(tag_ranks)}"
+                session.exec(delete(Tag).where(Tag.name == name))
+                session.commit()
+
+            links = session.exec(
+                select(func.count()).select_from(CrumbTag).join(Tag).where(Tag.name == "tag-10")
+            ).one()
+            results.append(_result(scale, "delete.tag", sample(delete_tag, repeat), links=links))
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _meta() -> dict:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "sqlalchemy": sqlalchemy.__version__,
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def compare(results: List[dict], baseline: List[dict]) -> List[str]:
+    """One line per benchmark present in both runs: old and new medians and their ratio."""
+    previous = {(r["scale"], r["name"]): r["median_ms"] for r in baseline}
+    lines = []
+    for result in results:
+        old = previous.get((result["scale"], result["name"]))
+        if not old:
+            continue
+        ratio = result["median_ms"] / old
+        flag = "  REGRESSION" if ratio >= REGRESSION_RATIO else ""
+        lines.append(
+            f"{result['scale']:>5} {result['name']:<28} {old:10.2f} -> "
+            f"{result['median_ms']:10.2f} ms  x{ratio:5.2f}{flag}"
+        )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", nargs="+", choices=SCALES, default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="an earlier --output file to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for scale in args.scale:
+        for result in _run_scale(scale, args.repeat):
+            print(f"{scale:>5} {result['name']:<28} {result['median_ms']:10.2f} ms")
+            results.append(result)
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": _meta(), "results": results}, f, indent=2)
+    print(f"wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\ncompared with {args.baseline} ({baseline['meta'].get('commit')})")
+        print("\n".join(compare(results, baseline["results"])))
+
+
+if __name__ == "__main__":
+    main()
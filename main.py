@@ -1,5 +1,165 @@
-def main():
-    print("Hello from breadcrumbs!")
+import argparse
+import sys
+
+
+def rebuild_tag_stats_command(args: argparse.Namespace) -> None:
+    from app.db import default_session_factory
+    from app.tag_stats import rebuild_tag_stats
+
+    with default_session_factory.managed_session() as session:
+        tags = rebuild_tag_stats(session)
+    print(f"Rebuilt tag_stats for {tags} tags")
+
+
+def install_data_version_command(args: argparse.Namespace) -> None:
+    from app.db import default_session_factory
+    from app.http_cache import install_data_version
+
+    with default_session_factory.managed_session() as session:
+        install_data_version(session)
+    print("Installed the data_version table and triggers")
+
+
+def export_command(args: argparse.Namespace) -> None:
+    from app.db import default_session_factory
+    from app.export import export_crumbs
+
+    with default_session_factory.managed_session() as session:
+        for piece in export_crumbs(session, args.format, args.chunk_size):
+            args.output.write(piece)
+    args.output.flush()
+
+
+def import_command(args: argparse.Namespace) -> None:
+    from app.db import default_session_factory
+    from app.restore import read_ndjson, restore_crumbs
+
+    with args.file:
+        report = restore_crumbs(
+            default_session_factory, read_ndjson(args.file), batch_size=args.batch_size
+        )
+    print(
+        f"Imported {report.crumbs} crumbs ({report.skipped} already present) "
+        f"in {report.batches} batches, {report.seconds:.1f}s"
+    )
+
+
+def archive_command(args: argparse.Namespace) -> None:
+    from datetime import timedelta
+
+    from app.archive import archive_bodies
+    from app.db import default_session_factory
+
+    report = archive_bodies(
+        default_session_factory,
+        timedelta(days=args.older_than_days),
+        batch_size=args.batch_size,
+        use_dictionary=not args.no_dictionary,
+        vacuum=args.vacuum,
+    )
+    print(
+        f"Archived {report.crumbs} crumb bodies ({report.skipped} too small to compress) "
+        f"in {report.batches} batches, {report.seconds:.1f}s: "
+        f"{report.bytes_before:,} -> {report.bytes_after:,} bytes ({report.ratio:.0%})"
+    )
+
+
+def advise_indexes_command(args: argparse.Namespace) -> None:
+    import app.models  # noqa: F401  registers every table on the metadata
+    from app.index_advisor import find_missing_fk_indexes, reflect_database, render_migration
+
+    if args.database:
+        from app.db import engine
+
+        missing = find_missing_fk_indexes(reflect_database(engine))
+    else:
+        missing = find_missing_fk_indexes()
+    for finding in missing:
+        print(finding)
+    if not missing:
+        print("Every foreign key has a supporting index")
+    if args.migration:
+        with open(args.migration, "w", encoding="utf-8") as f:
+            f.write(render_migration(missing, down_revision=args.down_revision))
+        print(f"Wrote {args.migration}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="breadcrumbs")
+    commands = parser.add_subparsers(dest="command")
+
+    rebuild = commands.add_parser(
+        "rebuild-tag-stats", help="Recompute the tag_stats aggregate from scratch"
+    )
+    rebuild.set_defaults(handler=rebuild_tag_stats_command)
+
+    install = commands.add_parser(
+        "install-data-version",
+        help="Add the change counter behind HTTP ETags to a database created without it",
+    )
+    install.set_defaults(handler=install_data_version_command)
+
+    export = commands.add_parser("export", help="Stream every crumb as NDJSON or a JSON array")
+    export.add_argument("--format", choices=["ndjson", "json"], default="ndjson")
+    export.add_argument("--chunk-size", type=int, default=500, help="Rows fetched per round trip")
+    export.add_argument(
+        "-o",
+        "--output",
+        type=argparse.FileType("w", encoding="utf-8"),
+        default=sys.stdout,
+        help="File to write to (default: stdout)",
+    )
+    export.set_defaults(handler=export_command)
+
+    restore = commands.add_parser("import", help="Restore crumbs from an NDJSON export")
+    restore.add_argument(
+        "file", type=argparse.FileType("r", encoding="utf-8"), help="NDJSON file, or - for stdin"
+    )
+    restore.add_argument(
+        "--batch-size", type=int, default=1000, help="Crumbs written per transaction"
+    )
+    restore.set_defaults(handler=import_command)
+
+    archive = commands.add_parser(
+        "archive", help="Compress the bodies of old crumbs in place (SQLite)"
+    )
+    archive.add_argument(
+        "--older-than-days", type=float, default=90, help="Archive crumbs created before this"
+    )
+    archive.add_argument(
+        "--batch-size", type=int, default=1000, help="Crumbs rewritten per transaction"
+    )
+    archive.add_argument(
+        "--no-dictionary", action="store_true", help="Compress without the markdown dictionary"
+    )
+    archive.add_argument(
+        "--vacuum", action="store_true", help="VACUUM afterwards to return the space to the OS"
+    )
+    archive.set_defaults(handler=archive_command)
+
+    advise = commands.add_parser(
+        "advise-indexes", help="Report foreign keys that have no supporting index"
+    )
+    advise.add_argument(
+        "--database",
+        action="store_true",
+        help="Check the configured database's actual schema instead of the models",
+    )
+    advise.add_argument("--migration", help="Write an Alembic revision creating the indexes")
+    advise.add_argument("--down-revision", help="Revision the generated migration follows")
+    advise.set_defaults(handler=advise_indexes_command)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        print("Hello from breadcrumbs!")
+        parser.print_help()
+        return
+    args.handler(args)
 
 
 if __name__ == "__main__":
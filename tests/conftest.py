@@ -1,12 +1,21 @@
 """Pytest configuration and fixtures for breadcrumbs tests."""
 
 import os
+from contextlib import contextmanager
+
+import httpx
 import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, SQLModel, create_engine
 from sqlmodel.pool import StaticPool
 
 # Import models to ensure they're registered before creating tables
 from app.models import Crumb, Tag, Unit, CrumbTag
+from app.api import app, get_admin_token
+from app.db import AsyncSessionFactory, get_async_session_factory
+from app.instrumentation import query_budget
 
 
 @pytest.fixture(name="session")
@@ -32,3 +41,96 @@ def session_fixture():
     # closed or at least at the fixture end when the engine is
     # garbage collected
     SQLModel.metadata.drop_all(engine)
+
+
+@pytest.fixture(name="query_budget")
+def query_budget_fixture():
+    """Assert how many statements a block may issue on a session.
+
+    Usage: ``with query_budget(session, 2): get_stream_page(session)``
+    """
+    return query_budget
+
+
+@contextmanager
+def count_statements(session: Session):
+    """Count SQL statements issued on the session's engine."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = session.get_bind()
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture(name="count_statements")
+def count_statements_fixture():
+    """Collect the SQL a block issues on a session's engine.
+
+    Usage: ``with count_statements(session) as statements: ...``
+    """
+    return count_statements
+
+
+@pytest.fixture(name="api_seed")
+def api_seed_fixture():
+    """Seed for the ``api_factory`` database: a function of a sync Session, or None.
+
+    Override it in a test module to give the API some data.
+    """
+    return None
+
+
+@pytest_asyncio.fixture(name="api_factory")
+async def api_factory_fixture(request, api_seed, tmp_path):
+    """Point the API at a fresh aiosqlite database, seeded by ``api_seed``.
+
+    The database lives in memory; parametrize indirectly with ``"file"`` to put
+    it in a temporary file that other engines can open too. Yields the
+    AsyncSessionFactory the API's requests use.
+    """
+    if getattr(request, "param", "memory") == "file":
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'api.sqlite'}")
+    else:
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    if api_seed is not None:
+        async with engine.connect() as conn:
+            await conn.run_sync(lambda sync_conn: api_seed(Session(sync_conn)))
+            await conn.commit()
+    factory = AsyncSessionFactory(engine)
+    app.dependency_overrides[get_async_session_factory] = lambda: factory
+    yield factory
+    app.dependency_overrides.clear()
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture(name="client")
+async def client_fixture(api_factory):
+    """An httpx client for the API over the ``api_factory`` database."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+@pytest_asyncio.fixture(name="admin_client")
+async def admin_client_fixture(api_factory):
+    """Like ``client``, but authenticated for the private routes (/api/all, /api/metrics)."""
+    app.dependency_overrides[get_admin_token] = lambda: "test-token"
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test",
+        headers={"Authorization": "Bearer test-token"},
+    ) as client:
+        yield client
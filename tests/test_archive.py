@@ -0,0 +1,130 @@
+"""Tests for archiving old crumb bodies as compressed BLOBs."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, text
+
+from app.archive import archive_bodies
+from app.compression import RAW, compress_text, decompress_text
+from app.db import SessionFactory
+from app.models import Crumb, Tag
+from app.search import rebuild_search_index, search_crumbs
+from app.stream import get_stream_page, get_stream_page_json
+
+NOW = datetime(2025, 6, 1)
+LONG_BODY = "## Notes\n\n" + "Learned how sqlite stores text and blobs. " * 10
+
+
+@pytest.fixture(name="factory")
+def factory_fixture(session: Session):
+    return SessionFactory(session.get_bind())
+
+
+def _seed(session: Session) -> list:
+    old = Crumb(
+        body_md=LONG_BODY + "old",
+        created_at=NOW - timedelta(days=400),
+        updated_at=NOW - timedelta(days=300),
+        tags=[Tag(name="sqlite")],
+    )
+    tiny = Crumb(body_md="hi", created_at=NOW - timedelta(days=400))
+    recent = Crumb(body_md=LONG_BODY + "recent", created_at=NOW - timedelta(days=1))
+    session.add_all([old, tiny, recent])
+    session.commit()
+    return [old.id, tiny.id, recent.id]
+
+
+def _storage(session: Session) -> dict:
+    rows = session.execute(text("SELECT id, typeof(body_md) FROM crumb")).all()
+    return dict(rows)
+
+
+@pytest.mark.parametrize("use_dictionary", [True, False])
+def test_compression_round_trip(use_dictionary):
+    """Test that compressed bodies decompress to the same text."""
+    body = LONG_BODY + " ünïcode ✓"
+    data = compress_text(body, use_dictionary)
+    assert len(data) < len(body.encode())
+    assert (data[0] == RAW) is not use_dictionary
+    assert decompress_text(data) == body
+
+
+def test_archives_only_old_bodies_that_shrink(session: Session, factory: SessionFactory):
+    """Test that old bodies become BLOBs while recent and tiny ones stay text."""
+    old, tiny, recent = _seed(session)
+
+    report = archive_bodies(factory, timedelta(days=90), batch_size=1, now=NOW)
+
+    assert (report.crumbs, report.skipped, report.batches) == (1, 1, 2)
+    assert report.bytes_after < report.bytes_before
+    assert _storage(session) == {old: "blob", tiny: "text", recent: "text"}
+    assert archive_bodies(factory, timedelta(days=90), now=NOW).crumbs == 0
+
+
+def test_archived_bodies_read_transparently(session: Session, factory: SessionFactory):
+    """Test that the ORM, the row serializer and search all see the original text."""
+    old, _, _ = _seed(session)
+    updated_at = session.get(Crumb, old).updated_at
+    archive_bodies(factory, timedelta(days=90), now=NOW)
+    session.expire_all()
+
+    crumb = session.get(Crumb, old)
+    assert crumb.body_md == LONG_BODY + "old"
+    assert crumb.updated_at == updated_at
+    assert {c.id: c.body_md for c in get_stream_page(session).items}[old] == LONG_BODY + "old"
+    page = json.loads(get_stream_page_json(session))
+    assert {c["id"]: c["body_md"] for c in page["items"]}[old] == LONG_BODY + "old"
+    assert [c.id for c in search_crumbs(session, "old")] == [old]
+
+    rebuild_search_index(session)
+    assert [c.id for c in search_crumbs(session, "old")] == [old]
+
+
+def test_editing_an_archived_body_stores_text(session: Session, factory: SessionFactory):
+    """Test that an edit replaces the BLOB with plain text and reindexes it."""
+    old, _, _ = _seed(session)
+    archive_bodies(factory, timedelta(days=90), now=NOW)
+    session.expire_all()
+
+    crumb = session.get(Crumb, old)
+    crumb.body_md = "rewritten entirely"
+    session.add(crumb)
+    session.commit()
+
+    assert _storage(session)[old] == "text"
+    assert [c.id for c in search_crumbs(session, "rewritten")] == [old]
+    assert search_crumbs(session, "old") == []
+
+
+def test_upgrades_an_old_search_trigger(session: Session, factory: SessionFactory):
+    """Test that a pre-archive update trigger is replaced before bodies are rewritten."""
+    old, _, _ = _seed(session)
+    session.execute(text("DROP TRIGGER crumb_fts_au"))
+    session.execute(
+        text(
+            """CREATE TRIGGER crumb_fts_au AFTER UPDATE OF body_md ON crumb BEGIN
+            DELETE FROM crumb_fts WHERE rowid = old.id;
+            INSERT INTO crumb_fts (rowid, body_md) VALUES (new.id, new.body_md);
+            END"""
+        )
+    )
+    session.commit()
+
+    archive_bodies(factory, timedelta(days=90), now=NOW)
+
+    assert [c.id for c in search_crumbs(session, "old")] == [old]
+
+
+def test_creates_a_filled_index_when_search_is_missing(session: Session, factory: SessionFactory):
+    """Test that archiving a database without crumb_fts indexes the existing bodies."""
+    old, _, recent = _seed(session)
+    for trigger in ("crumb_fts_ai", "crumb_fts_ad", "crumb_fts_au"):
+        session.execute(text(f"DROP TRIGGER {trigger}"))
+    session.execute(text("DROP TABLE crumb_fts"))
+    session.commit()
+
+    archive_bodies(factory, timedelta(days=90), now=NOW)
+
+    assert [c.id for c in search_crumbs(session, "old")] == [old]
+    assert [c.id for c in search_crumbs(session, "recent")] == [recent]
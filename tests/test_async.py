@@ -0,0 +1,89 @@
+"""Tests for the async engine, session factory and queries."""
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, select
+from sqlmodel.pool import StaticPool
+
+from app.db import AsyncSessionFactory, EngineSettings
+from app.models import Crumb, Tag
+from app.search import search_crumbs_async
+from app.stream import get_stream_page_async
+from app.tags import get_tag_by_name_async, list_tags_async
+
+
+@pytest_asyncio.fixture(name="session_factory")
+async def session_factory_fixture():
+    """An AsyncSessionFactory over a fresh in-memory aiosqlite database."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield AsyncSessionFactory(engine)
+    await engine.dispose()
+
+
+def test_async_url():
+    """Test that sync URLs map onto their asyncio drivers."""
+    assert EngineSettings(url="sqlite:///x.sqlite").async_url == "sqlite+aiosqlite:///x.sqlite"
+    assert (
+        EngineSettings(url="postgresql://u:p@db/breadcrumbs").async_url
+        == "postgresql+asyncpg://u:p@db/breadcrumbs"
+    )
+    with pytest.raises(ValueError):
+        EngineSettings(url="mysql://db/breadcrumbs").async_url
+
+
+@pytest.mark.asyncio
+async def test_managed_session_commits(session_factory):
+    """Test that a managed session commits on success."""
+    async with session_factory.managed_session() as session:
+        session.add(Crumb(body_md="async crumb"))
+
+    async with session_factory.managed_session() as session:
+        crumbs = (await session.exec(select(Crumb))).all()
+    assert [c.body_md for c in crumbs] == ["async crumb"]
+    assert session_factory.metrics().open_sessions == 0
+
+
+@pytest.mark.asyncio
+async def test_managed_session_rolls_back(session_factory):
+    """Test that a managed session rolls back when the block raises."""
+    with pytest.raises(RuntimeError):
+        async with session_factory.managed_session() as session:
+            session.add(Crumb(body_md="never saved"))
+            await session.flush()
+            raise RuntimeError("boom")
+
+    async with session_factory.managed_session() as session:
+        assert (await session.exec(select(Crumb))).all() == []
+
+
+@pytest.mark.asyncio
+async def test_async_queries(session_factory):
+    """Test the async stream, search and tag queries."""
+    async with session_factory.managed_session() as session:
+        tag = Tag(name="python")
+        session.add_all(
+            [Crumb(body_md=f"async note {i}", tags=[tag]) for i in range(3)]
+        )
+
+    async with session_factory.managed_session() as session:
+        first = await get_stream_page_async(session, limit=2)
+        second = await get_stream_page_async(session, cursor=first.next_cursor, limit=2)
+        found = await search_crumbs_async(session, "note")
+        tag = await get_tag_by_name_async(session, "Python")
+        tags = await list_tags_async(session)
+
+    assert [c.body_md for c in first.items + second.items] == [
+        "async note 0",
+        "async note 1",
+        "async note 2",
+    ]
+    assert first.items[0].tags[0].name == "python"
+    assert len(found) == 3
+    assert tag.name == "python"
+    assert [t.name for t in tags] == ["python"]
@@ -0,0 +1,185 @@
+"""Tests for engine configuration and session management."""
+import ast
+import gc
+import os
+import subprocess
+import sys
+import tracemalloc
+import weakref
+
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, create_engine, select, text
+from sqlmodel.pool import StaticPool
+
+from app.db import EngineSettings, SessionFactory, create_configured_engine
+from app.models import Crumb, Unit
+
+
+def test_settings_from_env(monkeypatch):
+    """Test that settings are read from environment variables."""
+    monkeypatch.setenv("DATABASE_URL", "postgresql://localhost/breadcrumbs")
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "250")
+
+    settings = EngineSettings.from_env()
+
+    assert settings.url == "postgresql://localhost/breadcrumbs"
+    assert settings.pool_size == 20
+    assert settings.pool_pre_ping is False
+    assert settings.sqlite_busy_timeout_ms == 250
+    assert not settings.is_sqlite
+
+
+def test_server_engine_kwargs_include_pool_settings():
+    """Test that non-SQLite engines get explicit pool settings."""
+    settings = EngineSettings(url="postgresql://localhost/breadcrumbs", pool_recycle=60)
+
+    kwargs = settings.engine_kwargs()
+
+    assert kwargs["pool_recycle"] == 60
+    assert kwargs["pool_pre_ping"] is True
+    assert {"pool_size", "max_overflow", "pool_timeout"} <= kwargs.keys()
+
+
+def test_sqlite_pragmas_applied_on_connect(tmp_path):
+    """Test that every SQLite connection is tuned on connect."""
+    settings = EngineSettings(
+        url=f"sqlite:///{tmp_path / 'tuned.sqlite'}", sqlite_busy_timeout_ms=1234
+    )
+    engine = create_configured_engine(settings)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+        assert conn.execute(text("PRAGMA cache_size")).scalar() == settings.sqlite_cache_size
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+    engine.dispose()
+
+
+def test_sqlite_foreign_keys_restrict_unit_deletes(tmp_path):
+    """Test what foreign_keys = ON changes: a unit with crumbs needs the ORM to delete it."""
+    url = f"sqlite:///{tmp_path / 'fk.sqlite'}"
+    engine = create_configured_engine(EngineSettings(url=url))
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all([Crumb(body_md="kept", unit=Unit(name="a")), Unit(name="b")])
+        session.commit()
+        with pytest.raises(IntegrityError):
+            session.execute(delete(Unit).where(Unit.name == "a"))
+        session.rollback()
+
+        session.delete(session.exec(select(Unit).where(Unit.name == "a")).one())
+        session.execute(delete(Unit).where(Unit.name == "b"))
+        session.commit()
+        assert session.exec(select(Crumb.unit_id)).all() == [None]
+    engine.dispose()
+
+    engine = create_configured_engine(EngineSettings(url=url, sqlite_foreign_keys=False))
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 0
+    engine.dispose()
+
+
+@pytest.fixture(name="factory")
+def factory_fixture():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield SessionFactory(engine)
+    engine.dispose()
+
+
+def test_managed_session_is_untracked_after_exit(factory):
+    """Test that a managed session is closed and forgotten on exit."""
+    with factory.managed_session() as session:
+        session.add(Crumb(body_md="tracked"))
+        assert factory.metrics().open_sessions == 1
+
+    metrics = factory.metrics()
+    assert metrics.open_sessions == 0
+    assert metrics.created == metrics.closed == 1
+    assert metrics.average_lifetime >= 0
+
+
+def test_unclosed_sessions_are_not_pinned(factory):
+    """Test that tracking does not keep abandoned sessions alive."""
+    session = factory.create_session()
+    session.add(Crumb(body_md="abandoned"))
+    session.flush()
+    ref = weakref.ref(session)
+
+    del session
+    gc.collect()
+
+    assert ref() is None
+    assert factory.metrics().open_sessions == 0
+    assert factory.metrics().leaked == 1
+
+
+def test_peak_and_close_all(factory):
+    """Test peak tracking and explicitly closing every open session."""
+    sessions = [factory.create_session() for _ in range(3)]
+    sessions[0].close()
+
+    factory.close_all_sessions()
+
+    metrics = factory.metrics()
+    assert metrics.peak_sessions == 3
+    assert metrics.open_sessions == 0
+    assert metrics.closed == 3
+    assert metrics.leaked == 0
+
+
+def test_session_memory_stays_flat(factory):
+    """Soak: memory must not grow with the number of sessions opened."""
+
+    def churn(count):
+        for i in range(count):
+            if i % 2:
+                with factory.managed_session():
+                    pass
+            else:
+                factory.create_session()  # never closed
+
+    churn(2_000)  # warm caches before measuring
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    churn(10_000)
+    gc.collect()
+    growth = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    assert factory.metrics().open_sessions == 0
+    assert growth < 256 * 1024
+
+
+def test_create_all_installs_database_side_schema():
+    """Test that the FTS table and triggers come with the models alone, whatever else is imported."""
+    script = (
+        "from sqlmodel import SQLModel, create_engine, text\n"
+        "import app.models\n"
+        "engine = create_engine('sqlite://')\n"
+        "SQLModel.metadata.create_all(engine)\n"
+        "with engine.connect() as conn:\n"
+        "    print(sorted(conn.execute(text(\"SELECT name FROM sqlite_master \"\n"
+        "        \"WHERE type = 'trigger' OR name = 'crumb_fts'\")).scalars()))\n"
+    )
+    # A fresh interpreter: pytest has already imported every module in this one
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    names = ast.literal_eval(output)
+    assert "crumb_fts" in names
+    assert {"crumb_fts_ai", "crumb_fts_au", "tag_stats_link_ai", "tag_stats_crumb_bd"} <= set(names)
@@ -0,0 +1,117 @@
+"""Tests for the streaming NDJSON / JSON-array export."""
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from sqlmodel import Session, select
+
+from app.export import export_crumbs, iter_crumb_chunks
+from app.models import Crumb, Tag, Unit, Visibility
+from app.stream import get_stream_page
+
+
+def _add_crumbs(session: Session, count: int):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    unit = Unit(name="Week 1")
+    tags = [Tag(name="python"), Tag(name="sql")]
+    for i in range(count):
+        session.add(
+            Crumb(
+                body_md=f"crumb {i}",
+                created_at=start + timedelta(minutes=count - i),
+                unit=unit if i % 2 else None,
+                tags=tags[: i % 3],
+            )
+        )
+    session.commit()
+
+
+def test_ndjson_matches_the_stream(session: Session):
+    """Test that NDJSON export yields every crumb in stream order, with unit and tags."""
+    _add_crumbs(session, 7)
+    lines = "".join(export_crumbs(session, "ndjson", chunk_size=3)).splitlines()
+
+    expected = get_stream_page(session, limit=100).items
+    assert [json.loads(line) for line in lines] == [
+        json.loads(crumb.model_dump_json()) for crumb in expected
+    ]
+    assert json.loads(lines[-1])["body_md"] == "crumb 0"
+    assert {tag["name"] for line in lines for tag in json.loads(line)["tags"]} == {
+        "python",
+        "sql",
+    }
+
+
+def test_json_array(session: Session):
+    """Test that the JSON format is one parseable array."""
+    _add_crumbs(session, 5)
+    records = json.loads("".join(export_crumbs(session, "json", chunk_size=2)))
+    assert len(records) == 5
+    assert records[0]["body_md"] == "crumb 4"
+
+
+def test_empty_export(session: Session):
+    """Test that an empty table exports as nothing or as an empty array."""
+    assert "".join(export_crumbs(session, "ndjson")) == ""
+    assert json.loads("".join(export_crumbs(session, "json"))) == []
+
+
+def test_unknown_format(session: Session):
+    """Test that an unknown format is rejected before anything is read."""
+    with pytest.raises(ValueError):
+        export_crumbs(session, "xml")
+
+
+def test_chunks_are_released(session: Session):
+    """Test that each chunk is detached from the session once it is serialized."""
+    _add_crumbs(session, 10)
+    session.expunge_all()
+
+    sizes = []
+    for chunk in iter_crumb_chunks(session, chunk_size=4):
+        sizes.append(len(chunk))
+        # Only the chunk being serialized (plus its unit and tags) is held
+        assert len(session.identity_map) <= 4 + 1 + 2
+    assert sizes == [4, 4, 2]
+    assert len(session.identity_map) == 0
+
+
+def _seed(session: Session):
+    _add_crumbs(session, 6)
+    # Everything but the newest crumb is published
+    for crumb in session.exec(select(Crumb).where(Crumb.body_md != "crumb 0")):
+        crumb.visibility = Visibility.published
+    session.commit()
+
+
+@pytest.fixture(name="api_seed")
+def api_seed_fixture():
+    return _seed
+
+
+@pytest.mark.asyncio
+async def test_http_export_ndjson(client: httpx.AsyncClient):
+    """Test that /api/export streams the published crumbs as NDJSON records."""
+    response = await client.get("/api/export", params={"chunk_size": 4})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["body_md"] for r in records] == [f"crumb {i}" for i in reversed(range(1, 6))]
+
+
+@pytest.mark.asyncio
+async def test_http_export_with_drafts(admin_client: httpx.AsyncClient):
+    """Test that drafts are exported only by the separate /api/all route."""
+    response = await admin_client.get("/api/all/export")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["body_md"] for r in records] == [f"crumb {i}" for i in reversed(range(6))]
+
+
+@pytest.mark.asyncio
+async def test_http_export_json(client: httpx.AsyncClient):
+    """Test that /api/export?format=json streams one JSON array."""
+    response = await client.get("/api/export", params={"format": "json"})
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert (await client.get("/api/export", params={"format": "xml"})).status_code == 422
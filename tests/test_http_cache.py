@@ -0,0 +1,262 @@
+"""Tests for conditional GET and the serialized page cache."""
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import event, text
+from sqlmodel import Session, create_engine, select
+
+from app.api import app, get_admin_token
+from app.db import AsyncSessionFactory
+from app.http_cache import get_response_cache, install_data_version
+from app.ingest import bulk_ingest
+from app.models import (
+    Crumb,
+    CrumbCreate,
+    CrumbTag,
+    DataVersion,
+    Tag,
+    TagCreate,
+    Unit,
+    Visibility,
+)
+
+
+def _seed(session: Session):
+    start = datetime(2024, 1, 1)
+    unit = Unit(name="Week 1")
+    python = Tag(name="python")
+    for i in range(5):
+        session.add(
+            Crumb(
+                body_md=f"crumb {i}",
+                created_at=start + timedelta(minutes=i),
+                unit=unit if i < 3 else None,
+                tags=[python] if i % 2 else [],
+                # Only the newest crumb is a draft
+                visibility=Visibility.published if i < 4 else Visibility.draft,
+            )
+        )
+    session.add(Tag(name="unused"))
+    session.commit()
+
+
+@pytest.fixture(name="api_seed")
+def api_seed_fixture():
+    return _seed
+
+
+@pytest.mark.asyncio
+async def test_etag_round_trip(client: httpx.AsyncClient, api_factory: AsyncSessionFactory):
+    """Test that a matching If-None-Match gets a bodyless 304 after one aggregate query."""
+    first = await client.get("/api/crumbs", params={"limit": 2})
+    assert first.status_code == 200
+    assert [c["body_md"] for c in first.json()["items"]] == ["crumb 0", "crumb 1"]
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"]
+
+    statements = []
+    engine = api_factory.engine.sync_engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        second = await client.get(
+            "/api/crumbs", params={"limit": 2}, headers={"If-None-Match": etag}
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 1 and "count(" in selects[0]
+
+
+@pytest.mark.asyncio
+async def test_repeat_requests_hit_the_page_cache(
+    client: httpx.AsyncClient, api_factory: AsyncSessionFactory
+):
+    """Test that an unconditional repeat is served from the serialized cache."""
+    first = await client.get("/api/crumbs")
+    second = await client.get("/api/crumbs")
+    assert second.content == first.content
+    async with api_factory.managed_session() as session:
+        stats = get_response_cache(session).stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_edits_change_the_etag(
+    client: httpx.AsyncClient, api_factory: AsyncSessionFactory
+):
+    """Test that editing a crumb in the window invalidates the cached page."""
+    first = await client.get("/api/crumbs")
+    async with api_factory.managed_session() as session:
+        crumb = await session.get(Crumb, 1)
+        crumb.body_md = "edited"
+
+    second = await client.get("/api/crumbs", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.headers["etag"] != first.headers["etag"]
+    assert second.json()["items"][0]["body_md"] == "edited"
+
+
+@pytest.mark.asyncio
+async def test_tag_renames_change_the_etag(
+    client: httpx.AsyncClient, api_factory: AsyncSessionFactory
+):
+    """Test that changes outside the crumb rows themselves still invalidate."""
+    first = await client.get("/api/crumbs")
+    async with api_factory.managed_session() as session:
+        tag = await session.get(Tag, 1)
+        tag.name = "python3"
+
+    second = await client.get("/api/crumbs", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert {t["name"] for c in second.json()["items"] for t in c["tags"]} == {"python3"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("api_factory", ["file"], indirect=True)
+async def test_writes_from_another_engine_change_the_etag(
+    client: httpx.AsyncClient, api_factory: AsyncSessionFactory
+):
+    """Test that a link added through a separate sync engine invalidates the page."""
+    first = await client.get("/api/crumbs")
+    engine = create_engine(api_factory.engine.url.set(drivername="sqlite"))
+    try:
+        with Session(engine) as session:
+            session.add(CrumbTag(crumb_id=1, tag_id=2))
+            session.commit()
+    finally:
+        engine.dispose()
+
+    second = await client.get("/api/crumbs", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert [t["name"] for t in second.json()["items"][0]["tags"]] == ["unused"]
+
+
+def test_install_data_version(session: Session):
+    """Test that the change counter can be added to a database created without it."""
+    connection = session.connection()
+    DataVersion.__table__.drop(connection)
+    # A per-row trigger from an earlier version of the schema
+    connection.exec_driver_sql(
+        "CREATE TRIGGER data_version_unit_i AFTER INSERT ON unit BEGIN SELECT 1; END"
+    )
+
+    install_data_version(session)
+    install_data_version(session)
+    session.commit()
+    assert "data_version_unit_i" not in session.exec(
+        text("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    ).scalars().all()
+    session.add(Unit(name="Week 1"))
+    session.commit()
+    assert session.exec(select(DataVersion.version)).one() == 1
+
+
+def test_data_version_bumps_once_per_transaction(session: Session):
+    """Test that a bulk write of many links and tags costs one bump, and reads none."""
+    payloads = [
+        CrumbCreate(body_md=f"crumb {i}", tags=[TagCreate(name=f"tag-{i % 7}")], unit_name="Week")
+        for i in range(50)
+    ]
+    bulk_ingest(session, payloads, chunk_size=10)
+    session.commit()
+    assert session.exec(select(DataVersion.version)).one() == 1
+
+    session.exec(select(Crumb)).all()
+    session.commit()
+    assert session.exec(select(DataVersion.version)).one() == 1
+
+
+@pytest.mark.asyncio
+async def test_if_modified_since(client: httpx.AsyncClient):
+    """Test that If-Modified-Since is honoured when no If-None-Match is sent."""
+    first = await client.get("/api/crumbs")
+    since = first.headers["last-modified"]
+    second = await client.get("/api/crumbs", headers={"If-Modified-Since": since})
+    assert second.status_code == 304
+    older = "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert (await client.get("/api/crumbs", headers={"If-Modified-Since": older})).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_tag_and_unit_endpoints(client: httpx.AsyncClient):
+    """Test the tag and unit pages and their conditional requests."""
+    tagged = await client.get("/api/tags/Python/crumbs")
+    assert [c["body_md"] for c in tagged.json()["items"]] == ["crumb 1", "crumb 3"]
+    again = await client.get(
+        "/api/tags/python/crumbs", headers={"If-None-Match": tagged.headers["etag"]}
+    )
+    assert again.status_code == 304
+
+    unit = await client.get("/api/units/1")
+    assert unit.json()["name"] == "Week 1"
+    assert [c["body_md"] for c in unit.json()["crumbs"]] == ["crumb 0", "crumb 1", "crumb 2"]
+    again = await client.get("/api/units/1", headers={"If-None-Match": unit.headers["etag"]})
+    assert again.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_drafts_only_under_api_all(
+    client: httpx.AsyncClient, admin_client: httpx.AsyncClient, api_factory: AsyncSessionFactory
+):
+    """Test that the public routes hide drafts and the /api/all routes include them."""
+    async with api_factory.managed_session() as session:
+        session.add(Crumb(body_md="week 1 draft", created_at=datetime(2024, 1, 2), unit_id=1))
+        session.add(Crumb(body_md="week 2 draft", unit=Unit(name="Week 2")))
+
+    public = await client.get("/api/crumbs")
+    assert [c["body_md"] for c in public.json()["items"]] == [f"crumb {i}" for i in range(4)]
+    everything = await admin_client.get("/api/all/crumbs")
+    assert len(everything.json()["items"]) == 7
+    assert everything.headers["etag"] != public.headers["etag"]
+    assert len((await client.get("/api/months/2024/1")).json()) == 4
+    assert len((await admin_client.get("/api/all/months/2024/1")).json()) == 6
+
+    assert [u["name"] for u in (await client.get("/api/units")).json()] == ["Week 1"]
+    units = (await admin_client.get("/api/all/units")).json()
+    assert [u["crumb_count"] for u in units] == [4, 1]
+    unit = await client.get("/api/units/1")
+    assert [c["body_md"] for c in unit.json()["crumbs"]] == ["crumb 0", "crumb 1", "crumb 2"]
+    unit = await admin_client.get("/api/all/units/1")
+    assert unit.json()["crumbs"][-1]["body_md"] == "week 1 draft"
+    assert (await client.get("/api/units/2")).status_code == 404
+    assert (await admin_client.get("/api/all/units/2")).status_code == 200
+
+
+DRAFT_ROUTES = [
+    "/api/all/crumbs",
+    "/api/all/tags/python/crumbs",
+    "/api/all/months/2024/1",
+    "/api/all/units",
+    "/api/all/units/1",
+    "/api/all/export",
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", DRAFT_ROUTES)
+async def test_drafts_need_the_admin_token(client: httpx.AsyncClient, path: str):
+    """Test that anonymous and wrongly authenticated clients cannot reach /api/all."""
+    # No ADMIN_TOKEN configured: the private routes do not exist
+    assert (await client.get(path)).status_code == 404
+
+    app.dependency_overrides[get_admin_token] = lambda: "test-token"
+    anonymous = await client.get(path)
+    assert anonymous.status_code == 401
+    assert anonymous.headers["www-authenticate"] == "Bearer"
+    wrong = await client.get(path, headers={"Authorization": "Bearer guess"})
+    assert wrong.status_code == 401
+    right = await client.get(path, headers={"Authorization": "Bearer test-token"})
+    assert right.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_errors(client: httpx.AsyncClient):
+    """Test missing tags and units, and malformed cursors."""
+    assert (await client.get("/api/tags/nope/crumbs")).status_code == 404
+    assert (await client.get("/api/units/99")).status_code == 404
+    assert (await client.get("/api/crumbs", params={"cursor": "bad"})).status_code == 400
@@ -0,0 +1,162 @@
+"""Tests for the foreign-key index advisor and for full scans in the core queries."""
+from datetime import datetime, timedelta
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    MetaData,
+    Table,
+    create_engine,
+    delete,
+    inspect,
+    text,
+)
+from sqlmodel import Session, SQLModel, select
+
+from app.index_advisor import (
+    explain,
+    find_missing_fk_indexes,
+    full_scans,
+    reflect_database,
+    render_migration,
+)
+from app.models import Crumb, CrumbTag, Tag, Unit, Visibility
+from app.stream import encode_cursor, stream_statement
+from app.tag_filter import TagFilter, filter_statement, resolve_tags
+from app.tags import tag_by_name_statement
+
+
+def _legacy_metadata() -> MetaData:
+    """The shape of the schema before the foreign-key indexes were added."""
+    metadata = MetaData()
+    Table("unit", metadata, Column("id", Integer, primary_key=True))
+    Table("tag", metadata, Column("id", Integer, primary_key=True))
+    Table(
+        "crumb",
+        metadata,
+        Column("id", Integer, primary_key=True),
+        Column("unit_id", ForeignKey("unit.id")),
+        Column("visibility", Integer),
+        # Partial indexes do not serve every row, so they do not count
+        Index("idx_crumb_unit_partial", "unit_id", sqlite_where=text("visibility = 1")),
+    )
+    Table(
+        "crumbtag",
+        metadata,
+        Column("crumb_id", ForeignKey("crumb.id"), primary_key=True),
+        Column("tag_id", ForeignKey("tag.id"), primary_key=True),
+    )
+    return metadata
+
+
+def test_current_schema_has_no_unindexed_foreign_keys():
+    """Test that every foreign key in the models has a supporting index."""
+    assert find_missing_fk_indexes() == []
+
+
+def test_flags_unindexed_foreign_keys():
+    """Test that a bare FK and the second column of a composite PK are flagged."""
+    missing = find_missing_fk_indexes(_legacy_metadata())
+    assert [(m.table, list(m.columns), m.referred_table) for m in missing] == [
+        ("crumb", ["unit_id"], "unit"),
+        ("crumbtag", ["tag_id"], "tag"),
+    ]
+
+
+def test_advises_against_the_deployed_schema():
+    """Test that a reflected database reports the indexes it lacks, not the models'."""
+    engine = create_engine("sqlite://")
+    _legacy_metadata().create_all(engine)
+    missing = find_missing_fk_indexes(reflect_database(engine))
+    assert [(m.table, list(m.columns)) for m in missing] == [
+        ("crumb", ["unit_id"]),
+        ("crumbtag", ["tag_id"]),
+    ]
+
+    current = create_engine("sqlite://")
+    SQLModel.metadata.create_all(current)
+    assert find_missing_fk_indexes(reflect_database(current)) == []
+
+
+def test_rendered_migration_round_trips():
+    """Test that the generated Alembic revision creates and drops the indexes."""
+    metadata = _legacy_metadata()
+    source = render_migration(find_missing_fk_indexes(metadata), revision="abc123")
+    namespace = {}
+    exec(compile(source, "migration.py", "exec"), namespace)
+    assert namespace["revision"] == "abc123"
+
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        with Operations.context(MigrationContext.configure(conn)):
+            namespace["upgrade"]()
+        reflected = MetaData()
+        reflected.reflect(conn)
+        assert find_missing_fk_indexes(reflected) == []
+
+        with Operations.context(MigrationContext.configure(conn)):
+            namespace["downgrade"]()
+        names = {index["name"] for index in inspect(conn).get_indexes("crumbtag")}
+        assert "idx_crumbtag_tag_id" not in names
+
+
+def test_full_scans_parses_both_dialects():
+    """Test recognising full scans in SQLite and PostgreSQL plans."""
+    assert full_scans(["SCAN crumb", "SCAN crumb USING INDEX idx_crumb_created_at_id"]) == [
+        "crumb"
+    ]
+    assert full_scans(["SEARCH tag USING INDEX uq_tag_name_lower_idx (<expr>=?)"]) == []
+    assert full_scans(["Limit  (cost=0.00..1.00)", "  ->  Seq Scan on crumbtag"]) == [
+        "crumbtag"
+    ]
+
+
+@pytest.fixture(name="populated")
+def populated_fixture(session: Session):
+    start = datetime(2024, 1, 1)
+    tags = [Tag(name=f"tag-{i}") for i in range(5)]
+    units = [Unit(name=f"unit {i}") for i in range(3)]
+    for i in range(60):
+        session.add(
+            Crumb(
+                body_md=f"crumb {i}",
+                created_at=start + timedelta(minutes=i),
+                visibility=Visibility.published if i % 2 else Visibility.draft,
+                unit=units[i % 3],
+                tags=[tags[i % 5], tags[(i + 1) % 5]],
+            )
+        )
+    session.commit()
+    session.execute(text("ANALYZE"))
+    return session
+
+
+def _core_queries(session: Session):
+    cursor = encode_cursor(datetime(2024, 1, 1, 0, 30), 30)
+    resolved = resolve_tags(session, {"tag-1", "tag-2"})
+    tag_filter = TagFilter(all_of=["tag-1", "tag-2"])
+    return {
+        "stream": stream_statement().limit(51),
+        "stream after cursor": stream_statement(cursor, newest_first=True).limit(51),
+        "published stream": stream_statement(cursor, published_only=True).limit(51),
+        "tag filter, walk": filter_statement(tag_filter, resolved, limit=1),
+        "tag filter, driven": filter_statement(tag_filter, resolved, limit=500),
+        "tag by name": tag_by_name_statement("Tag-1"),
+        "crumbs of a unit": select(Crumb).where(Crumb.unit_id == 1),
+        "crumbs of a tag": select(CrumbTag.crumb_id).where(CrumbTag.tag_id == 1),
+        "cascade from tag": delete(CrumbTag).where(CrumbTag.tag_id == 1),
+        "cascade from crumb": delete(CrumbTag).where(CrumbTag.crumb_id == 1),
+    }
+
+
+def test_core_queries_avoid_full_scans(populated: Session):
+    """Test that no core query reads a whole table."""
+    for name, statement in _core_queries(populated).items():
+        plan = explain(populated, statement)
+        assert full_scans(plan) == [], f"{name}: {plan}"
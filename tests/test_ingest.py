@@ -0,0 +1,83 @@
+"""Tests for bulk crumb ingestion."""
+import pytest
+from sqlmodel import Session, func, select
+
+from app.ingest import bulk_ingest
+from app.models import Crumb, CrumbCreate, CrumbTag, Tag, TagCreate, Unit, Visibility
+
+
+def _crumbs(count: int):
+    for i in range(count):
+        yield CrumbCreate(
+            body_md=f"crumb {i}",
+            unit_name="import" if i % 2 else None,
+            tags=[TagCreate(name="Python"), TagCreate(name=f"Topic {i % 3}")],
+            visibility=Visibility.published,
+        )
+
+
+def test_bulk_ingest_inserts_crumbs_and_links(session: Session):
+    """Test that crumbs, tags, units and links are all written."""
+    report = bulk_ingest(session, _crumbs(25), chunk_size=10)
+    session.commit()
+
+    assert report.crumbs == 25
+    assert report.links == 50
+    assert report.tags_created == 4
+    assert report.units_created == 1
+    assert report.rows_per_second > 0
+    assert session.exec(select(func.count()).select_from(CrumbTag)).one() == 50
+
+    crumb = session.exec(select(Crumb).where(Crumb.body_md == "crumb 1")).one()
+    assert crumb.unit.name == "import"
+    assert {tag.name for tag in crumb.tags} == {"python", "topic-1"}
+    assert crumb.visibility == Visibility.published
+
+
+def test_bulk_ingest_reuses_existing_tags_and_units(session: Session):
+    """Test that existing rows are matched instead of duplicated."""
+    tag = Tag(name="python")
+    unit = Unit(name="import")
+    session.add_all([tag, unit])
+    session.commit()
+
+    report = bulk_ingest(session, _crumbs(4), chunk_size=3)
+    session.commit()
+
+    assert report.tags_created == 3
+    assert report.units_created == 0
+    assert session.exec(select(func.count()).select_from(Tag)).one() == 4
+    assert session.exec(select(func.count()).select_from(Unit)).one() == 1
+    session.refresh(tag)
+    assert len(tag.crumbs) == 4
+
+
+def test_bulk_ingest_deduplicates_tags_within_a_crumb(session: Session):
+    """Test that tags normalizing to the same name link only once."""
+    crumb = CrumbCreate(
+        body_md="dupes", tags=[TagCreate(name="Machine Learning"), TagCreate(name="machine-learning")]
+    )
+
+    report = bulk_ingest(session, [crumb])
+
+    assert report.links == 1
+
+
+def test_bulk_ingest_consumes_input_lazily(session: Session):
+    """Test that earlier chunks are written before later input is read."""
+    seen = []
+
+    def crumbs():
+        for i, crumb in enumerate(_crumbs(6)):
+            seen.append(session.exec(select(func.count()).select_from(Crumb)).one())
+            yield crumb
+
+    bulk_ingest(session, crumbs(), chunk_size=2)
+
+    assert seen == [0, 0, 2, 2, 4, 4]
+
+
+def test_bulk_ingest_rejects_empty_chunks(session: Session):
+    """Test that a chunk size below one is rejected."""
+    with pytest.raises(ValueError):
+        bulk_ingest(session, [], chunk_size=0)
@@ -0,0 +1,187 @@
+"""Tests for query instrumentation, query budgets and the metrics endpoint."""
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from app.db import AsyncSessionFactory
+from app.instrumentation import (
+    LatencyHistogram,
+    QueryBudgetExceeded,
+    QueryInstrumentation,
+    default_instrumentation,
+    normalize_sql,
+    statement_count,
+)
+from app.models import Crumb, Tag, Unit
+from app.stream import get_stream_page
+
+
+def _seed(session: Session, crumbs: int = 6):
+    start = datetime(2024, 1, 1)
+    tags = [Tag(name="python"), Tag(name="sql")]
+    units = [Unit(name="Week 1"), Unit(name="Week 2")]
+    for i in range(crumbs):
+        session.add(
+            Crumb(
+                body_md=f"crumb {i}",
+                created_at=start + timedelta(minutes=i),
+                unit=units[i % 2],
+                tags=tags[: i % 3],
+            )
+        )
+    session.commit()
+
+
+def test_normalize_sql_groups_equivalent_statements():
+    """Test that literals, whitespace and IN-lists do not split a statement."""
+    assert normalize_sql("SELECT * FROM crumb\n  WHERE id = 3 AND name = 'it''s'") == (
+        "SELECT * FROM crumb WHERE id = ? AND name = ?"
+    )
+    assert normalize_sql("SELECT * FROM tag WHERE id IN (?, ?, ?)") == normalize_sql(
+        "SELECT * FROM tag WHERE id IN (?, ?)"
+    )
+    assert normalize_sql("SELECT * FROM tag WHERE id IN (__[POSTCOMPILE_id_1])") == (
+        "SELECT * FROM tag WHERE id IN (...)"
+    )
+    # Digits inside identifiers are not literals
+    assert normalize_sql("SELECT anon_1.id FROM anon_1") == "SELECT anon_1.id FROM anon_1"
+
+
+def test_histogram_quantiles():
+    """Test bucket counts and quantile upper bounds."""
+    histogram = LatencyHistogram()
+    for ms in [0.05] * 90 + [3.0] * 9 + [4000.0]:
+        histogram.add(ms)
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert summary["buckets"]["0.1"] == 90
+    assert summary["buckets"]["5"] == 9
+    assert summary["buckets"]["inf"] == 1
+    assert summary["p50_ms"] == 0.1
+    assert summary["p95_ms"] == 5
+    assert summary["p99_ms"] == 5
+    assert summary["max_ms"] == 4000.0
+    assert LatencyHistogram().quantile(0.5) == 0.0
+
+
+def test_records_statements_and_slow_queries(session: Session, caplog):
+    """Test per-statement grouping and the slow-query log."""
+    _seed(session)
+    engine = session.get_bind()
+    instrumentation = QueryInstrumentation(slow_query_ms=0, slow_log_size=2)
+    instrumentation.attach(engine)
+    instrumentation.attach(engine)  # idempotent
+    try:
+        with caplog.at_level("WARNING", logger="breadcrumbs.slow_query"):
+            for crumb_id in (1, 2, 3):
+                session.exec(text(f"SELECT body_md FROM crumb WHERE id = {crumb_id}")).one()
+    finally:
+        instrumentation.detach(engine)
+    session.exec(text("SELECT 1")).one()  # not recorded once detached
+
+    snapshot = instrumentation.snapshot()
+    assert snapshot["statements"] == 3
+    [entry] = snapshot["by_statement"]
+    assert entry["count"] == 3
+    assert entry["sql"] == "SELECT body_md FROM crumb WHERE id = ?"
+    assert len(snapshot["slow_queries"]) == 2
+    assert len(caplog.records) == 3
+
+    instrumentation.reset()
+    assert instrumentation.snapshot()["statements"] == 0
+
+
+def test_threshold_keeps_fast_queries_out_of_the_slow_log(session: Session):
+    """Test that statements under the threshold are only counted."""
+    engine = session.get_bind()
+    instrumentation = QueryInstrumentation(slow_query_ms=10_000)
+    instrumentation.attach(engine)
+    try:
+        session.exec(text("SELECT 1"))
+    finally:
+        instrumentation.detach(engine)
+    assert instrumentation.snapshot()["statements"] == 1
+    assert instrumentation.snapshot()["slow_queries"] == []
+
+
+def test_failed_statements_leave_no_timer(session: Session):
+    """Test that a statement that raises does not leave its start time on the connection."""
+    engine = session.get_bind()
+    instrumentation = QueryInstrumentation()
+    instrumentation.attach(engine)
+    try:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                session.exec(text("SELECT * FROM no_such_table"))
+            session.rollback()
+        session.exec(text("SELECT 1")).one()
+        assert session.connection().info[instrumentation._started] == []
+    finally:
+        instrumentation.detach(engine)
+    assert instrumentation.snapshot()["statements"] == 1
+
+
+def test_statements_are_counted_per_session(session: Session, count_statements):
+    """Test that each session only sees the statements it issued."""
+    _seed(session)
+    engine = session.get_bind()
+    QueryInstrumentation().attach(engine)
+    before = statement_count(session)
+    with Session(engine) as other, count_statements(other) as statements:
+        other.exec(select(Tag)).all()
+        other.exec(select(Unit)).all()
+        assert statement_count(other) == len(statements) > 2  # with the selectin loads
+    with count_statements(session) as statements:
+        session.exec(select(Crumb)).all()
+    assert statement_count(session) == before + len(statements)
+
+
+def test_query_budget(session: Session, query_budget):
+    """Test that the stream page fits its budget and a per-row loop does not."""
+    _seed(session)
+    session.expire_all()
+    with query_budget(session, 3):
+        get_stream_page(session, limit=5)
+
+    session.expire_all()
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        with query_budget(session, 3):
+            for crumb_id in range(1, 7):
+                session.exec(select(Crumb).where(Crumb.id == crumb_id)).one()
+    assert "budget was 3" in str(excinfo.value)
+    # Grouped by normalized SQL, so the six lookups are one line
+    assert "6x SELECT crumb." in str(excinfo.value)
+
+
+@pytest.fixture(name="api_seed")
+def api_seed_fixture():
+    return _seed
+
+
+@pytest.fixture(name="instrumented")
+def instrumented_fixture(api_factory: AsyncSessionFactory):
+    # What the lifespan does for the engine requests use
+    engine = api_factory.engine.sync_engine
+    default_instrumentation.attach(engine)
+    default_instrumentation.reset()
+    yield
+    default_instrumentation.detach(engine)
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint(
+    client: httpx.AsyncClient, admin_client: httpx.AsyncClient, instrumented
+):
+    """Test that requests show up in the metrics snapshot, shown only to the admin."""
+    assert (await client.get("/api/crumbs")).status_code == 200
+    assert (await client.get("/api/metrics")).status_code == 401
+    metrics = (await admin_client.get("/api/metrics")).json()
+    assert metrics["statements"] >= 2
+    assert any("FROM crumb" in entry["sql"] for entry in metrics["by_statement"])
+    assert {"count", "p50_ms", "p95_ms", "buckets"} <= set(metrics["by_statement"][0])
+    assert metrics["slow_query_ms"] == default_instrumentation.slow_query_ms
+    assert metrics["sessions"]["created"] >= 1
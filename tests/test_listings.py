@@ -0,0 +1,68 @@
+"""Tests for metadata-only crumb listings."""
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlmodel import Session
+
+from app.listings import list_month
+from app.models import Crumb, Tag, Visibility
+
+
+def _seed(session: Session):
+    python = Tag(name="python")
+    session.add_all(
+        [
+            Crumb(body_md="last of january", created_at=datetime(2024, 1, 31, 23, 59)),
+            Crumb(
+                body_md="February notes " * 50,
+                created_at=datetime(2024, 2, 1),
+                visibility=Visibility.published,
+                tags=[python],
+            ),
+            Crumb(body_md="a draft", created_at=datetime(2024, 2, 29, 12)),
+            Crumb(body_md="new year", created_at=datetime(2025, 1, 1)),
+        ]
+    )
+    session.commit()
+    session.expunge_all()
+
+
+def test_month_listing_has_no_bodies(session: Session):
+    """Test that a month lists its crumbs in order, with tags and without bodies."""
+    _seed(session)
+
+    listing = list_month(session, 2024, 2)
+
+    assert [crumb.created_at for crumb in listing] == [
+        datetime(2024, 2, 1),
+        datetime(2024, 2, 29, 12),
+    ]
+    assert [[tag.name for tag in crumb.tags] for crumb in listing] == [["python"], []]
+    assert all(crumb.body_preview is None for crumb in listing)
+    assert "body_md" not in listing[0].model_dump()
+
+
+def test_month_listing_previews(session: Session):
+    """Test the preview and published-only options, and the December boundary."""
+    _seed(session)
+
+    [published] = list_month(session, 2024, 2, preview_length=15, published_only=True)
+    assert published.body_preview == "February notes "
+    assert [crumb.body_preview for crumb in list_month(session, 2024, 12, 3)] == []
+    assert [crumb.body_preview for crumb in list_month(session, 2025, 1, 3)] == ["new"]
+
+
+def test_invalid_month(session: Session):
+    """Test that a month outside 1-12 is rejected."""
+    with pytest.raises(ValueError):
+        list_month(session, 2024, 13)
+
+
+@pytest.mark.asyncio
+async def test_http_month_bounds(client: httpx.AsyncClient):
+    """Test that years outside what datetime can bound are rejected rather than failing."""
+    assert (await client.get("/api/months/0/1")).status_code == 422
+    assert (await client.get("/api/months/9999/12")).status_code == 422
+    assert (await client.get("/api/months/1/1")).json() == []
+    assert (await client.get("/api/months/9998/12")).json() == []
@@ -0,0 +1,150 @@
+"""Tests for named relationship-loading profiles."""
+import pytest
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, select, text
+
+from app.compression import compress_text
+from app.loading import apply_profile, preview_options
+from app.models import Crumb, CrumbPublic, Tag, TagPublic, Unit, UnitPublic
+
+
+def _populate(session: Session, units: int, crumbs_per_unit: int):
+    """Create units whose crumbs all share a pool of tags."""
+    tags = session.exec(select(Tag).order_by(Tag.id)).all() or [
+        Tag(name=f"tag-{i}") for i in range(3)
+    ]
+    for u in range(units):
+        unit = Unit(name=f"unit-{u}")
+        for c in range(crumbs_per_unit):
+            crumb = Crumb(body_md=f"crumb {u}.{c}", unit=unit)
+            crumb.tags = tags[: c % 3 + 1]
+            session.add(crumb)
+    session.commit()
+    session.expunge_all()
+
+
+def _render_stream(session: Session):
+    crumbs = session.exec(apply_profile(select(Crumb), "stream")).all()
+    return [CrumbPublic.model_validate(c) for c in crumbs]
+
+
+def _render_tag_page(session: Session):
+    tag = session.exec(apply_profile(select(Tag).where(Tag.name == "tag-0"), "tag-page")).one()
+    return TagPublic.model_validate(tag), [CrumbPublic.model_validate(c) for c in tag.crumbs]
+
+
+def _render_unit_detail(session: Session):
+    unit = session.exec(apply_profile(select(Unit).limit(1), "unit-detail")).one()
+    return UnitPublic.model_validate(unit), [CrumbPublic.model_validate(c) for c in unit.crumbs]
+
+
+@pytest.mark.parametrize(
+    "render, expected",
+    [(_render_stream, 3), (_render_tag_page, 4), (_render_unit_detail, 3)],
+)
+def test_profile_statement_count_is_bounded(session: Session, render, expected, count_statements):
+    """Test that each profile issues a fixed number of statements as data grows."""
+    for units in (2, 20):
+        # Grows the data set on each pass; the statement count must not follow
+        _populate(session, units=units, crumbs_per_unit=5)
+        with count_statements(session) as statements:
+            render(session)
+        assert len(statements) == expected
+        session.expunge_all()
+
+
+def test_stream_profile_raises_on_unloaded_relationship(session: Session):
+    """Test that relationships outside the profile cannot be lazily loaded."""
+    _populate(session, units=1, crumbs_per_unit=2)
+
+    crumb = session.exec(apply_profile(select(Crumb), "stream")).first()
+
+    with pytest.raises(InvalidRequestError):
+        crumb.unit.crumbs
+    with pytest.raises(InvalidRequestError):
+        crumb.tags[0].crumbs
+
+
+def test_unit_detail_reuses_parent_unit(session: Session, count_statements):
+    """Test that crumbs in a unit detail resolve their unit without SQL."""
+    _populate(session, units=1, crumbs_per_unit=2)
+
+    unit = session.exec(apply_profile(select(Unit), "unit-detail")).one()
+
+    with count_statements(session) as statements:
+        assert all(crumb.unit is unit for crumb in unit.crumbs)
+    assert statements == []
+
+
+def test_unknown_profile(session: Session):
+    """Test that an unknown profile name is rejected."""
+    with pytest.raises(ValueError):
+        apply_profile(select(Crumb), "everything")
+
+
+def test_profile_for_wrong_entity(session: Session):
+    """Test that a profile cannot be applied to a query of another model."""
+    with pytest.raises(ValueError):
+        apply_profile(select(Tag), "stream")
+
+
+@pytest.mark.parametrize("profile", ["crumb-metadata", "unit-timeline"])
+def test_metadata_profiles_defer_body(session: Session, profile, count_statements):
+    """Test that metadata profiles leave body_md out of the SQL until it is read."""
+    _populate(session, units=1, crumbs_per_unit=3)
+    entity = Crumb if profile == "crumb-metadata" else Unit
+
+    with count_statements(session) as statements:
+        loaded = session.exec(apply_profile(select(entity), profile)).all()
+    crumbs = loaded if entity is Crumb else loaded[0].crumbs
+    assert not any("body_md" in statement for statement in statements)
+    assert all(crumb.tags for crumb in crumbs)
+
+    with count_statements(session) as statements:
+        assert crumbs[0].body_md == "crumb 0.0"
+    assert len(statements) == 1
+
+
+def test_preview_cuts_body_in_sql(session: Session, count_statements):
+    """Test that a preview loads the first characters of each body and not the body."""
+    session.add_all([Crumb(body_md="x" * 500), Crumb(body_md="short")])
+    session.commit()
+    session.expunge_all()
+
+    statement = apply_profile(select(Crumb).order_by(Crumb.id), "crumb-metadata").options(
+        *preview_options("sqlite", 10)
+    )
+    with count_statements(session) as statements:
+        crumbs = session.exec(statement).all()
+    assert [crumb.body_preview for crumb in crumbs] == ["x" * 10, "short"]
+    assert "substr" in statements[0]
+    assert "body_md" not in crumbs[0].__dict__
+
+
+def test_preview_of_an_archived_body(session: Session):
+    """Test that previews of compressed bodies are cut after decompression."""
+    body = "Ünïcode notes about sqlite. " * 20
+    crumb = Crumb(body_md=body)
+    session.add(crumb)
+    session.commit()
+    session.execute(
+        text("UPDATE crumb SET body_md = :archived"), {"archived": compress_text(body)}
+    )
+    session.commit()
+    session.expunge_all()
+
+    statement = apply_profile(select(Crumb), "crumb-metadata").options(
+        *preview_options("sqlite", 12)
+    )
+    assert session.exec(statement).one().body_preview == body[:12]
+
+
+def test_unit_timeline_preview(session: Session):
+    """Test that previews reach crumbs loaded through a relationship path."""
+    _populate(session, units=1, crumbs_per_unit=2)
+    statement = apply_profile(select(Unit), "unit-timeline").options(
+        *preview_options("sqlite", 5, selectinload(Unit.crumbs))
+    )
+    unit = session.exec(statement).one()
+    assert sorted(crumb.body_preview for crumb in unit.crumbs) == ["crumb", "crumb"]
@@ -0,0 +1,82 @@
+"""Tests for tag-name normalization."""
+import random
+import re
+
+import pytest
+
+from app.models import TagCreate
+from app.normalize import cache_info, normalize_tag_name
+
+
+def legacy_normalize(v):
+    """The per-call re.sub implementation TagBase.normalize_name used to have."""
+    if not v or not v.strip():
+        raise ValueError("Tag name cannot be empty")
+    v = re.sub(r"\s+", "-", v.strip().lower())
+    v = re.sub(r"-{2,}", "-", v)
+    v = v.strip("-")
+    if not v:
+        raise ValueError("Tag name cannot be empty after normalization")
+    if not re.match(r"^[a-z0-9\-]+$", v):
+        raise ValueError("Tag names can only contain letters, numbers, and dashes")
+    return v
+
+
+def _outcome(fn, value):
+    try:
+        return "ok", fn(value)
+    except ValueError as exc:
+        return "error", str(exc)
+
+
+CASES = [
+    "python", "Python", "  Machine   Learning ", "machine-learning", "a - b", "--a--b--",
+    "-", "---", "", "   ", "\t\n", "tab\tseparated\nname", "C++", "ünïcode", "İstanbul",
+    "snake_case", "trailing-", "-leading", "a b", "x y", "123", "a--b", "A-B-C",
+    "dots.are.bad", "new\nline\n", "a\x1cb",
+]
+
+
+@pytest.mark.parametrize("value", CASES)
+def test_matches_legacy_behavior(value):
+    """Test that results and error messages match the old implementation."""
+    assert _outcome(normalize_tag_name, value) == _outcome(legacy_normalize, value)
+
+
+def test_matches_legacy_behavior_fuzzed():
+    """Test equivalence on random strings over a deliberately awkward alphabet."""
+    rng = random.Random(1234)
+    alphabet = "aZ09- \t\n_. é"
+    for _ in range(5000):
+        value = "".join(rng.choices(alphabet, k=rng.randint(0, 12)))
+        assert _outcome(normalize_tag_name, value) == _outcome(legacy_normalize, value), value
+
+
+def test_non_string_input_still_rejected():
+    """Test that non-string input fails the same way as before."""
+    with pytest.raises(ValueError):
+        normalize_tag_name(None)
+
+
+def test_canonical_names_skip_the_memo():
+    """Test that already-normalized names take the fast path."""
+    before = cache_info()
+    normalize_tag_name("already-canonical")
+    after = cache_info()
+
+    assert (after.hits, after.misses) == (before.hits, before.misses)
+
+
+def test_raw_names_are_memoized():
+    """Test that repeated raw names are served from the memo."""
+    normalize_tag_name("Memo Me Please")
+    before = cache_info()
+    assert normalize_tag_name("Memo Me Please") == "memo-me-please"
+    assert cache_info().hits == before.hits + 1
+
+
+def test_tag_create_uses_normalizer():
+    """Test that model validation goes through the normalizer."""
+    assert TagCreate(name="  Deep  Work ").name == "deep-work"
+    with pytest.raises(ValueError):
+        TagCreate(name="no!")
@@ -0,0 +1,136 @@
+"""Tests for Markdown rendering and the rendered-HTML cache."""
+import httpx
+import pytest
+from sqlmodel import Session
+
+from app.models import Crumb, CrumbPublic, Tag, Unit, Visibility
+from app.render import RenderCache, default_render_cache, render_markdown, with_html
+
+
+def test_render_basic_markdown():
+    """Test headings, paragraphs, lists and inline markup."""
+    rendered = render_markdown(
+        "# Title\n\nSome **bold** and *soft* `code`\nnext line\n\n- one\n- two"
+    )
+
+    assert rendered == (
+        "<h1>Title</h1>\n"
+        "<p>Some <strong>bold</strong> and <em>soft</em> <code>code</code><br>next line</p>\n"
+        "<ul><li>one</li><li>two</li></ul>"
+    )
+
+
+def test_render_code_fence_is_literal():
+    """Test that fenced code keeps its markup characters."""
+    assert render_markdown("```\n**not bold**\n```") == "<pre><code>**not bold**\n</code></pre>"
+
+
+def test_render_sanitizes_html_and_links():
+    """Test that raw HTML is escaped and unsafe link schemes are dropped."""
+    rendered = render_markdown(
+        '<script>alert(1)</script> [ok](https://example.com/?a=1&b=2) [bad](javascript:alert(1))'
+    )
+
+    assert "<script>" not in rendered
+    assert "&lt;script&gt;" in rendered
+    assert '<a href="https://example.com/?a=1&amp;b=2" rel="nofollow noopener">ok</a>' in rendered
+    assert "javascript" not in rendered
+
+
+def test_render_emphasis_stays_out_of_link_urls():
+    """Test that asterisks in a URL are kept literally while the label can be emphasised."""
+    rendered = render_markdown(
+        "[docs](https://example.com/a*b*c) [**z**](https://example.com/**z**) *after*"
+    )
+
+    assert '<a href="https://example.com/a*b*c" rel="nofollow noopener">docs</a>' in rendered
+    assert (
+        '<a href="https://example.com/**z**" rel="nofollow noopener"><strong>z</strong></a>'
+        in rendered
+    )
+    assert rendered.endswith("<em>after</em></p>")
+
+
+def test_cache_hits_and_misses():
+    """Test that identical bodies render once."""
+    calls = []
+    cache = RenderCache(renderer=lambda body: calls.append(body) or f"<p>{body}</p>")
+
+    assert cache.render("same") == cache.render("same") == "<p>same</p>"
+    assert calls == ["same"]
+    assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+
+def test_cache_respects_byte_budget():
+    """Test that least recently used entries are evicted past the budget."""
+    cache = RenderCache(max_bytes=20, renderer=lambda body: body * 2)
+    cache.render("aaaa")  # 8 bytes
+    cache.render("bbbb")  # 16 bytes
+    cache.render("aaaa")  # refresh a
+    cache.render("cccc")  # 24 bytes -> evict b
+
+    stats = cache.stats()
+    assert stats.bytes == 16
+    assert stats.evictions == 1
+    cache.render("bbbb")
+    assert cache.stats().misses == 4
+
+
+def test_renderer_version_is_part_of_the_key():
+    """Test that a new renderer version never serves old HTML."""
+    assert RenderCache(version=1).key("body") != RenderCache(version=2).key("body")
+
+
+def test_edit_invalidates_cached_html(session: Session):
+    """Test that editing a crumb serves new HTML and evicts the old entry."""
+    default_render_cache.clear()
+    crumb = Crumb(body_md="first *draft*")
+    session.add(crumb)
+    session.commit()
+    public = CrumbPublic.model_validate(crumb)
+    with_html([public])
+    assert public.body_html == "<p>first <em>draft</em></p>"
+
+    crumb.body_md = "second **draft**"
+    session.add(crumb)
+    session.commit()
+    public = CrumbPublic.model_validate(crumb)
+    with_html([public])
+
+    assert public.body_html == "<p>second <strong>draft</strong></p>"
+    assert default_render_cache.stats().entries == 1
+
+
+def _seed(session: Session):
+    session.add(
+        Crumb(
+            body_md="some **bold** text",
+            visibility=Visibility.published,
+            unit=Unit(name="Week 1"),
+            tags=[Tag(name="python")],
+        )
+    )
+    session.commit()
+
+
+@pytest.fixture(name="api_seed")
+def api_seed_fixture():
+    return _seed
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/api/crumbs", "/api/tags/python/crumbs", "/api/units/1"])
+async def test_html_is_opt_in(client: httpx.AsyncClient, path: str):
+    """Test that body_html is rendered only for ?html=1, cached and validated separately."""
+    plain = await client.get(path)
+    rendered = await client.get(path, params={"html": 1})
+
+    def bodies(response):
+        page = response.json()
+        return [c["body_html"] for c in page.get("items", page.get("crumbs"))]
+
+    assert bodies(plain) == [None]
+    assert bodies(rendered) == ["<p>some <strong>bold</strong> text</p>"]
+    assert rendered.headers["etag"] != plain.headers["etag"]
+    again = await client.get(path, params={"html": 1})
+    assert bodies(again) == bodies(rendered)
@@ -0,0 +1,131 @@
+"""Tests for restoring an NDJSON export."""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine, func, select
+from sqlmodel.pool import StaticPool
+
+from app.db import SessionFactory
+from app.export import export_crumbs
+from app.models import Crumb, Tag, Unit, Visibility
+from app.restore import read_ndjson, restore_crumbs
+
+
+@pytest.fixture(name="target")
+def target_fixture():
+    """A SessionFactory over a second, empty in-memory database."""
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    yield SessionFactory(engine)
+    SQLModel.metadata.drop_all(engine)
+
+
+def _export(session: Session) -> list:
+    lines = "".join(export_crumbs(session, "ndjson")).splitlines()
+    return [json.loads(line) for line in lines]
+
+
+def _seed(session: Session, count: int) -> list:
+    start = datetime(2024, 1, 1)
+    unit = Unit(name="Week 1")
+    tags = [Tag(name="python"), Tag(name="sql")]
+    for i in range(count):
+        session.add(
+            Crumb(
+                body_md=f"crumb {i}",
+                created_at=start + timedelta(hours=count - i),
+                visibility=Visibility.published if i % 2 else Visibility.draft,
+                unit=unit if i % 3 else None,
+                tags=tags[: i % 3],
+            )
+        )
+    session.commit()
+    # Leave gaps in the id sequence so restored ids cannot just be renumbered
+    session.delete(session.get(Crumb, 2))
+    session.commit()
+    return "".join(export_crumbs(session, "ndjson")).splitlines()
+
+
+def test_round_trip(session: Session, target: SessionFactory):
+    """Test that export -> import reproduces ids, timestamps, units and tags."""
+    lines = _seed(session, 9)
+    report = restore_crumbs(target, read_ndjson(lines), batch_size=4)
+    assert (report.crumbs, report.skipped, report.batches) == (8, 0, 2)
+
+    with target.managed_session() as restored:
+        assert _export(restored) == _export(session)
+
+
+def test_resume_after_interruption(session: Session, target: SessionFactory):
+    """Test that a re-run skips committed batches and finishes the rest."""
+    lines = _seed(session, 9)
+
+    def interrupted():
+        for i, record in enumerate(read_ndjson(lines)):
+            if i == 5:
+                raise KeyboardInterrupt
+            yield record
+
+    with pytest.raises(KeyboardInterrupt):
+        restore_crumbs(target, interrupted(), batch_size=2)
+    with target.managed_session() as restored:
+        assert restored.exec(select(func.count()).select_from(Crumb)).one() == 4
+
+    report = restore_crumbs(target, read_ndjson(lines), batch_size=2)
+    assert (report.crumbs, report.skipped) == (4, 4)
+    with target.managed_session() as restored:
+        assert _export(restored) == _export(session)
+
+
+def test_new_crumbs_follow_restored_ids(session: Session, target: SessionFactory):
+    """Test that ids assigned after a restore do not collide with restored ones."""
+    lines = _seed(session, 5)
+    restore_crumbs(target, read_ndjson(lines))
+    with target.managed_session() as restored:
+        crumb = Crumb(body_md="after restore")
+        restored.add(crumb)
+        restored.flush()
+        assert crumb.id == max(json.loads(line)["id"] for line in lines) + 1
+
+
+def test_units_sharing_a_name_stay_apart(session: Session, target: SessionFactory):
+    """Test that units are restored by id, not merged by name, and keep created_at."""
+    first = Unit(name="morning", created_at=datetime(2024, 1, 1))
+    second = Unit(name="morning", created_at=datetime(2024, 2, 1))
+    session.add_all(
+        [Crumb(body_md="one", unit=first), Crumb(body_md="two", unit=second)]
+    )
+    session.commit()
+    lines = "".join(export_crumbs(session, "ndjson")).splitlines()
+
+    report = restore_crumbs(target, read_ndjson(lines), batch_size=1)
+
+    assert report.units_created == 2
+    with target.managed_session() as restored:
+        units = restored.exec(select(Unit).order_by(Unit.id)).all()
+        assert [(u.id, u.name, u.created_at) for u in units] == [
+            (first.id, "morning", datetime(2024, 1, 1)),
+            (second.id, "morning", datetime(2024, 2, 1)),
+        ]
+        crumbs = restored.exec(select(Crumb).order_by(Crumb.id)).all()
+        assert [c.unit_id for c in crumbs] == [first.id, second.id]
+        assert _export(restored) == _export(session)
+        unit = Unit(name="after restore")
+        restored.add(unit)
+        restored.flush()
+        assert unit.id == second.id + 1
+
+
+def test_bad_line_names_its_number():
+    """Test that invalid input is reported with its line number."""
+    lines = ['{"id": 1, "body_md": "ok"}', "", '{"id": 2}']
+    with pytest.raises(ValueError, match="line 3"):
+        list(read_ndjson(lines))
+    with pytest.raises(ValueError, match="line 1"):
+        list(read_ndjson(['{"body_md": "no id"}']))
+
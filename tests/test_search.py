@@ -0,0 +1,101 @@
+"""Tests for full-text search over crumbs."""
+from sqlmodel import Session, text
+
+from app.models import Crumb, Tag
+from app.search import rebuild_search_index, search_crumbs
+
+
+def _bodies(results):
+    return [crumb.body_md for crumb in results]
+
+
+def test_search_finds_matching_crumbs(session: Session):
+    """Test that only crumbs containing the words are returned."""
+    session.add_all(
+        [
+            Crumb(body_md="Thinking about sqlite indexes"),
+            Crumb(body_md="A walk in the park"),
+            Crumb(body_md="Indexes make queries fast"),
+        ]
+    )
+    session.commit()
+
+    assert sorted(_bodies(search_crumbs(session, "indexes"))) == [
+        "Indexes make queries fast",
+        "Thinking about sqlite indexes",
+    ]
+
+
+def test_search_ranks_better_matches_first(session: Session):
+    """Test that a crumb mentioning the term more often ranks higher."""
+    session.add_all(
+        [
+            Crumb(body_md="Coffee once, then a long digression about nothing in particular"),
+            Crumb(body_md="Coffee, coffee and more coffee"),
+        ]
+    )
+    session.commit()
+
+    assert _bodies(search_crumbs(session, "coffee"))[0] == "Coffee, coffee and more coffee"
+
+
+def test_search_follows_updates_and_deletes(session: Session):
+    """Test that the index tracks edits and deletions."""
+    crumb = Crumb(body_md="original words")
+    other = Crumb(body_md="original thought")
+    session.add_all([crumb, other])
+    session.commit()
+
+    crumb.body_md = "rewritten entirely"
+    session.add(crumb)
+    session.delete(other)
+    session.commit()
+
+    assert search_crumbs(session, "original") == []
+    assert _bodies(search_crumbs(session, "rewritten")) == ["rewritten entirely"]
+
+
+def test_search_paginates(session: Session):
+    """Test limit and offset over ranked results."""
+    session.add_all([Crumb(body_md=f"note {i}") for i in range(5)])
+    session.commit()
+
+    first = search_crumbs(session, "note", limit=3)
+    second = search_crumbs(session, "note", limit=3, offset=3)
+
+    assert len(first) == 3
+    assert len(second) == 2
+    assert not {c.id for c in first} & {c.id for c in second}
+
+
+def test_search_treats_input_as_words(session: Session):
+    """Test that FTS5 operators in user input are not interpreted."""
+    session.add(Crumb(body_md="C++ and NOT much else"))
+    session.commit()
+
+    assert len(search_crumbs(session, 'c++ "NOT')) == 1
+    assert search_crumbs(session, "***") == []
+
+
+def test_search_results_are_public(session: Session):
+    """Test that results carry their tags."""
+    tag = Tag(name="python")
+    crumb = Crumb(body_md="Searchable crumb")
+    crumb.tags = [tag]
+    session.add(crumb)
+    session.commit()
+
+    [result] = search_crumbs(session, "searchable")
+
+    assert [t.name for t in result.tags] == ["python"]
+
+
+def test_rebuild_search_index(session: Session):
+    """Test repopulating the index from the crumb table."""
+    session.add(Crumb(body_md="rebuild me"))
+    session.commit()
+    session.execute(text("DELETE FROM crumb_fts"))
+
+    rebuild_search_index(session)
+
+    assert _bodies(search_crumbs(session, "rebuild")) == ["rebuild me"]
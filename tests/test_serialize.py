@@ -0,0 +1,168 @@
+"""Tests for the trusted-row CrumbPublic serializer."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlmodel import Session, select
+
+from app.index_advisor import explain, full_scans
+from app.loading import apply_profile
+from app.models import Crumb, CrumbPage, CrumbPublic, Tag, Unit, Visibility
+from app.serialize import (
+    CrumbRow,
+    crumb_row,
+    crumb_rows,
+    encode_crumb,
+    encode_page,
+    tags_json_column,
+)
+from app.stream import (
+    build_page,
+    build_page_json,
+    get_stream_page,
+    get_stream_page_json,
+    stream_rows_statement,
+    stream_statement,
+)
+
+AWKWARD_BODY = "quote \" backslash \\ tab \t newline \n nul \x00 del \x7f é 😀   </script>"
+
+
+def _populate(session: Session):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    tags = [Tag(name=name) for name in ("python", "sql", "rust", "web-dev")]
+    units = [Unit(name="Week \"1\"", created_at=start), Unit(name="Woche 2 ✓")]
+    for i in range(12):
+        session.add(
+            Crumb(
+                body_md=AWKWARD_BODY if i == 3 else f"crumb {i}",
+                created_at=start + timedelta(minutes=i, microseconds=i * 1001),
+                updated_at=start + timedelta(days=1) if i % 4 == 0 else None,
+                visibility=Visibility.published if i % 3 else Visibility.draft,
+                unit=units[i % 2] if i % 5 else None,
+                tags=[tags[(i + k) % 4] for k in range(i % 4)],
+            )
+        )
+    session.commit()
+    session.expire_all()
+
+
+@pytest.mark.parametrize(
+    "created_at",
+    [
+        datetime(2024, 1, 1),
+        datetime(2024, 1, 1, 12, 0, 0, 123000),
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, 5, 6, 7, 890, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+        datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=-3))),
+        datetime(2024, 1, 1, tzinfo=timezone(timedelta(hours=1, seconds=30))),
+    ],
+)
+def test_encode_crumb_matches_pydantic(created_at: datetime):
+    """Test byte-for-byte parity on strings, datetimes, units and tags."""
+    row = CrumbRow(
+        id=7,
+        body_md=AWKWARD_BODY,
+        created_at=created_at,
+        updated_at=created_at,
+        visibility=Visibility.published,
+        unit_id=3,
+        unit_name="Week \"1\"",
+        unit_created_at=created_at,
+        tags=[(1, "python"), (5, "web-dev")],
+    )
+    model = CrumbPublic(
+        id=7,
+        body_md=AWKWARD_BODY,
+        created_at=created_at,
+        updated_at=created_at,
+        visibility=Visibility.published,
+        unit={"id": 3, "name": "Week \"1\"", "created_at": created_at},
+        tags=[{"id": 1, "name": "python"}, {"id": 5, "name": "web-dev"}],
+        body_html="<p>hi</p>",
+    )
+    assert encode_crumb(row, body_html="<p>hi</p>") == model.model_dump_json()
+
+    bare = CrumbRow(8, "", created_at, None, "draft", None, None, None)
+    expected = CrumbPublic(id=8, body_md="", created_at=created_at, visibility="draft")
+    assert encode_crumb(bare) == expected.model_dump_json()
+
+
+def test_crumb_row_matches_pydantic(session: Session):
+    """Test that serializing loaded ORM crumbs matches CrumbPublic.model_validate."""
+    _populate(session)
+    crumbs = session.exec(apply_profile(select(Crumb), "stream")).all()
+    for crumb in crumbs:
+        expected = CrumbPublic.model_validate(crumb).model_dump_json()
+        assert encode_crumb(crumb_row(crumb)) == expected
+    assert encode_page([], None) == CrumbPage().model_dump_json().encode()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"newest_first": True},
+        {"published_only": True},
+        {"newest_first": True, "published_only": True},
+    ],
+)
+def test_stream_page_json_matches_pydantic(session: Session, options):
+    """Test that every page from rows equals the validated CrumbPage, cursors included."""
+    _populate(session)
+    cursor, pages = None, 0
+    while True:
+        expected = get_stream_page(session, cursor, limit=5, **options)
+        session.expunge_all()
+        assert get_stream_page_json(session, cursor, limit=5, **options) == (
+            expected.model_dump_json().encode()
+        )
+        pages += 1
+        if expected.next_cursor is None:
+            break
+        cursor = expected.next_cursor
+    assert pages > 1
+
+
+def test_build_page_json_matches_build_page(session: Session):
+    """Test the ORM-object fast path against build_page."""
+    _populate(session)
+    crumbs = session.exec(stream_statement().limit(6)).all()
+    assert build_page_json(crumbs, 5) == build_page(crumbs, 5).model_dump_json().encode()
+
+
+def test_stream_page_json_is_one_statement(session: Session, count_statements):
+    """Test that a page from rows, tags included, costs a single statement."""
+    _populate(session)
+    with count_statements(session) as statements:
+        get_stream_page_json(session, limit=5)
+    assert len(statements) == 1
+    assert "json_group_array" in statements[0]
+
+
+def test_tag_query_fallback_matches(session: Session, count_statements):
+    """Test that the two-query fallback builds the same rows as JSON aggregation."""
+    _populate(session)
+    statement = stream_rows_statement().limit(20)
+    with count_statements(session) as statements:
+        fallback = crumb_rows(session, statement, single_query=False)
+    assert len(statements) == 2
+    assert any(row.tags for row in fallback)
+    assert fallback == crumb_rows(session, statement)
+
+
+def test_row_query_avoids_full_scans(session: Session):
+    """Test that the correlated tag subquery is a keyed lookup, not a scan."""
+    _populate(session)
+    statement = stream_rows_statement(published_only=True).limit(51)
+    plan = explain(session, statement.add_columns(tags_json_column("sqlite")))
+    assert full_scans(plan) == [], plan
+
+
+def test_tags_json_column_per_dialect():
+    """Test the PostgreSQL aggregate and the fallback on other dialects."""
+    statement = stream_rows_statement().add_columns(tags_json_column("postgresql"))
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "json_agg(json_build_array(tag.id, tag.name) ORDER BY tag.id)" in sql
+    assert "WHERE crumbtag.crumb_id = crumb.id" in sql
+    assert tags_json_column("mysql") is None
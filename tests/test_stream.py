@@ -0,0 +1,135 @@
+"""Tests for keyset pagination of the crumb stream."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session
+
+from app.index_advisor import explain
+from app.models import Crumb, Tag, Unit, Visibility
+from app.stream import decode_cursor, encode_cursor, get_stream_page, stream_statement
+
+
+def _add_crumbs(session: Session, count: int, same_timestamp: bool = False):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        offset = timedelta(0) if same_timestamp else timedelta(minutes=i)
+        session.add(Crumb(body_md=f"crumb {i}", created_at=start + offset))
+    session.commit()
+
+
+def _walk(session: Session, limit: int, **kwargs):
+    bodies, cursor = [], None
+    while True:
+        page = get_stream_page(session, cursor=cursor, limit=limit, **kwargs)
+        bodies.extend(crumb.body_md for crumb in page.items)
+        if page.next_cursor is None:
+            return bodies
+        cursor = page.next_cursor
+
+
+def test_cursor_round_trip():
+    """Test that a cursor decodes back to the position it encodes."""
+    created_at = datetime(2024, 3, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_invalid_cursor_raises():
+    """Test that a malformed cursor is rejected."""
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_stream_pages_in_chronological_order(session: Session):
+    """Test walking the whole stream page by page."""
+    _add_crumbs(session, 7)
+
+    assert _walk(session, limit=3) == [f"crumb {i}" for i in range(7)]
+
+
+def test_stream_newest_first(session: Session):
+    """Test walking the stream in reverse chronological order."""
+    _add_crumbs(session, 5)
+
+    assert _walk(session, limit=2, newest_first=True) == [
+        f"crumb {i}" for i in reversed(range(5))
+    ]
+
+
+def test_stream_ties_on_created_at(session: Session):
+    """Test that crumbs sharing a timestamp are neither skipped nor repeated."""
+    _add_crumbs(session, 6, same_timestamp=True)
+
+    bodies = _walk(session, limit=4)
+
+    assert sorted(bodies) == sorted(f"crumb {i}" for i in range(6))
+    assert len(bodies) == 6
+
+
+def test_stream_last_page_has_no_cursor(session: Session):
+    """Test that an exactly-full last page does not advertise another page."""
+    _add_crumbs(session, 4)
+
+    first = get_stream_page(session, limit=2)
+    second = get_stream_page(session, cursor=first.next_cursor, limit=2)
+
+    assert first.next_cursor is not None
+    assert len(second.items) == 2
+    assert second.next_cursor is None
+
+
+def test_stream_items_are_public(session: Session):
+    """Test that page items carry their unit and tags."""
+    unit = Unit(name="morning-thoughts")
+    tag = Tag(name="python")
+    session.add_all([unit, tag])
+    session.commit()
+    crumb = Crumb(body_md="Tagged crumb", unit_id=unit.id)
+    crumb.tags = [tag]
+    session.add(crumb)
+    session.commit()
+
+    page = get_stream_page(session)
+
+    assert page.items[0].unit.name == "morning-thoughts"
+    assert [t.name for t in page.items[0].tags] == ["python"]
+
+
+def _query_plan(session: Session, statement) -> str:
+    """EXPLAIN QUERY PLAN for a statement, as one string."""
+    return " | ".join(explain(session, statement))
+
+
+def test_published_stream_skips_drafts(session: Session):
+    """Test that the published stream pages over published crumbs only."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(9):
+        visibility = Visibility.published if i % 3 == 0 else Visibility.draft
+        created_at = start + timedelta(minutes=i)
+        session.add(Crumb(body_md=f"crumb {i}", created_at=created_at, visibility=visibility))
+    session.commit()
+
+    assert _walk(session, limit=2, published_only=True) == ["crumb 0", "crumb 3", "crumb 6"]
+    assert _walk(session, limit=2, published_only=True, newest_first=True) == [
+        "crumb 6",
+        "crumb 3",
+        "crumb 0",
+    ]
+
+
+@pytest.mark.parametrize("newest_first", [False, True])
+def test_published_stream_uses_partial_index(session: Session, newest_first: bool):
+    """Test that the published stream is planned on the partial index, with no sort."""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    session.add_all(
+        Crumb(body_md="draft", created_at=start + timedelta(minutes=i)) for i in range(200)
+    )
+    session.commit()
+    cursor = encode_cursor(start, 1)
+
+    for statement in (
+        stream_statement(newest_first=newest_first, published_only=True),
+        stream_statement(cursor, newest_first=newest_first, published_only=True),
+    ):
+        plan = _query_plan(session, statement.limit(51))
+        assert "idx_crumb_published_created_at_id" in plan
+        assert "TEMP B-TREE" not in plan
@@ -0,0 +1,134 @@
+"""Tests for the tag id read-through cache and crumb creation."""
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from app.crumbs import create_crumb
+from app.ingest import bulk_ingest
+from app.models import Crumb, CrumbCreate, Tag, TagCreate
+from app.tag_cache import get_tag_id_cache, warm_tag_id_cache
+
+
+def _tag_lookups(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT") and "FROM tag" in s]
+
+
+def _payload(*tags: str) -> CrumbCreate:
+    return CrumbCreate(body_md="a crumb", tags=[TagCreate(name=t) for t in tags])
+
+
+def test_warm_cache_avoids_tag_queries(session: Session, count_statements):
+    """Test that creating a crumb with five existing tags needs no tag lookups."""
+    names = ["python", "sql", "sqlite", "indexes", "caching"]
+    session.add_all(Tag(name=name) for name in names)
+    session.commit()
+    assert warm_tag_id_cache(session) == 5
+
+    with count_statements(session) as statements:
+        crumb = create_crumb(session, _payload("Python", "SQL", "sqlite", "indexes", "caching"))
+        session.commit()
+    assert _tag_lookups(statements) == []
+    assert get_tag_id_cache(session).stats().hits == 5
+    assert sorted(tag.name for tag in session.get(Crumb, crumb.id).tags) == sorted(names)
+
+
+def test_misses_are_read_through(session: Session, count_statements):
+    """Test that a cold cache resolves misses in one query and remembers them."""
+    session.add_all([Tag(name="python"), Tag(name="sql")])
+    session.commit()
+
+    with count_statements(session) as statements:
+        create_crumb(session, _payload("python", "sql"))
+    assert len(_tag_lookups(statements)) == 1
+
+    with count_statements(session) as statements:
+        create_crumb(session, _payload("python", "sql"))
+    assert _tag_lookups(statements) == []
+    stats = get_tag_id_cache(session).stats()
+    assert (stats.hits, stats.misses) == (2, 2)
+
+
+def test_new_tags_bump_the_generation(session: Session):
+    """Test that creating tags invalidates the cache once the transaction ends."""
+    cache = get_tag_id_cache(session)
+    cache.warm(session)
+    generation = cache.generation
+
+    create_crumb(session, _payload("brand-new"))
+    # Uncommitted tags are never cached, so other sessions cannot see their ids
+    cache.lookup(session, ["brand-new"])
+    assert cache.stats().entries == 0
+    session.commit()
+    assert cache.generation == generation + 1
+
+    assert "brand-new" in cache.lookup(session, ["brand-new"])
+    assert cache.stats().entries == 1
+
+
+def test_rename_and_delete_invalidate(session: Session):
+    """Test that renamed and deleted tags drop out of the cache."""
+    tag = Tag(name="old-name")
+    session.add(tag)
+    session.commit()
+    cache = get_tag_id_cache(session)
+    cache.warm(session)
+
+    tag.name = "new-name"
+    session.commit()
+    assert cache.lookup(session, ["old-name"]) == {}
+    assert cache.lookup(session, ["new-name"]) == {"new-name": tag.id}
+
+    session.delete(tag)
+    session.commit()
+    assert cache.lookup(session, ["new-name"]) == {}
+
+
+def test_rolled_back_tags_are_not_cached(session: Session):
+    """Test that a rollback after a bulk tag insert clears the cache."""
+    cache = get_tag_id_cache(session)
+    bulk_ingest(session, [_payload("ghost")])
+    session.rollback()
+    assert cache.lookup(session, ["ghost"]) == {}
+    assert session.exec(select(Tag)).all() == []
+
+
+def test_caches_are_per_database(session: Session):
+    """Test that ids cached for one database are not served for another."""
+    session.add(Tag(name="python"))
+    session.commit()
+    warm_tag_id_cache(session)
+    with Session(session.get_bind()) as other:
+        assert get_tag_id_cache(other) is get_tag_id_cache(session)
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as other:
+        assert get_tag_id_cache(other).stats().entries == 0
+
+
+def test_engines_on_one_database_share_a_cache(tmp_path):
+    """Test that every engine on one database file, sync or async, shares its cache."""
+    url = f"sqlite:///{tmp_path / 'tags.sqlite'}"
+    engine, other = create_engine(url), create_engine(url)
+    async_engine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as writer, Session(other) as reader:
+        writer.add(Tag(name="python"))
+        writer.commit()
+        assert warm_tag_id_cache(reader) == 1
+        assert get_tag_id_cache(writer) is get_tag_id_cache(reader)
+        assert get_tag_id_cache(writer) is get_tag_id_cache(Session(async_engine.sync_engine))
+        assert get_tag_id_cache(writer).stats().entries == 1
+    engine.dispose()
+    other.dispose()
+
+
+def test_bulk_ingest_uses_the_cache(session: Session, count_statements):
+    """Test that ingest (and so the write-behind queue) resolves cached tags without a query."""
+    session.add_all([Tag(name="python"), Tag(name="sql")])
+    session.commit()
+    warm_tag_id_cache(session)
+
+    with count_statements(session) as statements:
+        bulk_ingest(session, [_payload("python", "sql"), _payload("Python")])
+        session.commit()
+    assert _tag_lookups(statements) == []
+    assert get_tag_id_cache(session).stats().misses == 0
@@ -0,0 +1,85 @@
+"""Tests for the AND/OR/NOT tag filter engine."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, text
+
+from app.models import Crumb, Tag
+from app.tag_filter import TagFilter, filter_crumbs, filter_statement, resolve_tags
+
+
+@pytest.fixture(name="tagged")
+def tagged_fixture(session: Session):
+    """Crumbs 0-5 tagged python (all), sqlite (evens) and web (multiples of 3)."""
+    tags = {name: Tag(name=name) for name in ("python", "sqlite", "web", "unused")}
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(6):
+        crumb_tags = [tags["python"]]
+        if i % 2 == 0:
+            crumb_tags.append(tags["sqlite"])
+        if i % 3 == 0:
+            crumb_tags.append(tags["web"])
+        session.add(Crumb(body_md=f"crumb {i}", created_at=start + timedelta(hours=i), tags=crumb_tags))
+    session.commit()
+    return session
+
+
+def _bodies(session: Session, **kwargs):
+    page = filter_crumbs(session, TagFilter(**kwargs))
+    return [crumb.body_md.split()[1] for crumb in page.items]
+
+
+def test_filter_all_of(tagged: Session):
+    """Test that AND requires every tag."""
+    assert _bodies(tagged, all_of=["sqlite", "web"]) == ["0"]
+    assert _bodies(tagged, all_of=["Python", "SQLite"]) == ["0", "2", "4"]
+
+
+def test_filter_any_of(tagged: Session):
+    """Test that OR accepts any of the tags."""
+    assert _bodies(tagged, any_of=["sqlite", "web"]) == ["0", "2", "3", "4"]
+
+
+def test_filter_none_of(tagged: Session):
+    """Test that NOT excludes crumbs carrying the tag."""
+    assert _bodies(tagged, all_of=["python"], none_of=["sqlite"]) == ["1", "3", "5"]
+    assert _bodies(tagged, none_of=["sqlite", "web"]) == ["1", "5"]
+
+
+def test_filter_unknown_tags(tagged: Session):
+    """Test that unknown tags empty AND/OR filters but are ignored by NOT."""
+    assert _bodies(tagged, all_of=["python", "missing"]) == []
+    assert _bodies(tagged, any_of=["missing"]) == []
+    assert _bodies(tagged, any_of=["web"], none_of=["missing"]) == ["0", "3"]
+
+
+def test_filter_paginates_in_stream_order(tagged: Session):
+    """Test cursor pagination over filtered results."""
+    tag_filter = TagFilter(all_of=["python"])
+    first = filter_crumbs(tagged, tag_filter, limit=4)
+    second = filter_crumbs(tagged, tag_filter, cursor=first.next_cursor, limit=4)
+
+    assert [c.body_md for c in first.items + second.items] == [f"crumb {i}" for i in range(6)]
+    assert second.next_cursor is None
+
+
+def test_and_filter_is_driven_by_rarest_tag(tagged: Session):
+    """Test that the rarest AND tag drives the scan through the (tag_id, crumb_id) index."""
+    tag_filter = TagFilter(all_of=["python", "web"])
+    resolved = resolve_tags(tagged, tag_filter.names)
+    statement = filter_statement(tag_filter, resolved)
+    compiled = statement.compile(tagged.get_bind(), compile_kwargs={"literal_binds": True})
+
+    driving = f"crumb.id IN (SELECT crumbtag.crumb_id \nFROM crumbtag \nWHERE crumbtag.tag_id IN ({resolved.tags['web'][0]}))"
+    assert driving in str(compiled)
+    plan = tagged.exec(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    assert any("idx_crumbtag_tag_crumb" in row[-1] for row in plan)
+
+
+def test_common_tags_walk_the_stream(tagged: Session):
+    """Test that tags matching most crumbs are probed instead of collected."""
+    tag_filter = TagFilter(all_of=["python"])
+    statement = filter_statement(tag_filter, resolve_tags(tagged, tag_filter.names), limit=2)
+
+    assert "crumb.id IN" not in str(statement)
+    assert [c.body_md for c in tagged.exec(statement.limit(2))] == ["crumb 0", "crumb 1"]
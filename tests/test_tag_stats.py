@@ -0,0 +1,137 @@
+"""Tests for the incrementally maintained tag_stats aggregate."""
+from datetime import datetime, timezone
+
+from sqlmodel import Session, delete, select, text
+
+from app.models import Crumb, CrumbTag, Tag, TagStats, Visibility
+from app.tag_stats import list_tag_stats, rebuild_tag_stats
+
+
+def _stats(session: Session):
+    session.expire_all()
+    return {
+        s.name: (s.crumb_count, s.published_count, s.last_used_at)
+        for s in list_tag_stats(session)
+    }
+
+
+def _at(day: int) -> datetime:
+    return datetime(2024, 1, day, tzinfo=timezone.utc)
+
+
+def _naive(day: int) -> datetime:
+    return _at(day).replace(tzinfo=None)  # SQLite drops the timezone
+
+
+def test_stats_follow_new_links(session: Session):
+    """Test counts and last_used_at as crumbs are tagged."""
+    python, sqlite = Tag(name="python"), Tag(name="sqlite")
+    session.add_all(
+        [
+            Crumb(body_md="a", created_at=_at(1), tags=[python]),
+            Crumb(body_md="b", created_at=_at(3), tags=[python, sqlite],
+                  visibility=Visibility.published),
+            Tag(name="unused"),
+        ]
+    )
+    session.commit()
+
+    assert _stats(session) == {
+        "python": (2, 1, _naive(3)),
+        "sqlite": (1, 1, _naive(3)),
+        "unused": (0, 0, None),
+    }
+
+
+def test_stats_follow_visibility_changes(session: Session):
+    """Test that publishing and unpublishing adjust published_count."""
+    tag = Tag(name="python")
+    crumb = Crumb(body_md="draft", tags=[tag], created_at=_at(1))
+    session.add(crumb)
+    session.commit()
+
+    crumb.visibility = Visibility.published
+    session.add(crumb)
+    session.commit()
+    assert _stats(session)["python"] == (1, 1, _naive(1))
+
+    crumb.visibility = Visibility.draft
+    session.add(crumb)
+    session.commit()
+    assert _stats(session)["python"] == (1, 0, _naive(1))
+
+
+def test_stats_follow_unlinking(session: Session):
+    """Test removing a tag from a crumb, including the newest crumb."""
+    tag = Tag(name="python")
+    old = Crumb(body_md="old", tags=[tag], created_at=_at(1))
+    new = Crumb(body_md="new", tags=[tag], created_at=_at(5), visibility=Visibility.published)
+    session.add_all([old, new])
+    session.commit()
+
+    new.tags = []
+    session.add(new)
+    session.commit()
+
+    assert _stats(session)["python"] == (1, 0, _naive(1))
+
+
+def test_stats_follow_crumb_deletes(session: Session):
+    """Test deleting crumbs, both through the ORM and through the FK cascade."""
+    tag = Tag(name="python")
+    crumbs = [
+        Crumb(body_md=f"c{day}", tags=[tag], created_at=_at(day), visibility=Visibility.published)
+        for day in (1, 2, 3)
+    ]
+    session.add_all(crumbs)
+    session.commit()
+
+    session.delete(crumbs[2])
+    session.commit()
+    assert _stats(session)["python"] == (2, 2, _naive(2))
+
+    session.execute(text("PRAGMA foreign_keys = ON"))
+    session.execute(delete(Crumb).where(Crumb.id == crumbs[1].id))
+    session.commit()
+    assert session.exec(select(CrumbTag)).all() == [CrumbTag(crumb_id=crumbs[0].id, tag_id=tag.id)]
+    assert _stats(session)["python"] == (1, 1, _naive(1))
+
+
+def test_rebuild_matches_incremental(session: Session):
+    """Test that a rebuild reproduces the incrementally maintained rows."""
+    tags = [Tag(name=f"tag-{i}") for i in range(4)]
+    crumbs = [
+        Crumb(
+            body_md=f"crumb {i}",
+            created_at=_at(i + 1),
+            tags=tags[i % 4 : i % 4 + 2],
+            visibility=Visibility.published if i % 3 else Visibility.draft,
+        )
+        for i in range(12)
+    ]
+    session.add_all(crumbs)
+    session.commit()
+    session.delete(crumbs[5])
+    crumbs[7].visibility = Visibility.published
+    crumbs[8].tags = []
+    session.commit()
+    incremental = _stats(session)
+
+    session.execute(delete(TagStats))
+    assert rebuild_tag_stats(session) == 4
+    session.commit()
+
+    assert _stats(session) == incremental
+
+
+def test_list_published_only(session: Session):
+    """Test hiding tags that have no published crumbs."""
+    session.add_all(
+        [
+            Crumb(body_md="a", tags=[Tag(name="draft-only")]),
+            Crumb(body_md="b", tags=[Tag(name="public")], visibility=Visibility.published),
+        ]
+    )
+    session.commit()
+
+    assert [t.name for t in list_tag_stats(session, published_only=True)] == ["public"]
@@ -0,0 +1,30 @@
+"""Tests for tag queries."""
+from sqlmodel import Session
+
+from app.models import Tag
+from app.tags import get_tag_by_name, list_tags
+
+
+def test_get_tag_by_name_normalizes_input(session: Session):
+    """Test that lookups go through the same normalization as tag creation."""
+    session.add(Tag(name="machine-learning"))
+    session.commit()
+
+    tag = get_tag_by_name(session, "  Machine Learning ")
+
+    assert tag is not None
+    assert tag.name == "machine-learning"
+
+
+def test_get_tag_by_name_missing(session: Session):
+    """Test that unknown and invalid names return None."""
+    assert get_tag_by_name(session, "nothing") is None
+    assert get_tag_by_name(session, "!!!") is None
+
+
+def test_list_tags_sorted(session: Session):
+    """Test that tags are listed alphabetically."""
+    session.add_all([Tag(name="python"), Tag(name="fastapi"), Tag(name="sqlite")])
+    session.commit()
+
+    assert [tag.name for tag in list_tags(session)] == ["fastapi", "python", "sqlite"]
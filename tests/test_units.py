@@ -0,0 +1,63 @@
+"""Tests for the unit overview query."""
+from datetime import datetime, timedelta
+
+from sqlmodel import Session
+
+from app.models import Crumb, Tag, Unit
+from app.units import list_unit_summaries, unit_summary_statement
+from tests.test_stream import _query_plan
+
+
+def _seed(session: Session):
+    start = datetime(2024, 1, 1)
+    python, sql = Tag(name="python"), Tag(name="sql")
+    busy = Unit(name="busy", created_at=start)
+    empty = Unit(name="empty", created_at=start + timedelta(days=1))
+    session.add_all([busy, empty])
+    for i in range(4):
+        session.add(
+            Crumb(
+                body_md=f"crumb {i}",
+                created_at=start + timedelta(hours=i),
+                unit=busy,
+                tags=[python, sql] if i % 2 else [python],
+            )
+        )
+    session.add(Crumb(body_md="no unit", tags=[sql]))
+    session.commit()
+    session.expunge_all()
+
+
+def test_unit_summaries(session: Session):
+    """Test counts, time span and distinct tags per unit, including an empty unit."""
+    _seed(session)
+
+    busy, empty = list_unit_summaries(session)
+
+    assert (busy.name, busy.crumb_count) == ("busy", 4)
+    assert busy.first_crumb_at == datetime(2024, 1, 1)
+    assert busy.last_crumb_at == datetime(2024, 1, 1, 3)
+    assert busy.tags == ["python", "sql"]
+    assert (empty.name, empty.crumb_count, empty.first_crumb_at, empty.tags) == (
+        "empty",
+        0,
+        None,
+        [],
+    )
+
+
+def test_unit_summaries_take_one_statement(session: Session, count_statements):
+    """Test that no crumbs are loaded: the overview is a single statement."""
+    _seed(session)
+
+    with count_statements(session) as statements:
+        list_unit_summaries(session)
+
+    assert len(statements) == 1
+    assert len(session.identity_map) == 0
+
+
+def test_unit_summaries_use_the_unit_index(session: Session):
+    """Test that the per-unit aggregate reads the (unit_id, created_at) index."""
+    plan = _query_plan(session, unit_summary_statement("sqlite"))
+    assert "idx_crumb_unit_id_created_at" in plan
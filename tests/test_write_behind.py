@@ -0,0 +1,83 @@
+"""Tests for the write-behind crumb queue."""
+from concurrent.futures import wait
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+
+from app.db import SessionFactory
+from app.models import Crumb, CrumbCreate, TagCreate
+from app.write_behind import WriteBehindQueue
+
+
+def _crumb(i: int, tags=("python",)) -> CrumbCreate:
+    return CrumbCreate(
+        body_md=f"crumb {i}", unit_name="Week 1", tags=[TagCreate(name=t) for t in tags]
+    )
+
+
+@pytest.fixture(name="factory")
+def factory_fixture(session: Session):
+    return SessionFactory(session.get_bind())
+
+
+def test_batches_by_size(session: Session, factory: SessionFactory):
+    """Test that crumbs are grouped into transactions of at most max_batch."""
+    with WriteBehindQueue(factory, max_batch=10, max_delay_ms=10_000) as writer:
+        futures = [writer.submit(_crumb(i)) for i in range(25)]
+        writer.flush(timeout=5)
+        ids = [future.result(timeout=0) for future in futures]
+        stats = writer.stats()
+
+    assert ids == sorted(ids) and len(set(ids)) == 25
+    assert (stats.written, stats.batches, stats.pending) == (25, 3, 0)
+    crumbs = session.exec(select(Crumb).order_by(Crumb.id)).all()
+    assert [c.body_md for c in crumbs] == [f"crumb {i}" for i in range(25)]
+    assert {c.unit.name for c in crumbs} == {"Week 1"}
+    assert all([t.name for t in c.tags] == ["python"] for c in crumbs)
+
+
+def test_batches_by_delay(factory: SessionFactory):
+    """Test that a lone crumb is written once max_delay_ms has passed, without a flush."""
+    with WriteBehindQueue(factory, max_batch=100, max_delay_ms=20) as writer:
+        assert writer.submit(_crumb(0)).result(timeout=5) >= 1
+        assert writer.stats().batches == 1
+
+
+def test_close_writes_pending_crumbs(session: Session, factory: SessionFactory):
+    """Test that close() writes everything queued and then refuses new crumbs."""
+    writer = WriteBehindQueue(factory, max_batch=100, max_delay_ms=60_000).start()
+    futures = [writer.submit(_crumb(i)) for i in range(5)]
+    writer.close()
+    assert all(future.done() for future in futures)
+    assert len(session.exec(select(Crumb)).all()) == 5
+    with pytest.raises(RuntimeError):
+        writer.submit(_crumb(5))
+
+
+def test_a_bad_crumb_fails_alone(session: Session, factory: SessionFactory):
+    """Test that a failing batch is retried crumb by crumb."""
+    bad = CrumbCreate.model_construct(body_md=None, tags=[], unit_name=None)
+    with WriteBehindQueue(factory, max_batch=10, max_delay_ms=10_000) as writer:
+        futures = [writer.submit(_crumb(0)), writer.submit(bad), writer.submit(_crumb(2))]
+        writer.flush(timeout=5)
+        stats = writer.stats()
+
+    wait(futures, timeout=5)
+    assert futures[0].result() and futures[2].result()
+    with pytest.raises(IntegrityError):
+        futures[1].result()
+    assert (stats.written, stats.failed) == (2, 1)
+    assert [c.body_md for c in session.exec(select(Crumb)).all()] == ["crumb 0", "crumb 2"]
+
+
+def test_cancelled_crumbs_are_skipped(session: Session, factory: SessionFactory):
+    """Test that a future cancelled before its batch is written is dropped."""
+    writer = WriteBehindQueue(factory, max_batch=10, max_delay_ms=10_000)
+    keep, drop = writer.submit(_crumb(0)), writer.submit(_crumb(1))
+    assert drop.cancel()
+    with writer:
+        writer.flush(timeout=5)
+        assert writer.stats().cancelled == 1
+    assert keep.result(timeout=0)
+    assert [c.body_md for c in session.exec(select(Crumb)).all()] == ["crumb 0"]